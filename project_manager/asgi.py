@@ -2,6 +2,9 @@
 ASGI config for project_manager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it (e.g. ``uvicorn project_manager.asgi:application``) for the async
+views and the project event stream (Server-Sent Events), which holds one
+long-lived connection per open project page.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
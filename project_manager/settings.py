@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,7 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that session and auth queries are measured too.
+    'projects.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'projects.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,6 +70,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'projects.context_processors.project_access',
             ],
         },
     },
@@ -84,6 +89,29 @@ DATABASES = {
     }
 }
 
+# PRAGMAs applied to every new SQLite connection: 'production' (WAL, busy
+# timeout, synchronous=NORMAL, bigger cache, mmap) or 'default' (SQLite's own
+# defaults). See projects/sqlite.py; compare both with `manage.py bench_sqlite`.
+PROJECTS_SQLITE_PROFILE = 'production'
+
+# Read replicas, as a comma-separated list of database files in the
+# PROJECTS_REPLICA_DATABASES environment variable. Each becomes an alias
+# 'replica1', 'replica2', ... that the read-only project views read from (see
+# projects/routers.py); all writes go to 'default'. Tests mirror them onto the
+# default test database.
+for index, path in enumerate(filter(None, os.environ.get('PROJECTS_REPLICA_DATABASES', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+PROJECTS_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['projects.routers.ReadReplicaRouter']
+
+# After a write, the client reads from the primary for this many seconds, so
+# it always sees its own writes while the replicas catch up.
+PROJECTS_REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -140,4 +168,118 @@ LOGIN_REDIRECT_URL = 'projects:project-list'
 
 # This tells Django where to redirect users by default AFTER they log out.
 # Redirecting back to the login page is a common pattern.
-LOGOUT_REDIRECT_URL = 'login'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'login'
+
+# =============================================================================
+# CACHING
+# =============================================================================
+
+# Any Django cache backend works here; the role cache only needs get/set/delete.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache alias and lifetime (seconds) of the (user, project) -> role cache.
+# Entries are invalidated by ProjectMembership signals; the timeout only bounds
+# how long a role changed outside the ORM (e.g. a raw UPDATE) can linger.
+PROJECTS_ROLE_CACHE_ALIAS = 'default'
+PROJECTS_ROLE_CACHE_TIMEOUT = 300
+
+# Cache alias and lifetime (seconds) of rendered HTMX fragments. Fragments are
+# keyed on a per-project version that every write bumps, so the timeout only
+# decides how long superseded fragments occupy the cache.
+PROJECTS_FRAGMENT_CACHE_ALIAS = 'default'
+PROJECTS_FRAGMENT_CACHE_TIMEOUT = 600
+
+# Sessions and the authenticated user, looked up on every request before any
+# view runs. 'database' is Django's default: a django_session and an auth_user
+# query per authenticated request. 'cached' serves sessions from the cache
+# with the database as fallback (cached_db) and caches the User per id (see
+# projects/backends.py), so warm requests make neither query. Switching
+# profiles signs users out once, as their sessions name the previous backend.
+# 'cached' needs a cache shared by all processes (e.g. Redis or Memcached):
+# with the per-process LocMemCache above, a logout or password change in one
+# process is not seen by the others. Compare both with `bench_auth`.
+PROJECTS_AUTH_PROFILES = {
+    'database': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['projects.backends.CachedModelBackend'],
+    },
+}
+PROJECTS_AUTH_PROFILE = os.environ.get('PROJECTS_AUTH_PROFILE', 'database')
+SESSION_ENGINE = PROJECTS_AUTH_PROFILES[PROJECTS_AUTH_PROFILE]['SESSION_ENGINE']
+AUTHENTICATION_BACKENDS = PROJECTS_AUTH_PROFILES[PROJECTS_AUTH_PROFILE]['AUTHENTICATION_BACKENDS']
+
+# Cache alias and lifetime (seconds) of users cached by CachedModelBackend.
+# Entries are invalidated by User signals and on logout; the timeout only
+# bounds how long a change made outside the ORM can linger.
+PROJECTS_USER_CACHE_ALIAS = 'default'
+PROJECTS_USER_CACHE_TIMEOUT = 300
+
+REST_FRAMEWORK = {
+    # Browser sessions, plus HTTP Basic for other services calling the API.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+# =============================================================================
+# PROJECTS APP SETTINGS
+# =============================================================================
+
+# Rows per page of the cursor-paginated project list (HTMX infinite scroll).
+PROJECTS_PAGE_SIZE = 20
+
+# Comments per page of the project detail comment feed ("Load older comments").
+PROJECTS_COMMENT_PAGE_SIZE = 20
+
+# Default and maximum page size (`?page_size=`) of the JSON API lists.
+PROJECTS_API_PAGE_SIZE = 50
+PROJECTS_API_MAX_PAGE_SIZE = 200
+
+# Maximum number of results of the project/comment full-text search.
+PROJECTS_SEARCH_LIMIT = 20
+
+# Maximum number of rows accepted by the bulk member add form.
+PROJECTS_BULK_ADD_LIMIT = 1000
+
+# Records written per transaction by the import view (the import_projects
+# command has its own --batch-size option).
+PROJECTS_IMPORT_BATCH_SIZE = 500
+
+# Server-Sent Events stream of the project page: seconds between keepalives,
+# and seconds after which a stream ends (the browser reconnects). Streams need
+# the ASGI entry point. The broker delivers change events to the streams; the
+# in-process one only reaches streams served by the same process.
+PROJECTS_EVENTS_HEARTBEAT = 15
+PROJECTS_EVENTS_MAX_AGE = 300
+PROJECTS_EVENT_BROKER = 'projects.events.InProcessBroker'
+
+# Maximum number of comments in one JSON array posted to the comment endpoint.
+PROJECTS_COMMENT_BATCH_LIMIT = 500
+
+# Write-coalescing comment ingestion for bursts (see projects/ingest.py): when
+# enabled, comments are written in batches of up to MAX_ROWS, at most
+# MAX_DELAY_MS after the first one, with one commit per batch. A request waits
+# up to TIMEOUT seconds for its batch to commit. Compare with `bench_ingest`.
+PROJECTS_COMMENT_INGEST = False
+PROJECTS_COMMENT_INGEST_MAX_ROWS = 200
+PROJECTS_COMMENT_INGEST_MAX_DELAY_MS = 10
+PROJECTS_COMMENT_INGEST_TIMEOUT = 5
+
+# Window of the dashboard's recent comment count, in days. Summaries are
+# precomputed (see projects/dashboard.py); run `rebuild_dashboard_summaries`
+# nightly so overdue projects, the week and this window move on.
+PROJECTS_DASHBOARD_RECENT_DAYS = 7
+
+# Per-view latency/SQL metrics served on /metrics (staff only). When False the
+# metrics middleware unloads itself and adds no per-request or per-query cost.
+PROJECTS_METRICS_ENABLED = True
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic.base import RedirectView
 from projects import views as auth_views
+from projects.metrics import metrics_view
 
 app_name = 'projects'
 
@@ -28,4 +29,5 @@ urlpatterns = [
     path('login/', auth_views.UserLoginView.as_view(), name='login'),
     path('logout/', auth_views.UserLogoutView.as_view(), name='logout'),    
     path('projects/', include('projects.urls', namespace='projects')),
+    path('metrics', metrics_view, name='metrics'),
 ]
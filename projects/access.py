@@ -0,0 +1,246 @@
+"""
+Request-scoped resolution of a user's access to a project.
+
+A protected page used to look up the caller's ProjectMembership several times:
+once in UserRoleRequiredMixin, again in the view, and once more while building
+the template context. `get_project_access` loads the membership together with
+its project in a single query and attaches the result to the request, so every
+mixin, view and template handling that request shares the same objects.
+
+Roles are additionally kept in a cross-request cache keyed on
+(user_id, project_id). Entries are dropped by the ProjectMembership signal
+handlers in `projects.signals`, so adding or removing a member never leaves a
+stale role behind. On a cache hit the project itself is only loaded if the
+view actually asks for it.
+"""
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Project, ProjectMembership
+from .routers import use_primary
+
+# Stored for users who are not members of a project, so repeated probes by
+# outsiders are answered from the cache as well.
+NOT_A_MEMBER = ''
+
+
+class RoleCacheStats:
+    """
+    Thread-safe hit/miss counters for the role cache of this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+role_cache_stats = RoleCacheStats()
+
+
+def _role_cache():
+    return caches[getattr(settings, 'PROJECTS_ROLE_CACHE_ALIAS', 'default')]
+
+
+def role_cache_key(user_id, project_id):
+    return f'projects:role:{user_id}:{project_id}'
+
+
+def get_cached_role(user_id, project_id):
+    """
+    Returns the cached role, NOT_A_MEMBER for a cached non-member, or None on
+    a cache miss. Every call is counted in `role_cache_stats`.
+    """
+    role = _role_cache().get(role_cache_key(user_id, project_id))
+    role_cache_stats.record(hit=role is not None)
+    return role
+
+
+def set_cached_role(user_id, project_id, role):
+    timeout = getattr(settings, 'PROJECTS_ROLE_CACHE_TIMEOUT', 300)
+    _role_cache().set(role_cache_key(user_id, project_id), role, timeout)
+
+
+def invalidate_role(user_id, project_id):
+    """
+    Drops the cached role of one user in one project.
+
+    The entry is deleted right away and once more when the surrounding
+    transaction commits, so a concurrent request that re-read the old row
+    before the commit cannot keep a stale role in the cache.
+    """
+    key = role_cache_key(user_id, project_id)
+    cache = _role_cache()
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class ProjectAccess:
+    """
+    What the current user may see of one project.
+
+    - `user`: The user the access was resolved for.
+    - `project_pk`: The primary key that was resolved.
+    - `role`: The caller's role in the project ('Owner', 'Editor' or 'Reader').
+    - `membership`: The caller's ProjectMembership row.
+    - `project`: The Project itself.
+    """
+
+    def __init__(self, user, project_pk, role, membership=None, project=None):
+        self.user = user
+        self.project_pk = int(project_pk)
+        self.role = role
+        self._membership = membership
+        self._project = project
+
+    @property
+    def membership(self):
+        if self._membership is None:
+            self._membership = ProjectMembership.objects.get(
+                project__pk=self.project_pk, user=self.user
+            )
+        return self._membership
+
+    @property
+    def project(self):
+        if self._project is None:
+            self._project = Project.objects.get(pk=self.project_pk)
+        return self._project
+
+    async def aget_project(self):
+        """Async-safe counterpart of the `project` property."""
+        if self._project is None:
+            self._project = await Project.objects.aget(pk=self.project_pk)
+        return self._project
+
+    def has_role(self, roles):
+        return self.role in roles
+
+    def __repr__(self):
+        return f"<ProjectAccess project={self.project_pk} role={self.role}>"
+
+
+def get_project_access(request, project_pk):
+    """
+    Returns the ProjectAccess of `request.user` for the given project, or None
+    when the user is anonymous or not a member.
+
+    The result is stored on `request.project_access`, so repeated calls for the
+    same project within one request do not touch the database again. The role
+    comes from the cross-request cache when possible; only a miss queries
+    ProjectMembership (loading the project in the same query).
+    """
+    access = getattr(request, 'project_access', None)
+    if access is not None and access.project_pk == int(project_pk):
+        return access
+
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    role = get_cached_role(user.pk, project_pk)
+    if role == NOT_A_MEMBER:
+        return None
+    if role is not None:
+        access = ProjectAccess(user, project_pk, role)
+        request.project_access = access
+        return access
+
+    try:
+        # Always from the primary: the result is cached, and a lagging replica
+        # must not leave a stale role (or a stale "not a member") behind.
+        with use_primary():
+            membership = ProjectMembership.objects.select_related('project').get(
+                project__pk=project_pk, user=user
+            )
+    except ProjectMembership.DoesNotExist:
+        set_cached_role(user.pk, project_pk, NOT_A_MEMBER)
+        return None
+
+    set_cached_role(user.pk, project_pk, membership.role)
+    # The membership belongs to the requesting user; reuse that instance
+    # instead of letting `membership.user` lazily load it again.
+    membership.user = user
+    access = ProjectAccess(
+        user, project_pk, membership.role, membership=membership, project=membership.project
+    )
+    request.project_access = access
+    return access
+
+
+async def aget_request_user(request):
+    """
+    Returns `request.user` from async code. AuthenticationMiddleware attaches
+    a lazy object whose session and user lookups are sync-only, so it is
+    evaluated once in a worker thread; afterwards it is a plain User (or
+    AnonymousUser) that async code can use freely.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def aget_project_access(request, project_pk):
+    """
+    Async counterpart of `get_project_access`, built on the async cache API
+    and `aget()`, so async views never block the event loop on role checks.
+    """
+    access = getattr(request, 'project_access', None)
+    if access is not None and access.project_pk == int(project_pk):
+        return access
+
+    user = await aget_request_user(request)
+    if not user.is_authenticated:
+        return None
+
+    key = role_cache_key(user.pk, project_pk)
+    timeout = getattr(settings, 'PROJECTS_ROLE_CACHE_TIMEOUT', 300)
+    role = await _role_cache().aget(key)
+    role_cache_stats.record(hit=role is not None)
+    if role == NOT_A_MEMBER:
+        return None
+    if role is not None:
+        access = ProjectAccess(user, project_pk, role)
+        request.project_access = access
+        return access
+
+    try:
+        with use_primary():
+            membership = await ProjectMembership.objects.select_related('project').aget(
+                project__pk=project_pk, user=user
+            )
+    except ProjectMembership.DoesNotExist:
+        await _role_cache().aset(key, NOT_A_MEMBER, timeout)
+        return None
+
+    await _role_cache().aset(key, membership.role, timeout)
+    membership.user = user
+    access = ProjectAccess(
+        user, project_pk, membership.role, membership=membership, project=membership.project
+    )
+    request.project_access = access
+    return access
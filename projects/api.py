@@ -0,0 +1,156 @@
+"""
+Read-only JSON API for projects, their members and comments.
+
+    GET /projects/api/projects/                 projects of the caller
+    GET /projects/api/projects/<pk>/            one project
+    GET /projects/api/projects/<pk>/members/    its members
+    GET /projects/api/projects/<pk>/comments/   its comments, newest first
+    GET /projects/api/projects/<pk>/comments/history/
+                                                all its comments, streamed
+
+The list and detail endpoints accept `?fields=a,b,c` to return only those fields. The
+queryset is shaped from the requested fields (see
+`SparseFieldsetSerializer.optimize`): unused columns are not read, and joins
+or prefetches only happen for the fields that need them. Lists use DRF's
+cursor pagination (`?cursor=`, `?page_size=`), which never counts rows, so a
+page costs the same fixed number of queries whatever its size or position.
+The comment history is not paginated: it streams every comment in one
+response and ends with a `since` cursor for the next incremental pull.
+
+Access follows the HTML views: only members see a project, its members and
+its comments. The project list can be narrowed to the caller's roles with
+`?role=Owner,Editor`.
+"""
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import generics, serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import CursorPagination
+from rest_framework.views import APIView
+
+from .access import get_project_access
+from .models import Comment, Project, ProjectMembership
+from .pagination import filter_after
+from .serializers import MembershipSerializer, ProjectCommentSerializer, ProjectSerializer
+from .transfer import HISTORY_KEYS, astream_comment_history, stream_comment_history
+
+
+class ApiCursorPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'PROJECTS_API_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'PROJECTS_API_MAX_PAGE_SIZE', 200)
+        return super().get_page_size(request)
+
+
+class ProjectCursorPagination(ApiCursorPagination):
+    # Same order (and index) as the HTML project list.
+    ordering = ('-updated_at', '-id')
+
+
+class CommentCursorPagination(ApiCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class MemberCursorPagination(ApiCursorPagination):
+    ordering = ('id',)
+
+
+class SparseFieldsMixin:
+    """
+    Passes `?fields=` to the serializer and lets it pick the columns, joins
+    and prefetches of the queryset.
+    """
+    # Project reads may be served by a read replica (see projects.routers).
+    read_replica = True
+
+    def get_fields(self):
+        if not hasattr(self, '_fields'):
+            self._fields = self.serializer_class.parse_fields(self.request.query_params.get('fields'))
+        return self._fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['fields'] = self.get_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def optimize(self, queryset):
+        ordering = getattr(self.pagination_class, 'ordering', ())
+        # The ordering columns are needed to build the next cursor.
+        keep = [key.lstrip('-') for key in ordering]
+        return self.serializer_class.optimize(queryset, self.get_fields(), keep=keep)
+
+
+class ProjectApiMixin(SparseFieldsMixin):
+    serializer_class = ProjectSerializer
+    pagination_class = ProjectCursorPagination
+
+    def get_queryset(self):
+        queryset = Project.objects.for_member(self.request.user)
+        roles = [role for role in self.request.query_params.get('role', '').split(',') if role]
+        if roles:
+            invalid = set(roles) - set(dict(ProjectMembership.ROLE_CHOICES))
+            if invalid:
+                raise serializers.ValidationError({'role': [f"Invalid role {role!r}." for role in sorted(invalid)]})
+            # Filters on the annotation, reusing the membership join of for_member.
+            queryset = queryset.filter(user_role__in=roles)
+        return self.optimize(queryset)
+
+
+class ProjectListApiView(ProjectApiMixin, generics.ListAPIView):
+    pass
+
+
+class ProjectDetailApiView(ProjectApiMixin, generics.RetrieveAPIView):
+    pass
+
+
+class ProjectChildApiMixin:
+    """Serves rows of one project the caller is a member of; 404 for everyone else."""
+
+    def get_project_pk(self):
+        access = get_project_access(self.request, self.kwargs['pk'])
+        if access is None:
+            raise Http404
+        return access.project_pk
+
+
+class ProjectMembersApiView(ProjectChildApiMixin, SparseFieldsMixin, generics.ListAPIView):
+    serializer_class = MembershipSerializer
+    pagination_class = MemberCursorPagination
+
+    def get_queryset(self):
+        return self.optimize(ProjectMembership.objects.filter(project_id=self.get_project_pk()))
+
+
+class ProjectCommentsApiView(ProjectChildApiMixin, SparseFieldsMixin, generics.ListAPIView):
+    serializer_class = ProjectCommentSerializer
+    pagination_class = CommentCursorPagination
+
+    def get_queryset(self):
+        return self.optimize(Comment.objects.filter(project_id=self.get_project_pk()))
+
+
+class ProjectCommentHistoryApiView(ProjectChildApiMixin, APIView):
+    """
+    Streams the complete comment history of a project, oldest first (see
+    `stream_comment_history`). Pass the `since` value of the previous
+    response as `?since=` to get only the comments added after it.
+    """
+    read_replica = True
+
+    def get(self, request, pk):
+        project_pk = self.get_project_pk()
+        since = request.query_params.get('since') or None
+        # The rows are read while the response streams, after the replica
+        # routing of this request has ended, so the database is chosen now.
+        comments = Comment.objects.using(router.db_for_read(Comment)).filter(project_id=project_pk)
+        try:
+            comments = filter_after(comments, since, HISTORY_KEYS, descending=False)
+        except ValueError:
+            raise ParseError('Invalid since cursor.')
+        # Under ASGI a sync iterator would be read whole before sending.
+        stream = astream_comment_history if isinstance(request._request, ASGIRequest) else stream_comment_history
+        return StreamingHttpResponse(stream(comments, project_pk, since), content_type='application/json')
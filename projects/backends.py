@@ -0,0 +1,96 @@
+"""
+Cached user lookup for AuthenticationMiddleware.
+
+Every authenticated request resolves `request.user` through the session's
+authentication backend, which with ModelBackend is one `auth_user` query.
+`CachedModelBackend` keeps the User in the cache, keyed on its id, so a warm
+request skips that query. It is enabled by the 'cached' auth profile in
+settings (PROJECTS_AUTH_PROFILE), together with the cached_db session engine
+that serves the session row from the same cache.
+
+Cached users are dropped by the signal handlers in `projects.signals` when the
+User is saved or deleted (which covers password changes, deactivation and the
+`last_login` update on every login) and when the user logs out. The timeout
+only bounds how long a change made outside the ORM (e.g. a QuerySet.update()
+or raw SQL) can linger. Django still checks the session's password hash
+against the cached user on every request.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+
+class UserCacheStats:
+    """
+    Thread-safe hit/miss counters for the user cache of this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+user_cache_stats = UserCacheStats()
+
+
+def _user_cache():
+    return caches[getattr(settings, 'PROJECTS_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'projects:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    """
+    Drops the cached User. Like `invalidate_role`, the entry is deleted right
+    away and once more when the surrounding transaction commits.
+    """
+    key = user_cache_key(user_id)
+    cache = _user_cache()
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose `get_user()` is served from the cache. Logging in
+    (`authenticate()`) and permission checks are unchanged.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        cache = _user_cache()
+        user = cache.get(key)
+        user_cache_stats.record(hit=user is not None)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, getattr(settings, 'PROJECTS_USER_CACHE_TIMEOUT', 300))
+        return user if self.user_can_authenticate(user) else None
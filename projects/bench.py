@@ -0,0 +1,135 @@
+"""
+Shared helpers for the benchmark management commands.
+
+- `scratch_database()` runs a benchmark against a throwaway test database, so
+  benchmarks never touch the real data.
+- `seed()` fills it with a synthetic dataset using bulk_create.
+- `summarize()` turns raw latency samples into p50/p95/p99.
+"""
+import math
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .models import Comment, Project, ProjectMembership
+
+BENCH_PASSWORD = 'bench-password'
+
+
+@contextmanager
+def scratch_database(aliases=('default',), on_disk=False):
+    """
+    Creates fresh, migrated test databases for `aliases`, yields, then
+    destroys them. Caches are cleared on entry so results don't depend on
+    earlier runs. The test client's 'testserver' host is allowed meanwhile.
+
+    SQLite test databases live in memory by default. Pass `on_disk=True` to
+    put them in temporary files instead, so that concurrent connections see
+    real file locking (and real "database is locked" errors).
+    """
+    tmpdir = tempfile.mkdtemp(prefix='projects-bench-') if on_disk else None
+    old_names = []
+    for alias in aliases:
+        connection = connections[alias]
+        if on_disk and connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, f'{alias}.sqlite3')
+        old_names.append((connection, connection.creation.create_test_db(verbosity=0, autoclobber=True)))
+    for cache in caches.all():
+        cache.clear()
+    try:
+        with override_settings(ALLOWED_HOSTS=['testserver', 'localhost']):
+            yield
+    finally:
+        for connection, old_name in old_names:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if on_disk:
+                connection.settings_dict['TEST']['NAME'] = None
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+class Dataset:
+    """Handles to the seeded rows that benchmark scenarios need."""
+
+    def __init__(self, users, projects):
+        self.users = users
+        self.projects = projects
+
+
+def seed(users=50, projects=200, members_per_project=6, comments_per_project=50, batch_size=1000):
+    """
+    Creates a synthetic dataset with bulk_create:
+    - `users` users (all with the password BENCH_PASSWORD),
+    - `projects` projects, each with one Owner and `members_per_project - 1`
+      further members alternating between Editor and Reader,
+    - `comments_per_project` comments per project from its members.
+    The denormalized counters are filled in directly.
+    """
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'bench-user-{i}', password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.filter(username__startswith='bench-user-').order_by('pk').values_list('pk', flat=True))
+
+    members_per_project = min(members_per_project, len(user_ids))
+    today = date.today()
+    Project.objects.bulk_create(
+        [
+            Project(
+                name=f'Bench project {i}',
+                description=f'Synthetic project number {i} used for benchmarking.',
+                start_date=today - timedelta(days=i % 60),
+                end_date=today + timedelta(days=(i % 90) - 30),
+                member_count=members_per_project,
+                comment_count=comments_per_project,
+            )
+            for i in range(projects)
+        ],
+        batch_size=batch_size,
+    )
+    project_ids = list(Project.objects.filter(name__startswith='Bench project ').order_by('pk').values_list('pk', flat=True))
+
+    memberships = []
+    comments = []
+    for n, project_id in enumerate(project_ids):
+        member_ids = [user_ids[(n + k) % len(user_ids)] for k in range(members_per_project)]
+        for k, user_id in enumerate(member_ids):
+            role = 'Owner' if k == 0 else ('Editor' if k % 2 else 'Reader')
+            memberships.append(ProjectMembership(project_id=project_id, user_id=user_id, role=role))
+        for c in range(comments_per_project):
+            comments.append(Comment(project_id=project_id, user_id=member_ids[c % len(member_ids)], text=f'Comment {c}'))
+    ProjectMembership.objects.bulk_create(memberships, batch_size=batch_size)
+    Comment.objects.bulk_create(comments, batch_size=batch_size)
+    Project.objects.filter(pk__in=project_ids).update(last_activity_at=timezone.now())
+
+    return Dataset(
+        users=list(User.objects.filter(pk__in=user_ids).order_by('pk')),
+        projects=list(Project.objects.filter(pk__in=project_ids).order_by('pk')),
+    )
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms):
+    return {
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+    }
@@ -0,0 +1,120 @@
+"""
+Validators for conditional GETs (ETag / Last-Modified -> 304 Not Modified).
+
+They are computed without rendering anything, for use with Django's
+`condition` decorator:
+
+- A project page changes when the project row is saved (`updated_at`) or
+  when a comment or membership is written (`last_activity_at`, which those
+  writes keep up to date, and the fragment version bumped by
+  `projects.signals`).
+- The project list changes when any of the user's projects does, or when the
+  user joins or leaves a project or changes role in one. One aggregate over
+  the user's memberships covers all of that.
+
+Every ETag also covers the user, their role, whether the request is an HTMX
+request (partials and full pages differ) and the CSRF secret (the pages
+embed a token derived from it), so a cached response is never revalidated
+for a different user or role.
+
+The validators are computed once per request and kept on it, because
+`condition` asks for the ETag and the Last-Modified date separately.
+"""
+import hashlib
+
+from django.db import models
+from django.db.models import Case, Count, F, Max, Sum, When
+from django.middleware.csrf import get_token
+
+from .fragments import get_fragment_version
+from .models import ProjectMembership
+
+
+class Validators:
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def _csrf_secret(request):
+    # get_token() creates the secret (and schedules its cookie) on a first
+    # visit, so the first revalidation already matches.
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def _etag(request, *parts):
+    parts = (
+        request.user.pk,
+        bool(request.headers.get('HX-Request')),
+        _csrf_secret(request),
+        request.GET.urlencode(),
+        *parts,
+    )
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def project_validators(request, pk):
+    """
+    Validators of a project page. Must run after the role check, which
+    attaches `request.project_access`.
+    """
+    if not hasattr(request, '_project_validators'):
+        access = request.project_access
+        project = access.project
+        request._project_validators = Validators(
+            etag=_etag(
+                request, project.pk, access.role, project.updated_at,
+                project.last_activity_at, get_fragment_version(project.pk),
+            ),
+            last_modified=_latest(project.updated_at, project.last_activity_at),
+        )
+    return request._project_validators
+
+
+def project_list_validators(request):
+    """Validators of the current user's project list."""
+    if not hasattr(request, '_project_list_validators'):
+        summary = ProjectMembership.objects.filter(user=request.user).aggregate(
+            memberships=Count('pk'),
+            latest_membership=Max('pk'),
+            # Changes whenever one of the user's roles does: the rows show the
+            # role and the links it allows.
+            roles=Sum(Case(
+                *[
+                    When(role=role, then=F('pk') * weight)
+                    for weight, (role, _) in enumerate(ProjectMembership.ROLE_CHOICES, start=1)
+                ],
+                output_field=models.BigIntegerField(),
+            )),
+            updated_at=Max('project__updated_at'),
+            last_activity_at=Max('project__last_activity_at'),
+        )
+        last_modified = _latest(summary['updated_at'], summary['last_activity_at'])
+        request._project_list_validators = Validators(
+            etag=_etag(request, *summary.values()),
+            last_modified=last_modified,
+        )
+    return request._project_list_validators
+
+
+def project_etag(request, pk, *args, **kwargs):
+    return project_validators(request, pk).etag
+
+
+def project_last_modified(request, pk, *args, **kwargs):
+    return project_validators(request, pk).last_modified
+
+
+def project_list_etag(request, *args, **kwargs):
+    return project_list_validators(request).etag
+
+
+def project_list_last_modified(request, *args, **kwargs):
+    return project_list_validators(request).last_modified
@@ -0,0 +1,11 @@
+def project_access(request):
+    """
+    Exposes the project access resolved earlier in the request (if any) to
+    templates as `project_access` and `user_role`, so templates never need to
+    look up the membership themselves.
+    """
+    access = getattr(request, 'project_access', None)
+    return {
+        'project_access': access,
+        'user_role': access.role if access is not None else None,
+    }
@@ -0,0 +1,199 @@
+"""
+Per-user dashboard summaries.
+
+The dashboard shows how many projects a user has per role, how many of them
+are overdue (`end_date` in the past) or start this week, and the comment
+volume of their projects in the last PROJECTS_DASHBOARD_RECENT_DAYS days.
+Computing that live aggregates over all of a user's memberships, projects
+and comments, so it is precomputed into one UserDashboardSummary row per
+user and the dashboard reads just that row.
+
+Rows are kept current incrementally, in the same transaction as the write
+that changes them:
+
+- A membership added or removed adds or subtracts that project's
+  contribution to the member's row.
+- A new or deleted comment adds or subtracts 1 for every member of its
+  project.
+- A change to a project's dates moves its members' overdue and
+  starting-this-week counts.
+
+The signal handlers in `projects.signals` cover the model writes. The bulk
+paths call `add_memberships`, `add_comments` or `rebuild_summaries`
+themselves. Each update is a single UPDATE whose conditions are evaluated
+against the window stored in each row, so rows rebuilt at different times
+stay exact.
+
+Time moves the windows on without any write: projects become overdue,
+weeks roll over and old comments age out. `manage.py
+rebuild_dashboard_summaries` therefore recomputes every row nightly. A row
+whose `as_of` is not today is rebuilt when the dashboard reads it, so a
+missed nightly run only costs that user one live aggregate.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Project, ProjectMembership, UserDashboardSummary
+
+COUNT_FIELDS = (
+    'owner_count', 'editor_count', 'reader_count', 'overdue_count', 'starting_this_week_count',
+    'recent_comment_count',
+)
+WINDOW_FIELDS = ('as_of', 'week_start', 'week_end', 'recent_since', 'rebuilt_at')
+
+
+def current_window():
+    """Returns the window a rebuild made now computes: as_of, week_start, week_end and recent_since."""
+    now = timezone.now()
+    today = timezone.localdate(now)
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        'as_of': today,
+        'week_start': week_start,
+        'week_end': week_start + timedelta(days=7),
+        'recent_since': now - timedelta(days=getattr(settings, 'PROJECTS_DASHBOARD_RECENT_DAYS', 7)),
+    }
+
+
+def rebuild_summaries(user_ids):
+    """
+    Recomputes the rows of `user_ids` from the source tables with two
+    grouped queries and writes them with one upsert. Returns the row count.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    window = current_window()
+    memberships = (
+        ProjectMembership.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            owner_count=Count('pk', filter=Q(role='Owner')),
+            editor_count=Count('pk', filter=Q(role='Editor')),
+            reader_count=Count('pk', filter=Q(role='Reader')),
+            overdue_count=Count('pk', filter=Q(project__end_date__lt=window['as_of'])),
+            starting_this_week_count=Count('pk', filter=Q(
+                project__start_date__gte=window['week_start'], project__start_date__lt=window['week_end'],
+            )),
+        )
+    )
+    rows = {row.pop('user_id'): row for row in memberships}
+    comments = (
+        Comment.objects.filter(
+            created_at__gte=window['recent_since'], project__memberships__user_id__in=user_ids,
+        )
+        .values('project__memberships__user_id')
+        .annotate(count=Count('pk'))
+    )
+    recent = {row['project__memberships__user_id']: row['count'] for row in comments}
+
+    rebuilt_at = timezone.now()
+    summaries = [
+        UserDashboardSummary(
+            user_id=user_id,
+            **rows.get(user_id, {}),
+            recent_comment_count=recent.get(user_id, 0),
+            rebuilt_at=rebuilt_at,
+            **window,
+        )
+        for user_id in user_ids
+    ]
+    UserDashboardSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=['user'],
+        update_fields=COUNT_FIELDS + WINDOW_FIELDS,
+    )
+    return len(summaries)
+
+
+def get_dashboard_summary(user):
+    """Returns the user's summary row, rebuilding it first if it is missing or from an earlier day."""
+    summary = UserDashboardSummary.objects.filter(user=user).first()
+    if summary is None or summary.as_of != timezone.localdate():
+        rebuild_summaries([user.pk])
+        summary = UserDashboardSummary.objects.get(user=user)
+    return summary
+
+
+def _change(field, amount, sign):
+    return F(field) + amount if sign > 0 else F(field) - amount
+
+
+def _flag(condition):
+    return Case(When(condition, then=Value(1)), default=Value(0), output_field=models.IntegerField())
+
+
+def _overdue(end_date):
+    # Projects without an end date are never overdue (a NULL from the
+    # subquery compares as unknown, so it counts 0 as well).
+    if end_date is None:
+        return Value(0)
+    return _flag(Q(as_of__gt=end_date))
+
+
+def _starting(start_date):
+    return _flag(Q(week_start__lte=start_date, week_end__gt=start_date))
+
+
+def _project_date(project_id, field):
+    return Subquery(Project.objects.filter(pk=project_id).values(field)[:1])
+
+
+def _project_members(project_id):
+    return ProjectMembership.objects.filter(project_id=project_id).values('user_id')
+
+
+def add_memberships(project_id, user_ids, role, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) the contribution of one project to
+    the rows of `user_ids`, who are, or were, its members with `role`.
+    """
+    recent_comments = Coalesce(Subquery(
+        Comment.objects.filter(project_id=project_id, created_at__gte=OuterRef('recent_since'))
+        .order_by().values('project').annotate(count=Count('pk')).values('count')
+    ), 0)
+    role_field = UserDashboardSummary.ROLE_FIELDS[role]
+    return UserDashboardSummary.objects.filter(user_id__in=list(user_ids)).update(**{
+        role_field: _change(role_field, 1, sign),
+        'overdue_count': _change('overdue_count', _overdue(_project_date(project_id, 'end_date')), sign),
+        'starting_this_week_count': _change(
+            'starting_this_week_count', _starting(_project_date(project_id, 'start_date')), sign
+        ),
+        'recent_comment_count': _change('recent_comment_count', recent_comments, sign),
+    })
+
+
+def add_comments(project_id, count, created_at):
+    """Adds `count` (negative for deletions) comments made at `created_at` to the rows of the project's members."""
+    return UserDashboardSummary.objects.filter(
+        user_id__in=_project_members(project_id), recent_since__lte=created_at,
+    ).update(recent_comment_count=F('recent_comment_count') + count)
+
+
+def move_project_dates(project_id, old_dates, new_dates):
+    """
+    Moves the members' overdue and starting-this-week counts after a
+    project's (start_date, end_date) changed from `old_dates` to `new_dates`.
+    """
+    (old_start, old_end), (new_start, new_end) = old_dates, new_dates
+    return UserDashboardSummary.objects.filter(user_id__in=_project_members(project_id)).update(
+        overdue_count=F('overdue_count') + _overdue(new_end) - _overdue(old_end),
+        starting_this_week_count=F('starting_this_week_count') + _starting(new_start) - _starting(old_start),
+    )
+
+
+def remove_project(project):
+    """
+    Subtracts a project that is about to be deleted from its members' rows.
+    Runs before the delete cascades, while its memberships and comments
+    still exist; their own delete handlers then skip it.
+    """
+    members = {}
+    for user_id, role in ProjectMembership.objects.filter(project=project).values_list('user_id', 'role'):
+        members.setdefault(role, []).append(user_id)
+    for role, user_ids in members.items():
+        add_memberships(project.pk, user_ids, role, sign=-1)
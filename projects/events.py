@@ -0,0 +1,129 @@
+"""
+Publish/subscribe of project changes for the Server-Sent Events stream.
+
+Writes publish a kind of change for a project ('comments' or 'members')
+once their transaction commits (see `projects.signals` and
+`publish_project_event`). Every open event stream of that project is
+subscribed and pushes freshly rendered fragments to its browser (see
+ProjectEventStreamView).
+
+Events only say *what* changed, never the rows themselves: each stream
+renders the fragment for its own user and role, through the fragment cache.
+So a subscriber that misses events or receives them out of order still
+shows the current state, and a burst of writes is coalesced into one render
+per kind.
+
+The broker is pluggable via PROJECTS_EVENT_BROKER (a dotted path). A broker
+has `publish(project_id, kind)`, callable from any thread, and
+`subscribe(project_id)`, an async context manager that yields a
+Subscription. The default `InProcessBroker` only reaches streams served by
+the same process. Deployments running several ASGI processes need a broker
+backed by a shared channel, e.g. Redis pub/sub.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+COMMENTS = 'comments'
+MEMBERS = 'members'
+
+
+class Subscription:
+    """
+    The pending change kinds of one event stream. `notify()` may be called
+    from any thread; the kinds are collected on the subscriber's event loop
+    until `wait()` takes them.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._pending = set()
+        self._ready = asyncio.Event()
+
+    def notify(self, kind):
+        self._loop.call_soon_threadsafe(self._add, kind)
+
+    def _add(self, kind):
+        self._pending.add(kind)
+        self._ready.set()
+
+    async def wait(self, timeout):
+        """Returns the set of kinds that changed, or an empty set after `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return set()
+        kinds, self._pending = self._pending, set()
+        self._ready.clear()
+        return kinds
+
+
+class InProcessBroker:
+    """Delivers events to the subscribers in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, project_id, kind):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(project_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.notify(kind)
+            except RuntimeError:
+                # The subscriber's event loop is closed; it is about to unsubscribe.
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, project_id):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[project_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[project_id].discard(subscription)
+                if not self._subscriptions[project_id]:
+                    del self._subscriptions[project_id]
+
+    def subscriber_count(self, project_id=None):
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscriptions.get(project_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Returns the broker of this process, created from PROJECTS_EVENT_BROKER."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'PROJECTS_EVENT_BROKER', 'projects.events.InProcessBroker')
+            _broker = import_string(path)()
+        return _broker
+
+
+def publish_project_event(project_id, kind):
+    """
+    Publishes a change once the surrounding transaction commits, so streams
+    never render before the new rows are visible (and nothing is published
+    for a rolled back write).
+    """
+    transaction.on_commit(lambda: get_broker().publish(project_id, kind))
+
+
+def format_event(event, data):
+    """Encodes one Server-Sent Event; every line of `data` gets its own `data:` field."""
+    lines = ''.join(f'data: {line}\n' for line in data.splitlines() or [''])
+    return f'event: {event}\n{lines}\n'
@@ -1,4 +1,8 @@
+import csv
+import io
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 
@@ -95,6 +99,49 @@ class AddUserToProjectForm(forms.Form):
             raise forms.ValidationError("A user with this username was not found.")
         return username
     
+class BulkAddUsersToProjectForm(forms.Form):
+    """
+    A form to add many users at once: one `username,role` pair per line,
+    pasted into the text area or uploaded as a CSV file. A missing role
+    means 'Reader'; a leading `username,role` header line is skipped.
+    After validation, `cleaned_data['rows']` holds (line, username, role).
+    """
+    members = forms.CharField(
+        required=False,
+        label="Usernames and roles",
+        widget=forms.Textarea(attrs={'rows': 6, 'placeholder': 'jane.doe,Editor\njohn.roe,Reader'}),
+    )
+    csv_file = forms.FileField(required=False, label="Or upload a CSV file")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        text = cleaned_data.get('members') or ''
+        upload = cleaned_data.get('csv_file')
+        if upload:
+            try:
+                text = upload.read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise forms.ValidationError("The CSV file must be UTF-8 encoded.")
+
+        rows = []
+        for line, record in enumerate(csv.reader(io.StringIO(text)), start=1):
+            fields = [field.strip() for field in record]
+            if not fields or not fields[0]:
+                continue
+            if not rows and fields[0].lower() == 'username':
+                continue
+            role = fields[1] if len(fields) > 1 and fields[1] else 'Reader'
+            rows.append((line, fields[0], role))
+
+        if not rows:
+            raise forms.ValidationError("Enter at least one username.")
+        limit = getattr(settings, 'PROJECTS_BULK_ADD_LIMIT', 1000)
+        if len(rows) > limit:
+            raise forms.ValidationError(f"At most {limit} users can be added at once.")
+        cleaned_data['rows'] = rows
+        return cleaned_data
+
+
 class CommentForm(forms.ModelForm):
     """
     A ModelForm for creating comments on projects.
@@ -0,0 +1,131 @@
+"""
+Versioned cache for the HTML fragments of HTMX partials.
+
+Fragments are rendered by the `{% fragment %}` template tag and stored under a
+key built from (fragment name, user, project, version). Every project has one
+version number in the cache; the signal handlers in `projects.signals` bump it
+on each Project, ProjectMembership and Comment write. Old fragments are never
+deleted: they just stop being looked up and expire on their own.
+
+Versions start from the clock instead of 0, so a version that was evicted from
+the cache can never come back with a number older fragments were stored
+under.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+from .routers import reads_from_replica
+
+
+class FragmentCacheStats:
+    """
+    Thread-safe hit/miss counters of the fragment cache of this process, plus
+    the size of the HTML that hits did not have to render.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def record(self, hit, size=0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += size
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'bytes_saved': self.bytes_saved,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+
+
+fragment_cache_stats = FragmentCacheStats()
+
+
+def _fragment_cache():
+    return caches[getattr(settings, 'PROJECTS_FRAGMENT_CACHE_ALIAS', 'default')]
+
+
+def fragment_version_key(project_id):
+    return f'projects:fragment-version:{project_id}'
+
+
+def get_fragment_version(project_id):
+    """Returns the current fragment version of a project, starting one if needed."""
+    cache = _fragment_cache()
+    key = fragment_version_key(project_id)
+    version = cache.get(key)
+    if version is None:
+        # add() so that concurrent requests agree on a single starting version.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_fragment_version(project_id):
+    """
+    Moves a project on to a new fragment version.
+
+    Like `invalidate_role`, the version is bumped right away and once more
+    when the surrounding transaction commits, so a fragment rendered from the
+    old rows by a concurrent request is not served after the commit.
+    """
+    cache = _fragment_cache()
+    key = fragment_version_key(project_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No version yet: the next read starts a fresh one.
+            pass
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def fragment_cache_key(name, user_id, project_id, version, vary_on=()):
+    return make_template_fragment_key(f'projects:{name}', [user_id, project_id, version, *vary_on])
+
+
+def get_or_render_fragment(name, user_id, project_id, render, vary_on=()):
+    """
+    Returns the cached fragment for (name, user, project, version), or calls
+    `render()` and caches its result. Hits and misses are counted in
+    `fragment_cache_stats`.
+    """
+    cache = _fragment_cache()
+    key = fragment_cache_key(name, user_id, project_id, get_fragment_version(project_id), vary_on)
+    html = cache.get(key)
+    if html is not None:
+        fragment_cache_stats.record(hit=True, size=len(html.encode()))
+        return html
+    fragment_cache_stats.record(hit=False)
+    html = render()
+    timeout = getattr(settings, 'PROJECTS_FRAGMENT_CACHE_TIMEOUT', 600)
+    if reads_from_replica.get():
+        # Rendered from a replica that may lag behind the version: keep it no
+        # longer than the replication lag the sticky window allows for.
+        timeout = min(timeout, getattr(settings, 'PROJECTS_REPLICA_STICKY_SECONDS', 5))
+    cache.set(key, html, timeout)
+    return html
@@ -0,0 +1,191 @@
+"""
+Write-coalescing comment ingestion.
+
+Normally every comment is its own transaction: one INSERT, one counter
+update and one commit, and on SQLite each commit holds the single writer
+lock. During a burst the writers then queue up for that lock, one comment at
+a time.
+
+With PROJECTS_COMMENT_INGEST enabled, CommentOnProject hands validated
+comments to the process-wide `CommentIngestor` instead. A background thread
+writes them in batches: one bulk_create, one counter UPDATE for all their
+projects and a single commit. A batch is flushed as soon as
+PROJECTS_COMMENT_INGEST_MAX_ROWS comments are waiting, or
+PROJECTS_COMMENT_INGEST_MAX_DELAY_MS after the oldest one arrived.
+`submit()` returns a Future that resolves to the saved Comment only after
+its batch has committed, so a client's acknowledgement still means the
+comment is stored. A batch that fails is retried one comment
+at a time, so only the comments that cannot be saved fail.
+
+Batches bypass the model signals, so the ingestor updates the dashboard
+summaries, bumps the fragment version and publishes the project event
+itself. The full-text index is kept in sync by its triggers.
+
+Compare both modes with `manage.py bench_ingest`.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .dashboard import add_comments
+from .events import COMMENTS, publish_project_event
+from .fragments import bump_fragment_version
+from .models import Comment, Project
+
+
+class IngestStats:
+    """
+    Thread-safe counters of the ingestor: batches committed and the comments
+    they held.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.comments = 0
+
+    def record(self, rows):
+        with self._lock:
+            self.commits += 1
+            self.comments += rows
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'commits': self.commits,
+                'comments': self.comments,
+                'comments_per_commit': self.comments / self.commits if self.commits else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.commits = 0
+            self.comments = 0
+
+
+class CommentIngestor:
+    """
+    Queues comments and writes them in batches of up to `max_rows`, at most
+    `max_delay_ms` after the oldest queued comment.
+
+    The writer thread starts with the first `submit()`. `flush()` writes the
+    queue on the calling thread instead (e.g. in tests); `close()` writes
+    what is left and stops the thread.
+    """
+
+    def __init__(self, max_rows=None, max_delay_ms=None):
+        self.max_rows = max_rows or getattr(settings, 'PROJECTS_COMMENT_INGEST_MAX_ROWS', 200)
+        self.max_delay = (max_delay_ms or getattr(settings, 'PROJECTS_COMMENT_INGEST_MAX_DELAY_MS', 10)) / 1000
+        self.stats = IngestStats()
+        self._condition = threading.Condition()
+        # (unsaved Comment, Future, time queued), oldest first.
+        self._pending = []
+        self._thread = None
+        self._closed = False
+
+    def submit(self, project_id, user_id, text):
+        """Queues a validated comment. Returns a Future of the saved Comment."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('The comment ingestor is closed.')
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='comment-ingestor', daemon=True)
+                self._thread.start()
+            comment = Comment(project_id=project_id, user_id=user_id, text=text)
+            self._pending.append((comment, future, time.monotonic()))
+            self._condition.notify()
+        return future
+
+    def flush(self):
+        """Writes every queued comment on the calling thread."""
+        while True:
+            with self._condition:
+                batch = self._pop_batch()
+            if not batch:
+                return
+            self.write(batch)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def write(self, batch):
+        """
+        Saves one batch in a single transaction, then resolves its futures.
+        If the batch fails, its comments are retried one by one, so a single
+        bad row (e.g. a project deleted while its comment was queued) only
+        fails its own future.
+        """
+        try:
+            with transaction.atomic():
+                comments = Comment.objects.bulk_create([comment for comment, _, _ in batch])
+                counts = Counter(comment.project_id for comment in comments)
+                Project.objects.record_comments(counts)
+                for project_id, count in counts.items():
+                    add_comments(project_id, count, comments[0].created_at)
+                    bump_fragment_version(project_id)
+                    publish_project_event(project_id, COMMENTS)
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            for item in batch:
+                # Forget the ids bulk_create assigned in the rolled back transaction.
+                item[0].pk = None
+                item[0]._state.adding = True
+                self.write([item])
+            return
+        self.stats.record(len(batch))
+        for comment, future, _ in batch:
+            future.set_result(comment)
+
+    def _pop_batch(self):
+        batch, self._pending = self._pending[:self.max_rows], self._pending[self.max_rows:]
+        return batch
+
+    def _next_batch(self):
+        """Waits until a batch is due and returns it; None once closed and drained."""
+        with self._condition:
+            while True:
+                if self._pending:
+                    due = self._pending[0][2] + self.max_delay
+                    now = time.monotonic()
+                    if len(self._pending) >= self.max_rows or now >= due or self._closed:
+                        return self._pop_batch()
+                    self._condition.wait(due - now)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        try:
+            while (batch := self._next_batch()) is not None:
+                self.write(batch)
+        finally:
+            connection.close()
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_comment_ingestor():
+    """Returns the ingestor of this process; queued comments are written at exit."""
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = CommentIngestor()
+            atexit.register(_ingestor.close)
+        return _ingestor
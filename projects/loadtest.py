@@ -0,0 +1,251 @@
+"""
+In-process concurrent load generator for the ASGI application.
+
+Simulated users call the ASGI callable from `project_manager.asgi` directly:
+no sockets, no server process and no external tools. Each simulated user is
+an asyncio task with its own session cookie, running a weighted mix of
+realistic actions (browse the list, open a project, comment, add/remove a
+member) until the test duration is over.
+
+Results include throughput, per-action latency percentiles, status codes and
+the number of SQLite "database is locked" errors, so worker counts and
+SQLite settings can be sized before a deployment.
+"""
+import asyncio
+import random
+import secrets
+import string
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.signals import got_request_exception
+from django.test import Client
+from django.urls import reverse
+
+from .bench import summarize
+from .models import ProjectMembership
+
+LOCKED_ERRORS = ('database is locked', 'database table is locked', 'vtable constructor failed')
+DEFAULT_MIX = {'list': 40, 'detail': 30, 'comment': 15, 'members': 15}
+
+
+class LoadTestResult:
+    """Thread-safe collector of samples from all simulated users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = Counter()
+        self.locked_errors = 0
+        self.other_errors = 0
+        self.duration = 0.0
+
+    def record(self, action, status, latency_ms):
+        with self._lock:
+            self.latencies[action].append(latency_ms)
+            self.statuses[status] += 1
+
+    def record_exception(self, exc):
+        with self._lock:
+            # 'database table is locked' is the shared-cache variant of the
+            # same contention (e.g. SQLite in-memory test databases). The FTS5
+            # search triggers report it as a failed vtable constructor.
+            message = str(exc)
+            if any(text in message for text in LOCKED_ERRORS):
+                self.locked_errors += 1
+            else:
+                self.other_errors += 1
+
+    @property
+    def total_requests(self):
+        return sum(len(samples) for samples in self.latencies.values())
+
+    def as_dict(self):
+        overall = [ms for samples in self.latencies.values() for ms in samples]
+        return {
+            'duration_s': round(self.duration, 3),
+            'requests': self.total_requests,
+            'throughput_rps': round(self.total_requests / self.duration, 2) if self.duration else 0.0,
+            'latency': summarize(overall),
+            'actions': {
+                action: {'requests': len(samples), **summarize(samples)}
+                for action, samples in sorted(self.latencies.items())
+            },
+            'statuses': {str(code): count for code, count in sorted(self.statuses.items())},
+            'database_locked_errors': self.locked_errors,
+            'other_errors': self.other_errors,
+        }
+
+
+class SimulatedUser:
+    """
+    One logged-in user: a session cookie, a CSRF token and the projects the
+    user can act on in each role.
+    """
+
+    def __init__(self, user, memberships, candidates):
+        client = Client()
+        client.force_login(user)
+        self.user = user
+        self.session_cookie = client.cookies['sessionid'].value
+        # Any well-formed secret works as long as cookie and header agree.
+        self.csrf_token = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
+        self.projects = [m.project_id for m in memberships]
+        self.writable = [m.project_id for m in memberships if m.role in ('Owner', 'Editor')]
+        self.owned = [m.project_id for m in memberships if m.role == 'Owner']
+        # Per owned project: (pk, username) of users who are not members yet.
+        self.candidates = candidates
+        # Members this user added and will remove again on the next turn.
+        self.added = []
+
+    def headers(self, htmx=False):
+        headers = [
+            (b'host', b'localhost'),
+            (b'cookie', f'sessionid={self.session_cookie}; csrftoken={self.csrf_token}'.encode()),
+            (b'x-csrftoken', self.csrf_token.encode()),
+        ]
+        if htmx:
+            headers.append((b'hx-request', b'true'))
+        return headers
+
+
+def build_users(count, users):
+    """Creates up to `count` SimulatedUsers from `users` who belong to at least one project."""
+    names = {user.pk: user.username for user in users}
+    members_by_project = defaultdict(set)
+    for project_id, user_id in ProjectMembership.objects.values_list('project_id', 'user_id'):
+        members_by_project[project_id].add(user_id)
+
+    simulated = []
+    for user in users:
+        memberships = list(ProjectMembership.objects.filter(user=user))
+        if not memberships:
+            continue
+        candidates = {
+            m.project_id: [(pk, name) for pk, name in names.items() if pk not in members_by_project[m.project_id]]
+            for m in memberships if m.role == 'Owner'
+        }
+        simulated.append(SimulatedUser(user, memberships, candidates))
+        if len(simulated) == count:
+            break
+    return simulated
+
+
+def next_request(sim, action, rng, routes):
+    """
+    Returns (action label, method, path, body, htmx) for the simulated user's
+    next request. Actions the user has no permission for fall back to 'list'.
+    """
+    if action == 'detail' and sim.projects:
+        return 'detail', 'GET', reverse(routes['detail'], kwargs={'pk': rng.choice(sim.projects)}), b'', False
+    if action == 'comment' and sim.writable:
+        url = reverse('projects:project-comment', kwargs={'pk': rng.choice(sim.writable)})
+        return 'comment', 'POST', url, urlencode({'text': 'Load test comment'}).encode(), True
+    if action == 'members' and sim.added:
+        project_pk, user_pk = sim.added.pop()
+        url = reverse('projects:project-remove-user', kwargs={'project_pk': project_pk, 'user_pk': user_pk})
+        return 'member-remove', 'DELETE', url, b'', True
+    if action == 'members' and any(sim.candidates.values()):
+        project_pk = rng.choice([pk for pk, candidates in sim.candidates.items() if candidates])
+        user_pk, username = rng.choice(sim.candidates[project_pk])
+        sim.added.append((project_pk, user_pk))
+        url = reverse('projects:project-manage-users', kwargs={'pk': project_pk})
+        return 'member-add', 'POST', url, urlencode({'username': username, 'role': 'Reader'}).encode(), True
+    return 'list', 'GET', reverse(routes['list']), b'', False
+
+
+async def call_asgi(application, method, path, body, headers):
+    """
+    Performs one HTTP request against an ASGI application and returns
+    (status, response body).
+    """
+    parts = urlsplit(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0', 'spec_version': '2.3'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': headers + [
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    done = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # The client stays connected until the response has been sent.
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    status = None
+    chunks = []
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                done.set()
+
+    await application(scope, receive, send)
+    done.set()
+    return status, b''.join(chunks)
+
+
+async def run_load(application, users, duration, mix=None, think_time=0.0, seed=None, routes=None):
+    """
+    Runs every SimulatedUser concurrently against `application` for
+    `duration` seconds and returns a LoadTestResult.
+
+    `routes` maps 'list' and 'detail' to the URL names to exercise, which
+    allows comparing alternative implementations of the read views.
+    """
+    mix = mix or DEFAULT_MIX
+    routes = routes or {'list': 'projects:project-list', 'detail': 'projects:project-detail'}
+    actions, weights = zip(*mix.items())
+    result = LoadTestResult()
+
+    def on_exception(sender, request=None, **kwargs):
+        # Sent from inside Django's exception handling, so exc_info is set.
+        exc = sys.exc_info()[1]
+        if exc is not None:
+            result.record_exception(exc)
+
+    got_request_exception.connect(on_exception, weak=False)
+    deadline = time.perf_counter() + duration
+
+    async def simulate(index, sim):
+        rng = random.Random(None if seed is None else seed + index)
+        while time.perf_counter() < deadline:
+            action = rng.choices(actions, weights)[0]
+            label, method, path, body, htmx = next_request(sim, action, rng, routes)
+            start = time.perf_counter()
+            status, _ = await call_asgi(application, method, path, body, sim.headers(htmx))
+            result.record(label, status, (time.perf_counter() - start) * 1000)
+            if think_time:
+                await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(simulate(i, sim) for i, sim in enumerate(users)))
+    finally:
+        got_request_exception.disconnect(on_exception)
+    result.duration = time.perf_counter() - started
+    return result
@@ -0,0 +1,291 @@
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from projects.bench import scratch_database, seed, summarize
+from projects.models import Comment, Project, ProjectMembership
+from projects.pagination import paginate_keyset
+
+HTMX = {'HTTP_HX_REQUEST': 'true'}
+
+
+class Scenario:
+    """
+    One benchmarked request.
+    - `name`: Key in the report and the baseline file.
+    - `role`: Which client sends it ('Owner', 'Editor', 'Reader', None for an
+      anonymous client, or 'Logout' for a fresh logged-in client per request).
+    - `request`: Callable(state) -> (method, url, data, extra) describing the
+      request. It may also do unmeasured set-up work, such as recreating the
+      row a DELETE removes.
+    """
+
+    def __init__(self, name, role, request):
+        self.name = name
+        self.role = role
+        self.request = request
+
+
+def build_scenarios():
+    """
+    Every route in projects/urls.py, in HTMX and non-HTMX variants where both
+    exist, except the Server-Sent Events stream (it needs the ASGI server and
+    never ends) and the async/ variants of the read views (see bench_async).
+    """
+
+    def detail_url(state, name, **kwargs):
+        return reverse(f'projects:{name}', kwargs={'pk': state.project.pk, **kwargs})
+
+    def project_form(state):
+        return {'name': 'Bench edit', 'description': 'Edited by the benchmark', 'start_date': '2025-01-01'}
+
+    def fresh_comment(state):
+        return Comment.objects.create(project=state.project, user=state.users['Owner'], text='To be deleted')
+
+    def throwaway_project(state):
+        project = Project.objects.create(name='Throwaway', description='', start_date='2025-01-01', member_count=1)
+        ProjectMembership.objects.create(project=project, user=state.users['Owner'], role='Owner')
+        return project
+
+    def outsider_removed(state):
+        ProjectMembership.objects.filter(project=state.project, user=state.outsider).delete()
+        return {'username': state.outsider.username, 'role': 'Reader'}
+
+    def outsider_added(state):
+        ProjectMembership.objects.get_or_create(project=state.project, user=state.outsider, defaults={'role': 'Reader'})
+        return reverse('projects:project-remove-user', kwargs={'project_pk': state.project.pk, 'user_pk': state.outsider.pk})
+
+    def import_file(state):
+        outsider = outsider_removed(state)['username']
+        data = '\n'.join([
+            json.dumps({'type': 'membership', 'project': 1, 'username': outsider, 'role': 'Reader'}),
+            json.dumps({'type': 'comment', 'project': 1, 'username': outsider, 'text': 'Imported comment'}),
+        ])
+        return {'file': SimpleUploadedFile('bench.ndjson', data.encode()), 'format': 'ndjson'}
+
+    def api_url(state, name):
+        return reverse(f'projects:api-{name}', kwargs={'pk': state.project.pk})
+
+    comment_batch = [{'text': f'Benchmark batch comment {i}'} for i in range(20)]
+    json_body = {'content_type': 'application/json'}
+
+    return [
+        Scenario('signup GET', None, lambda s: ('get', reverse('projects:signup'), None, {})),
+        Scenario('login GET', None, lambda s: ('get', reverse('projects:login'), None, {})),
+        Scenario('project-list GET', 'Reader', lambda s: ('get', reverse('projects:project-list'), None, {})),
+        Scenario('project-list GET [htmx]', 'Reader', lambda s: ('get', reverse('projects:project-list'), None, HTMX)),
+        Scenario('project-list next page [htmx]', 'Reader',
+                 lambda s: ('get', reverse('projects:project-list'), {'cursor': s.list_cursor}, HTMX)),
+        Scenario('project-detail GET', 'Reader', lambda s: ('get', detail_url(s, 'project-detail'), None, {})),
+        Scenario('project-comments older page [htmx]', 'Reader',
+                 lambda s: ('get', detail_url(s, 'project-comments'), {'cursor': s.comment_cursor}, HTMX)),
+        Scenario('project-search GET [htmx]', 'Reader',
+                 lambda s: ('get', reverse('projects:project-search'), {'q': 'synthetic proj'}, HTMX)),
+        Scenario('project-update GET', 'Editor', lambda s: ('get', detail_url(s, 'project-update'), None, {})),
+        Scenario('project-update POST', 'Editor', lambda s: ('post', detail_url(s, 'project-update'), project_form(s), {})),
+        Scenario('project-create GET', 'Owner', lambda s: ('get', reverse('projects:project-create'), None, {})),
+        Scenario('project-create GET [htmx]', 'Owner', lambda s: ('get', reverse('projects:project-create'), None, HTMX)),
+        Scenario('project-create POST', 'Owner', lambda s: ('post', reverse('projects:project-create'), project_form(s), {})),
+        Scenario('project-create POST [htmx]', 'Owner',
+                 lambda s: ('post', reverse('projects:project-create'), project_form(s), HTMX)),
+        Scenario('project-delete GET', 'Owner', lambda s: ('get', detail_url(s, 'project-delete'), None, {})),
+        Scenario('project-delete POST', 'Owner',
+                 lambda s: ('post', reverse('projects:project-delete', kwargs={'pk': throwaway_project(s).pk}), None, {})),
+        Scenario('project-manage-users GET', 'Owner', lambda s: ('get', detail_url(s, 'project-manage-users'), None, {})),
+        Scenario('project-manage-users POST', 'Owner',
+                 lambda s: ('post', detail_url(s, 'project-manage-users'), outsider_removed(s), {})),
+        Scenario('project-manage-users POST [htmx]', 'Owner',
+                 lambda s: ('post', detail_url(s, 'project-manage-users'), outsider_removed(s), HTMX)),
+        Scenario('project-bulk-add-users POST [htmx]', 'Owner',
+                 lambda s: ('post', detail_url(s, 'project-bulk-add-users'),
+                            {'members': '{username},{role}'.format(**outsider_removed(s))}, HTMX)),
+        Scenario('project-remove-user DELETE [htmx]', 'Owner', lambda s: ('delete', outsider_added(s), None, HTMX)),
+        Scenario('project-comment POST', 'Editor',
+                 lambda s: ('post', detail_url(s, 'project-comment'), {'text': 'Benchmark comment'}, {})),
+        Scenario('project-comment POST [htmx]', 'Editor',
+                 lambda s: ('post', detail_url(s, 'project-comment'), {'text': 'Benchmark comment'}, HTMX)),
+        Scenario('project-delete-comment POST', 'Owner',
+                 lambda s: ('post', detail_url(s, 'project-delete-comment', comment_pk=fresh_comment(s).pk), None, {})),
+        Scenario('project-delete-comment POST [htmx]', 'Owner',
+                 lambda s: ('post', detail_url(s, 'project-delete-comment', comment_pk=fresh_comment(s).pk), None, HTMX)),
+        Scenario('project-comment POST [json array]', 'Editor',
+                 lambda s: ('post', detail_url(s, 'project-comment'), comment_batch, json_body)),
+        Scenario('project-export GET', 'Owner', lambda s: ('get', detail_url(s, 'project-export'), None, {})),
+        Scenario('project-import POST', 'Owner', lambda s: ('post', detail_url(s, 'project-import'), import_file(s), {})),
+        Scenario('dashboard GET', 'Reader', lambda s: ('get', reverse('projects:dashboard'), None, {})),
+        Scenario('api-project-list GET', 'Reader', lambda s: ('get', reverse('projects:api-project-list'), None, {})),
+        Scenario('api-project-detail GET', 'Reader', lambda s: ('get', api_url(s, 'project-detail'), None, {})),
+        Scenario('api-project-members GET', 'Reader', lambda s: ('get', api_url(s, 'project-members'), None, {})),
+        Scenario('api-project-comments GET', 'Reader', lambda s: ('get', api_url(s, 'project-comments'), None, {})),
+        Scenario('api-project-comment-history GET', 'Reader',
+                 lambda s: ('get', api_url(s, 'project-comment-history'), None, {})),
+        Scenario('logout POST', 'Logout', lambda s: ('post', reverse('projects:logout'), None, {})),
+    ]
+
+
+class BenchState:
+    """The project and users every scenario runs against."""
+
+    def __init__(self, dataset):
+        self.project = dataset.projects[0]
+        memberships = ProjectMembership.objects.filter(project=self.project).select_related('user')
+        self.users = {}
+        for membership in memberships:
+            self.users.setdefault(membership.role, membership.user)
+        member_ids = [m.user_id for m in memberships]
+        self.outsider = next(u for u in dataset.users if u.pk not in member_ids)
+
+        self.list_cursor = paginate_keyset(
+            Project.objects.for_member(self.users['Reader']), None, settings.PROJECTS_PAGE_SIZE
+        ).next_cursor or ''
+        self.comment_cursor = paginate_keyset(
+            self.project.comments.all(), None, settings.PROJECTS_COMMENT_PAGE_SIZE, keys=('created_at', 'id')
+        ).next_cursor or ''
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a synthetic dataset in a scratch database, drives the routes of projects/urls.py '
+        '(all but the event stream and the async/ variants) through the test client and reports latency percentiles, queries per request and response '
+        'size. Results can be saved as a JSON baseline and compared against a previous one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--members', type=int, default=6, help='Members per project (default: 6).')
+        parser.add_argument('--comments', type=int, default=50, help='Comments per project (default: 50).')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per route (default: 20).')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per route (default: 2).')
+        parser.add_argument('--only', help='Only run routes whose name contains this text.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Compare the results with this JSON baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Relative p95 increase reported as a regression (default: 0.25).')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if --compare finds a regression.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        with scratch_database():
+            started = time.perf_counter()
+            dataset = seed(options['users'], options['projects'], options['members'], options['comments'])
+            self.stdout.write(f'Seeded dataset in {time.perf_counter() - started:.2f}s')
+            results = self.run_scenarios(BenchState(dataset), options)
+
+        report = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'dataset': {key: options[key] for key in ('users', 'projects', 'members', 'comments')},
+                'iterations': options['iterations'],
+            },
+            'routes': results,
+        }
+        self.print_report(results, baseline)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['output']}")
+
+        if baseline is not None:
+            baseline_routes = baseline['routes']
+            if options['only']:
+                baseline_routes = {k: v for k, v in baseline_routes.items() if options['only'] in k}
+            regressions = self.compare(results, baseline_routes, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) found.')
+
+    def run_scenarios(self, state, options):
+        clients = {}
+        for role, user in state.users.items():
+            clients[role] = Client()
+            clients[role].force_login(user)
+        clients[None] = Client()
+
+        results = {}
+        for scenario in build_scenarios():
+            if options['only'] and options['only'] not in scenario.name:
+                continue
+            latencies, queries, sizes, statuses = [], [], [], set()
+            for i in range(options['warmup'] + options['iterations']):
+                client = clients.get(scenario.role)
+                if scenario.role == 'Logout':
+                    client = Client()
+                    client.force_login(state.users['Reader'])
+                method, url, data, extra = scenario.request(state)
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, data, **extra)
+                    body = b''.join(response) if response.streaming else response.content
+                    elapsed = (time.perf_counter() - start) * 1000
+                if i < options['warmup']:
+                    continue
+                latencies.append(elapsed)
+                queries.append(len(captured))
+                sizes.append(len(body))
+                statuses.add(response.status_code)
+            results[scenario.name] = {
+                **summarize(latencies),
+                'queries': max(queries),
+                'bytes': round(sum(sizes) / len(sizes)),
+                'status': sorted(statuses),
+            }
+        return results
+
+    def print_report(self, results, baseline):
+        header = f"{'route':<40} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'bytes':>8}  status"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<40} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                f"{r['queries']:>8} {r['bytes']:>8}  {','.join(map(str, r['status']))}"
+            )
+
+    def compare(self, results, baseline, threshold):
+        """Prints the differences against a baseline and returns the regressed routes."""
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Compared with baseline'))
+        regressions = []
+        for name, r in results.items():
+            old = baseline.get(name)
+            if old is None:
+                self.stdout.write(f'{name:<40} new route')
+                continue
+            notes = []
+            if r['queries'] != old['queries']:
+                notes.append(f"queries {old['queries']} -> {r['queries']}")
+            if old['p95_ms'] and (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] > threshold:
+                notes.append(f"p95 {old['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+            if r['bytes'] != old['bytes']:
+                notes.append(f"bytes {old['bytes']} -> {r['bytes']}")
+            regressed = r['queries'] > old['queries'] or any(n.startswith('p95') for n in notes)
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'{name:<40} REGRESSION: ' + '; '.join(notes)))
+            elif notes:
+                self.stdout.write(f'{name:<40} ' + '; '.join(notes))
+        for name in baseline.keys() - results.keys():
+            self.stdout.write(f'{name:<40} missing from this run')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+        return regressions
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from projects.bench import scratch_database, seed
+from projects.loadtest import build_users, run_load
+
+READ_MIX = {'list': 50, 'detail': 50}
+
+VARIANTS = {
+    'sync': {'list': 'projects:project-list', 'detail': 'projects:project-detail'},
+    'async': {'list': 'projects:project-list-async', 'detail': 'projects:project-detail-async'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the sync and native async read views (project list and detail) under the ASGI '
+        'application with the same concurrent read-only load, on a scratch SQLite file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50, help='Simulated users (default: 50).')
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help='Seconds to run each variant (default: 10).')
+        parser.add_argument('--think-time', type=float, default=0.05,
+                            help='Mean pause between a user\'s requests in seconds, standing in for '
+                                 'slow clients (default: 0.05).')
+        parser.add_argument('--users', type=int, default=100, help='Seeded users (default: 100).')
+        parser.add_argument('--projects', type=int, default=200, help='Seeded projects (default: 200).')
+        parser.add_argument('--comments', type=int, default=20, help='Seeded comments per project (default: 20).')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible action sequences.')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        reports = {}
+        with scratch_database(on_disk=True):
+            dataset = seed(users=options['users'], projects=options['projects'],
+                           comments_per_project=options['comments'])
+            users = build_users(options['concurrency'], dataset.users)
+
+            # Imported late: building the ASGI app must happen after settings
+            # point at the scratch database.
+            from project_manager.asgi import application
+
+            for variant, routes in VARIANTS.items():
+                result = asyncio.run(run_load(
+                    application, users, options['duration'], mix=READ_MIX,
+                    think_time=options['think_time'], seed=options['seed'], routes=routes,
+                ))
+                reports[variant] = result.as_dict()
+
+        self.print_report(reports, len(users))
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(reports, f, indent=2)
+
+    def print_report(self, reports, concurrency):
+        self.stdout.write(f'{concurrency} concurrent users, read-only mix {READ_MIX}')
+        header = f"{'variant':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for variant, report in reports.items():
+            latency = report['latency']
+            self.stdout.write(
+                f"{variant:<8} {report['throughput_rps']:>8.1f} {latency['p50_ms']:>8.1f} "
+                f"{latency['p95_ms']:>8.1f} {latency['p99_ms']:>8.1f}  "
+                + ', '.join(f'{k}: {v}' for k, v in report['statuses'].items())
+            )
+        sync, async_ = reports['sync']['throughput_rps'], reports['async']['throughput_rps']
+        if sync:
+            self.stdout.write(f'async/sync throughput: {async_ / sync:.2f}x')
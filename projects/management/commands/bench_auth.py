@@ -0,0 +1,99 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from projects.bench import BENCH_PASSWORD, scratch_database, seed, summarize
+
+
+def classify(queries):
+    """Splits captured queries into session, user and other lookups."""
+    counts = {'session': 0, 'user': 0, 'other': 0}
+    for query in queries:
+        sql = query['sql']
+        if '"django_session"' in sql:
+            counts['session'] += 1
+        elif 'FROM "auth_user"' in sql and '"auth_user"."id" =' in sql:
+            counts['user'] += 1
+        else:
+            counts['other'] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the database hits and latency of the project list per authenticated request '
+        'under each auth profile (PROJECTS_AUTH_PROFILES): session lookups, user lookups and all '
+        'other queries, on a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per profile after one warm-up request (default: 200).')
+        parser.add_argument('--profiles', default=','.join(settings.PROJECTS_AUTH_PROFILES),
+                            help='Comma-separated profiles to compare (default: all).')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        profiles = [name.strip() for name in options['profiles'].split(',')]
+        for name in profiles:
+            if name not in settings.PROJECTS_AUTH_PROFILES:
+                raise CommandError(
+                    f"Unknown profile '{name}'. Choose from: {', '.join(settings.PROJECTS_AUTH_PROFILES)}."
+                )
+
+        reports = {}
+        with scratch_database():
+            dataset = seed(users=10, projects=50, comments_per_project=5)
+            username = dataset.users[0].username
+            for name in profiles:
+                for cache in caches.all():
+                    cache.clear()
+                with override_settings(**settings.PROJECTS_AUTH_PROFILES[name]):
+                    reports[name] = self.run_requests(username, options['requests'])
+
+        self.print_report(reports)
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(reports, f, indent=2)
+
+    def run_requests(self, username, requests):
+        # A new client per profile, so its handler loads the profile's session engine.
+        client = Client()
+        if not client.login(username=username, password=BENCH_PASSWORD):
+            raise CommandError(f'Could not log in as {username}.')
+        url = reverse('projects:project-list')
+        client.get(url)
+
+        totals = {'session': 0, 'user': 0, 'other': 0}
+        latencies = []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}.')
+            for kind, count in classify(queries.captured_queries).items():
+                totals[kind] += count
+        per_request = {kind: round(count / requests, 2) for kind, count in totals.items()}
+        per_request['total'] = round(sum(totals.values()) / requests, 2)
+        return {'requests': requests, 'queries_per_request': per_request, 'latency': summarize(latencies)}
+
+    def print_report(self, reports):
+        self.stdout.write('Project list, one logged-in client, warm caches')
+        header = f"{'profile':<10} {'session':>8} {'user':>6} {'other':>6} {'total':>6} {'p50 ms':>8} {'p99 ms':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in reports.items():
+            q, latency = r['queries_per_request'], r['latency']
+            self.stdout.write(
+                f"{name:<10} {q['session']:>8.2f} {q['user']:>6.2f} {q['other']:>6.2f} {q['total']:>6.2f} "
+                f"{latency['p50_ms']:>8.2f} {latency['p99_ms']:>8.2f}"
+            )
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from projects.bench import scratch_database, seed, summarize
+from projects.ingest import CommentIngestor
+from projects.management.commands.bench_sqlite import WriteResult, write_comments
+
+MODES = ('direct', 'coalesced')
+
+
+def submit_comments(ingestor, project_ids, user_id, deadline, result):
+    """
+    Posts comments through `ingestor` until `deadline`, each waiting for its
+    acknowledgement like CommentOnProject does in ingest mode.
+    """
+    n = 0
+    while time.perf_counter() < deadline:
+        project_id = project_ids[n % len(project_ids)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            ingestor.submit(project_id, user_id, 'Bench comment').result()
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            result.record()
+        else:
+            result.record((time.perf_counter() - start) * 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares comment ingestion with one transaction per comment ("direct") against the '
+        'write-coalescing ingestor ("coalesced") on a scratch SQLite file: comments/s, commits/s '
+        'and acknowledgement latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=32, help='Concurrent clients (default: 32).')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Seconds to write in each mode (default: 5).')
+        parser.add_argument('--modes', default=','.join(MODES),
+                            help='Comma-separated modes to compare (default: direct,coalesced).')
+        parser.add_argument('--max-rows', type=int, default=200, help='Ingestor batch size (default: 200).')
+        parser.add_argument('--max-delay-ms', type=float, default=10,
+                            help='Longest wait before a batch is written (default: 10).')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        modes = [name.strip() for name in options['modes'].split(',')]
+        for name in modes:
+            if name not in MODES:
+                raise CommandError(f"Unknown mode '{name}'. Choose from: {', '.join(MODES)}.")
+
+        reports = {}
+        for name in modes:
+            with scratch_database(on_disk=True):
+                if connection.vendor != 'sqlite':
+                    raise CommandError('bench_ingest needs an SQLite database.')
+                dataset = seed(users=options['writers'], projects=options['writers'],
+                               members_per_project=1, comments_per_project=0)
+                reports[name] = self.run_writers(name, dataset, options)
+
+        self.print_report(reports, options['writers'])
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(reports, f, indent=2)
+
+    def run_writers(self, mode, dataset, options):
+        result = WriteResult()
+        writers = options['writers']
+        project_ids = [project.pk for project in dataset.projects]
+        ingestor = None
+        if mode == 'coalesced':
+            ingestor = CommentIngestor(options['max_rows'], options['max_delay_ms'])
+        deadline = time.perf_counter() + options['duration']
+        threads = []
+        for i, user in enumerate(dataset.users[:writers]):
+            ids = project_ids[i::writers] or project_ids
+            if ingestor is None:
+                args = (ids, user.pk, deadline, result)
+                threads.append(threading.Thread(target=write_comments, args=args))
+            else:
+                args = (ingestor, ids, user.pk, deadline, result)
+                threads.append(threading.Thread(target=submit_comments, args=args))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if ingestor is not None:
+            # Also stops the writer thread and closes its connection.
+            ingestor.close()
+            commits = ingestor.stats.snapshot()['commits']
+        else:
+            commits = len(result.latencies)
+        comments = len(result.latencies)
+        return {
+            'comments': comments,
+            'commits': commits,
+            'comments_per_s': round(comments / elapsed, 2),
+            'commits_per_s': round(commits / elapsed, 2),
+            'comments_per_commit': round(comments / commits, 2) if commits else 0.0,
+            'ack_latency': summarize(result.latencies),
+            'database_locked_errors': result.locked_errors,
+        }
+
+    def print_report(self, reports, writers):
+        self.stdout.write(f'{writers} concurrent clients')
+        header = (
+            f"{'mode':<10} {'comments/s':>11} {'commits/s':>10} {'per commit':>11} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'locked':>7}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in reports.items():
+            latency = r['ack_latency']
+            self.stdout.write(
+                f"{name:<10} {r['comments_per_s']:>11.1f} {r['commits_per_s']:>10.1f} "
+                f"{r['comments_per_commit']:>11.1f} {latency['p50_ms']:>8.2f} {latency['p99_ms']:>8.2f} "
+                f"{r['database_locked_errors']:>7}"
+            )
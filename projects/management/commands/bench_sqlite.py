@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from projects.bench import scratch_database, seed, summarize
+from projects.models import Comment, Project
+from projects.sqlite import SQLITE_PROFILES
+
+
+class WriteResult:
+    """Thread-safe collector of write latencies and lock errors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.locked_errors = 0
+
+    def record(self, latency_ms=None):
+        with self._lock:
+            if latency_ms is None:
+                self.locked_errors += 1
+            else:
+                self.latencies.append(latency_ms)
+
+
+def write_comments(project_ids, user_id, deadline, result):
+    """
+    Posts comments the way CommentOnProject does (insert + counter update in
+    one transaction) until `deadline`, on this thread's own connection.
+    """
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            project_id = project_ids[n % len(project_ids)]
+            n += 1
+            start = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Comment.objects.create(project_id=project_id, user_id=user_id, text='Bench comment')
+                    Project.objects.record_activity(project_id, comments=1)
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                result.record()
+            else:
+                result.record((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures concurrent write throughput (comments posted by several threads) on a scratch '
+        'SQLite file under each SQLite profile, to show the effect of the production PRAGMAs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads (default: 8).')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Seconds to write under each profile (default: 5).')
+        parser.add_argument('--profiles', default='default,production',
+                            help='Comma-separated profiles to compare (default: default,production).')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        profiles = [name.strip() for name in options['profiles'].split(',')]
+        for name in profiles:
+            if name not in SQLITE_PROFILES:
+                raise CommandError(f"Unknown profile '{name}'. Choose from: {', '.join(SQLITE_PROFILES)}.")
+
+        reports = {}
+        for name in profiles:
+            # A fresh file per profile: journal_mode=WAL persists in the file.
+            with override_settings(PROJECTS_SQLITE_PROFILE=name), scratch_database(on_disk=True):
+                if connection.vendor != 'sqlite':
+                    raise CommandError('bench_sqlite needs an SQLite database.')
+                dataset = seed(users=options['writers'], projects=options['writers'] * 4,
+                               members_per_project=1, comments_per_project=0)
+                reports[name] = self.run_writers(dataset, options)
+
+        self.print_report(reports, options['writers'])
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(reports, f, indent=2)
+
+    def run_writers(self, dataset, options):
+        result = WriteResult()
+        project_ids = [project.pk for project in dataset.projects]
+        deadline = time.perf_counter() + options['duration']
+        threads = [
+            threading.Thread(
+                target=write_comments,
+                args=(project_ids[i::options['writers']], user.pk, deadline, result),
+            )
+            for i, user in enumerate(dataset.users[:options['writers']])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'writes': len(result.latencies),
+            'writes_per_s': round(len(result.latencies) / elapsed, 2),
+            'latency': summarize(result.latencies),
+            'database_locked_errors': result.locked_errors,
+        }
+
+    def print_report(self, reports, writers):
+        self.stdout.write(f'{writers} concurrent writers')
+        header = f"{'profile':<12} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'locked':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in reports.items():
+            latency = r['latency']
+            self.stdout.write(
+                f"{name:<12} {r['writes_per_s']:>9.1f} {latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} "
+                f"{latency['p99_ms']:>8.2f} {r['database_locked_errors']:>7}"
+            )
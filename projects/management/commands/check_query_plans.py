@@ -0,0 +1,52 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from projects.models import Comment, Project, ProjectMembership
+
+# `SCAN <table>` without `USING ... INDEX` means SQLite reads the whole table.
+FULL_SCAN = re.compile(r'^SCAN (?P<table>\S+)$')
+
+
+def hot_queries():
+    """
+    The lookups every page view depends on. The ids are placeholders: the
+    plan SQLite picks does not depend on them.
+    """
+    return {
+        'membership-by-user-project': ProjectMembership.objects.select_related('project').filter(
+            project__pk=1, user__pk=1
+        ),
+        'projects-by-member': Project.objects.for_member(1),
+        'comments-by-project': Comment.objects.filter(project__pk=1).select_related('user'),
+    }
+
+
+def explain(queryset):
+    """Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN QUERY PLAN for the hot queries and fails if any of them does a full table scan.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans only understands SQLite query plans.')
+
+        failures = []
+        for name, queryset in hot_queries().items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for line in explain(queryset):
+                self.stdout.write(f'  {line}')
+                match = FULL_SCAN.match(line)
+                if match:
+                    failures.append(f"{name}: full scan of {match.group('table')}")
+
+        if failures:
+            raise CommandError('Full table scans found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from projects.transfer import FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams projects with their memberships and comments as NDJSON or CSV to a file or '
+        'stdout, reading the tables in chunks so memory use stays flat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Only export this project id (repeatable). Default: all projects.')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Write to this file instead of stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time (default: 2000).')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['projects']:
+            projects = projects.filter(pk__in=options['projects'])
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in stream_export(projects, options['format'], options['chunk_size']):
+                out.write(chunk)
+        finally:
+            if options['output']:
+                out.close()
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from projects.transfer import FORMATS, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports projects, memberships and comments from an NDJSON or CSV export. Records are '
+        'validated and written with bulk_create in batches, one transaction per batch; invalid '
+        'records are skipped and reported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Export file to read, or '-' for stdin.")
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Records per bulk_create and transaction (default: 1000).')
+        parser.add_argument('--into-project', type=int,
+                            help='Add all memberships and comments to this existing project '
+                                 'instead of creating the exported projects.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        into_project = None
+        if options['into_project']:
+            try:
+                into_project = Project.objects.get(pk=options['into_project'])
+            except Project.DoesNotExist:
+                raise CommandError(f"Project {options['into_project']} does not exist.")
+
+        source = sys.stdin if options['file'] == '-' else open(options['file'], newline='', encoding='utf-8-sig')
+        try:
+            importer = Importer(options['batch_size'], into_project=into_project)
+            importer.run(read_records(source, options['format']))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for line, error in importer.errors:
+            self.stderr.write(f'Line {line}: {error}')
+        created = importer.created
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created['project']} projects, {created['membership']} memberships "
+            f"({importer.existing} already present) and {created['comment']} comments; "
+            f"skipped {len(importer.errors)} invalid records."
+        ))
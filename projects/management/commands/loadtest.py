@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.bench import scratch_database, seed
+from projects.loadtest import DEFAULT_MIX, build_users, run_load
+
+
+def parse_mix(value):
+    """Parses 'list=40,detail=30,comment=15,members=15' into a weight dict."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise CommandError(f"Unknown action '{name}'. Choose from: {', '.join(DEFAULT_MIX)}.")
+        try:
+            mix[name.strip()] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid weight for '{name}': {weight!r}")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs many concurrent simulated users against the ASGI application in-process, on a '
+        'scratch SQLite file, and reports throughput, tail latency and "database is locked" errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help='Simulated users (default: 20).')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run (default: 10).')
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Mean pause between a user\'s requests in seconds (default: 0).')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help='Action weights, e.g. list=40,detail=30,comment=15,members=15.')
+        parser.add_argument('--users', type=int, default=100, help='Seeded users (default: 100).')
+        parser.add_argument('--projects', type=int, default=200, help='Seeded projects (default: 200).')
+        parser.add_argument('--comments', type=int, default=20, help='Seeded comments per project (default: 20).')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible action sequences.')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        with scratch_database(on_disk=True):
+            dataset = seed(users=options['users'], projects=options['projects'],
+                           comments_per_project=options['comments'])
+            users = build_users(options['concurrency'], dataset.users)
+            if len(users) < options['concurrency']:
+                self.stdout.write(self.style.WARNING(f'Only {len(users)} seeded users belong to a project.'))
+
+            # Imported late: building the ASGI app must happen after settings
+            # point at the scratch database.
+            from project_manager.asgi import application
+
+            result = asyncio.run(run_load(
+                application, users, options['duration'], mix=options['mix'],
+                think_time=options['think_time'], seed=options['seed'],
+            ))
+
+        report = result.as_dict()
+        self.print_report(report, len(users))
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def print_report(self, report, concurrency):
+        self.stdout.write(
+            f"{report['requests']} requests from {concurrency} users in {report['duration_s']:.1f}s "
+            f"= {report['throughput_rps']:.1f} req/s"
+        )
+        latency = report['latency']
+        self.stdout.write(
+            f"latency p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms"
+        )
+        self.stdout.write(f"{'action':<15} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for action, r in report['actions'].items():
+            self.stdout.write(
+                f"{action:<15} {r['requests']:>9} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+            )
+        self.stdout.write('status codes: ' + ', '.join(f'{k}: {v}' for k, v in report['statuses'].items()))
+        style = self.style.ERROR if report['database_locked_errors'] else self.style.SUCCESS
+        self.stdout.write(style(f"'database is locked' errors: {report['database_locked_errors']}"))
+        if report['other_errors']:
+            self.stdout.write(self.style.ERROR(f"other server errors: {report['other_errors']}"))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.dashboard import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every user's dashboard summary from the source tables. Run it nightly: "
+        "overdue projects, the current week and the recent comment window move on without any write."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users rebuilt per transaction (default: 500).')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rebuilt = 0
+        last_pk = 0
+
+        while True:
+            # Walk the table by primary key so every batch is an index range scan.
+            user_ids = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_pk = user_ids[-1]
+            with transaction.atomic():
+                rebuilt += rebuild_summaries(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} dashboard summaries.'))
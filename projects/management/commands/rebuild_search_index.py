@@ -0,0 +1,26 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from projects.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the full-text search index (projects_search) from the project and comment '
+        'tables. The index is normally kept in sync by triggers; use this after restoring '
+        'data or if the index is suspected to be out of date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Database alias to rebuild (default: "default").')
+
+    def handle(self, *args, **options):
+        try:
+            # One transaction, so searches never see a half-filled index.
+            with transaction.atomic(using=options['database']):
+                rows = rebuild_search_index(options['database'])
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt with {rows} rows.'))
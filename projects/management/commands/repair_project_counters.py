@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.fragments import bump_fragment_version
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every project's member_count, comment_count and last_activity_at "
+        "from the source tables and repairs the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Projects checked and repaired per transaction (default: 500).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report drifted projects, do not write anything.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = repaired = 0
+        last_pk = 0
+
+        while True:
+            # Walk the table by primary key so every batch is an index range scan.
+            with transaction.atomic():
+                batch = list(
+                    Project.objects.filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .with_actual_counters()
+                    .select_for_update()[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                checked += len(batch)
+
+                drifted = []
+                for project in batch:
+                    # `last_activity_at` is also bumped by deletions, which leave
+                    # no trace in the source tables; only a value that lags
+                    # behind the newest known activity counts as drift.
+                    activity_lags = (
+                        project.last_activity_at is None
+                        or project.last_activity_at < project.actual_last_activity_at
+                    )
+                    if (
+                        project.member_count != project.actual_member_count
+                        or project.comment_count != project.actual_comment_count
+                        or activity_lags
+                    ):
+                        self.stdout.write(
+                            f'Project {project.pk}: members {project.member_count} -> {project.actual_member_count}, '
+                            f'comments {project.comment_count} -> {project.actual_comment_count}'
+                        )
+                        project.member_count = project.actual_member_count
+                        project.comment_count = project.actual_comment_count
+                        if activity_lags:
+                            project.last_activity_at = project.actual_last_activity_at
+                        drifted.append(project)
+
+                if drifted and not options['dry_run']:
+                    Project.objects.bulk_update(drifted, Project.COUNTER_FIELDS + ('last_activity_at',))
+                    # bulk_update sends no signals; cached list rows show the counters.
+                    for project in drifted:
+                        bump_fragment_version(project.pk)
+                repaired += len(drifted)
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} projects. {verb} {repaired} with drifted counters.'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Checkpoints the SQLite write-ahead log back into the database file and runs '
+        'PRAGMA optimize. Meant to run periodically (e.g. from cron) with the production '
+        'SQLite profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Database alias to maintain (default: "default").')
+        parser.add_argument('--mode', choices=CHECKPOINT_MODES, default='PASSIVE',
+                            help='wal_checkpoint mode. PASSIVE never blocks readers or writers; TRUNCATE '
+                                 'also shrinks the WAL file but waits for them (default: PASSIVE).')
+        parser.add_argument('--skip-optimize', action='store_true', help='Only checkpoint.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database '{options['database']}' is not SQLite.")
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode.lower() != 'wal':
+                self.stdout.write(f"Journal mode is '{journal_mode}', not WAL: nothing to checkpoint.")
+            else:
+                cursor.execute(f"PRAGMA wal_checkpoint({options['mode']})")
+                busy, log_frames, checkpointed = cursor.fetchone()
+                message = (
+                    f"Checkpoint ({options['mode']}): {checkpointed} of {log_frames} WAL frames "
+                    f"copied into the database."
+                )
+                if busy:
+                    # Another connection held a lock; the rest is copied next time.
+                    self.stdout.write(self.style.WARNING(message + ' Could not complete: database busy.'))
+                else:
+                    self.stdout.write(message)
+
+            if not options['skip_optimize']:
+                cursor.execute('PRAGMA optimize')
+                self.stdout.write('PRAGMA optimize done.')
+        self.stdout.write(self.style.SUCCESS('SQLite maintenance finished.'))
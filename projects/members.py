@@ -0,0 +1,120 @@
+"""
+Adding many members to a project at once.
+
+`bulk_add_members` resolves every username with one IN query, reads the
+existing memberships with another, and inserts the new ones with a single
+bulk_create, so the cost does not grow with the number of rows. bulk_create
+sends no signals, so the role cache and fragment version are updated here.
+"""
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .access import invalidate_role
+from .dashboard import add_memberships
+from .events import MEMBERS, publish_project_event
+from .fragments import bump_fragment_version
+from .models import Project, ProjectMembership
+
+ADDED = 'added'
+ALREADY_MEMBER = 'already a member'
+UNKNOWN_USER = 'unknown user'
+INVALID_ROLE = 'invalid role'
+DUPLICATE = 'duplicate'
+
+
+class BulkAddResult:
+    """
+    The outcome of one input row.
+    - `line`: Line number in the submitted list.
+    - `username`, `role`: As submitted.
+    - `status`: One of ADDED, ALREADY_MEMBER, UNKNOWN_USER, INVALID_ROLE or
+      DUPLICATE.
+    """
+
+    def __init__(self, line, username, role, status):
+        self.line = line
+        self.username = username
+        self.role = role
+        self.status = status
+
+    @property
+    def ok(self):
+        return self.status == ADDED
+
+
+def bulk_add_members(project, rows, allowed_roles=('Editor', 'Reader')):
+    """
+    Adds (line, username, role) rows to `project` and returns one
+    BulkAddResult per row, in input order.
+    """
+    roles = {role.lower(): role for role in allowed_roles}
+    results = []
+    valid = {}
+    for line, username, role in rows:
+        result = BulkAddResult(line, username, role, None)
+        results.append(result)
+        if role.lower() not in roles:
+            result.status = INVALID_ROLE
+        elif username in valid:
+            result.status = DUPLICATE
+        else:
+            result.role = roles[role.lower()]
+            valid[username] = result
+
+    users = dict(User.objects.filter(username__in=valid).values_list('username', 'pk'))
+    candidates = {}
+    for username, result in valid.items():
+        user_id = users.get(username)
+        if user_id is None:
+            result.status = UNKNOWN_USER
+        else:
+            candidates[user_id] = result
+    if not candidates:
+        return results
+
+    # No ignore_conflicts: a member added concurrently between the read of
+    # the existing members and the insert fails the insert, and the second
+    # attempt reads them again. The statuses and the dashboard then only
+    # count the rows this call inserted.
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _add_new_members(project, candidates)
+            break
+        except IntegrityError:
+            if attempt:
+                raise
+    return results
+
+
+def _existing_members(project, user_ids):
+    return set(
+        ProjectMembership.objects.filter(project=project, user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+
+
+def _add_new_members(project, candidates):
+    """
+    Adds the users of `candidates` ({user id: BulkAddResult}) that are not
+    members yet and sets the status of every result.
+    """
+    existing = _existing_members(project, candidates)
+    new_memberships = []
+    for user_id, result in candidates.items():
+        if user_id in existing:
+            result.status = ALREADY_MEMBER
+        else:
+            result.status = ADDED
+            new_memberships.append(ProjectMembership(project=project, user_id=user_id, role=result.role))
+    if not new_memberships:
+        return
+    ProjectMembership.objects.bulk_create(new_memberships)
+    Project.objects.filter(pk=project.pk).recount_counters()
+    by_role = {}
+    for membership in new_memberships:
+        invalidate_role(membership.user_id, project.pk)
+        by_role.setdefault(membership.role, []).append(membership.user_id)
+    for role, user_ids in by_role.items():
+        add_memberships(project.pk, user_ids, role)
+    bump_fragment_version(project.pk)
+    publish_project_event(project.pk, MEMBERS)
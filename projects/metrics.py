@@ -0,0 +1,225 @@
+"""
+Per-view latency and SQL metrics in Prometheus text exposition format.
+
+`RequestMetricsMiddleware` times every request and, through an execute
+wrapper on every connection, counts the SQL queries and SQL time it causes.
+Samples are aggregated per resolved URL name in process memory and served by
+`metrics_view`. When PROJECTS_METRICS_ENABLED is False the middleware removes
+itself from the stack at startup (MiddlewareNotUsed) and the wrapper is never
+installed, so disabled metrics cost nothing per request or per query.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from .access import role_cache_stats
+from .backends import user_cache_stats
+from .fragments import fragment_cache_stats
+
+# Upper bounds (seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class ViewMetrics:
+    """Aggregated samples of one URL name."""
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.query_count = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of per-view samples for this process.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, latency, queries, sql_seconds):
+        with self._lock:
+            metrics = self._views.get(view)
+            if metrics is None:
+                metrics = self._views[view] = ViewMetrics(self.buckets)
+            metrics.count += 1
+            metrics.latency_sum += latency
+            metrics.query_count += queries
+            metrics.sql_seconds += sql_seconds
+            for i, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    metrics.bucket_counts[i] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """Returns all samples in Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP projects_request_duration_seconds Request latency per URL name.',
+                '# TYPE projects_request_duration_seconds histogram',
+            ]
+            for view, m in views:
+                label = _escape(view)
+                for bound, count in zip(self.buckets, m.bucket_counts):
+                    lines.append(f'projects_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {count}')
+                lines.append(f'projects_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {m.count}')
+                lines.append(f'projects_request_duration_seconds_sum{{view="{label}"}} {m.latency_sum}')
+                lines.append(f'projects_request_duration_seconds_count{{view="{label}"}} {m.count}')
+
+            lines += [
+                '# HELP projects_sql_queries_total SQL queries executed per URL name.',
+                '# TYPE projects_sql_queries_total counter',
+            ]
+            lines += [f'projects_sql_queries_total{{view="{_escape(v)}"}} {m.query_count}' for v, m in views]
+
+            lines += [
+                '# HELP projects_sql_duration_seconds_total Time spent in SQL per URL name.',
+                '# TYPE projects_sql_duration_seconds_total counter',
+            ]
+            lines += [f'projects_sql_duration_seconds_total{{view="{_escape(v)}"}} {m.sql_seconds}' for v, m in views]
+
+        role_cache = role_cache_stats.snapshot()
+        lines += [
+            '# HELP projects_role_cache_requests_total Role cache lookups by result.',
+            '# TYPE projects_role_cache_requests_total counter',
+            f'projects_role_cache_requests_total{{result="hit"}} {role_cache["hits"]}',
+            f'projects_role_cache_requests_total{{result="miss"}} {role_cache["misses"]}',
+        ]
+
+        user_cache = user_cache_stats.snapshot()
+        lines += [
+            '# HELP projects_user_cache_requests_total Cached user lookups by result (auth profile "cached").',
+            '# TYPE projects_user_cache_requests_total counter',
+            f'projects_user_cache_requests_total{{result="hit"}} {user_cache["hits"]}',
+            f'projects_user_cache_requests_total{{result="miss"}} {user_cache["misses"]}',
+        ]
+
+        fragments = fragment_cache_stats.snapshot()
+        lines += [
+            '# HELP projects_fragment_cache_requests_total Fragment cache lookups by result.',
+            '# TYPE projects_fragment_cache_requests_total counter',
+            f'projects_fragment_cache_requests_total{{result="hit"}} {fragments["hits"]}',
+            f'projects_fragment_cache_requests_total{{result="miss"}} {fragments["misses"]}',
+            '# HELP projects_fragment_cache_saved_bytes_total HTML served from the fragment cache instead of rendered.',
+            '# TYPE projects_fragment_cache_saved_bytes_total counter',
+            f'projects_fragment_cache_saved_bytes_total {fragments["bytes_saved"]}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """
+    A `connection.execute_wrapper` that counts queries and the time they take.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+# The counter of the request being handled. Connections are per thread, and
+# under ASGI a request's queries run in worker threads (sync_to_async), so
+# the counter travels in the request's context instead of being attached to
+# the connections of the thread that handles the request.
+current_query_counter = ContextVar('current_query_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = current_query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created handler adding `count_query` to every connection;
+    only connected while PROJECTS_METRICS_ENABLED (see projects.signals).
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL query count and SQL time of every request under its
+    resolved URL name (e.g. 'projects:project-detail'). Requests that did not
+    resolve are grouped under '<unresolved>'.
+
+    Sync and async capable: under ASGI it stays on the event loop, so async
+    views are not moved to a worker thread on its account.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROJECTS_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        token = current_query_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_counter.reset(token)
+        self.observe(request, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = current_query_counter.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_counter.reset(token)
+        self.observe(request, time.perf_counter() - start, counter)
+        return response
+
+    def observe(self, request, latency, counter):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else '<unresolved>'
+        registry.observe(view, latency, counter.count, counter.seconds)
+
+
+@staff_member_required
+def metrics_view(request):
+    """Staff-only endpoint serving the collected metrics to Prometheus."""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='project',
+            name='comments',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='projects.project'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:44
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectMembership = apps.get_model('projects', 'ProjectMembership')
+    Comment = apps.get_model('projects', 'Comment')
+
+    def count(model):
+        return Coalesce(Subquery(
+            model.objects.filter(project=OuterRef('pk')).order_by().values('project')
+            .annotate(count=Count('pk')).values('count'),
+            output_field=models.IntegerField(),
+        ), 0)
+
+    latest_comment = Subquery(
+        Comment.objects.filter(project=OuterRef('pk')).order_by().values('project')
+        .annotate(latest=Max('created_at')).values('latest')
+    )
+    Project.objects.update(
+        member_count=count(ProjectMembership),
+        comment_count=count(Comment),
+        last_activity_at=Greatest('updated_at', Coalesce(latest_comment, 'updated_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_comment_feed_relation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# FTS5 index over project names/descriptions and comment texts, maintained
+# by triggers. rowid = 2 * project id for projects, 2 * comment id + 1 for
+# comments, so the triggers can address rows without scanning the index.
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE projects_search USING fts5(
+        title, body,
+        kind UNINDEXED, object_id UNINDEXED, project_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER projects_search_project_insert AFTER INSERT ON projects_project BEGIN
+        INSERT INTO projects_search (rowid, title, body, kind, object_id, project_id)
+        VALUES (new.id * 2, new.name, new.description, 'project', new.id, new.id);
+    END""",
+    """CREATE TRIGGER projects_search_project_update AFTER UPDATE OF name, description ON projects_project BEGIN
+        UPDATE projects_search SET title = new.name, body = new.description WHERE rowid = new.id * 2;
+    END""",
+    """CREATE TRIGGER projects_search_project_delete AFTER DELETE ON projects_project BEGIN
+        DELETE FROM projects_search WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER projects_search_comment_insert AFTER INSERT ON projects_comment BEGIN
+        INSERT INTO projects_search (rowid, title, body, kind, object_id, project_id)
+        VALUES (new.id * 2 + 1, '', new.text, 'comment', new.id, new.project_id);
+    END""",
+    """CREATE TRIGGER projects_search_comment_update AFTER UPDATE OF text ON projects_comment BEGIN
+        UPDATE projects_search SET body = new.text WHERE rowid = new.id * 2 + 1;
+    END""",
+    """CREATE TRIGGER projects_search_comment_delete AFTER DELETE ON projects_comment BEGIN
+        DELETE FROM projects_search WHERE rowid = old.id * 2 + 1;
+    END""",
+    """INSERT INTO projects_search (rowid, title, body, kind, object_id, project_id)
+        SELECT id * 2, name, description, 'project', id, id FROM projects_project""",
+    """INSERT INTO projects_search (rowid, title, body, kind, object_id, project_id)
+        SELECT id * 2 + 1, '', text, 'comment', id, project_id FROM projects_comment""",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS projects_search_project_insert',
+    'DROP TRIGGER IF EXISTS projects_search_project_update',
+    'DROP TRIGGER IF EXISTS projects_search_project_delete',
+    'DROP TRIGGER IF EXISTS projects_search_comment_insert',
+    'DROP TRIGGER IF EXISTS projects_search_comment_update',
+    'DROP TRIGGER IF EXISTS projects_search_comment_delete',
+    'DROP TABLE IF EXISTS projects_search',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # FTS5 is SQLite-only; other backends use the fallback in projects.search.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_activity_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
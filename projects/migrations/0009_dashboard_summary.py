@@ -0,0 +1,37 @@
+# Generated by Django 4.2.23 on 2026-10-17 18:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('projects', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDashboardSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('owner_count', models.IntegerField(default=0)),
+                ('editor_count', models.IntegerField(default=0)),
+                ('reader_count', models.IntegerField(default=0)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('starting_this_week_count', models.IntegerField(default=0)),
+                ('recent_comment_count', models.IntegerField(default=0)),
+                ('as_of', models.DateField()),
+                ('week_start', models.DateField()),
+                ('week_end', models.DateField()),
+                ('recent_since', models.DateTimeField()),
+                ('rebuilt_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'User Dashboard Summary',
+                'verbose_name_plural': 'User Dashboard Summaries',
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.utils import timezone
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
 
 class Comment(models.Model):
-    project = models.ForeignKey('Project', on_delete=models.CASCADE)
+    project = models.ForeignKey('Project', related_name='comments', on_delete=models.CASCADE)
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE)
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -10,9 +13,106 @@ class Comment(models.Model):
         return f"Comment by {self.user.username} on {self.project.name}"
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Comments of one project, newest first (the comment feed).
+            models.Index(fields=['project', '-created_at', '-id'], name='comment_project_created_idx'),
+        ]
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
 
+class ProjectQuerySet(models.QuerySet):
+
+    def for_member(self, user):
+        """
+        Projects `user` is a member of, newest first (ties broken by id, so
+        the order is stable for keyset pagination), each annotated with
+        `user_role`: the user's role in that project. Member count, comment
+        count and last activity are plain columns on Project, so the list
+        stays a single query without any aggregates.
+        """
+        return (
+            self.filter(memberships__user=user)
+            # Reuses the membership join of the filter above.
+            .annotate(user_role=F('memberships__role'))
+            .order_by('-updated_at', '-id')
+        )
+
+    def record_activity(self, pk, members=0, comments=0):
+        """
+        Adjusts the denormalized counters of one project and stamps its
+        `last_activity_at`. F-expressions make the database do the arithmetic,
+        so concurrent writers never lose each other's increments. Call it in
+        the same transaction as the write it accounts for.
+        """
+        return self.filter(pk=pk).update(
+            member_count=F('member_count') + members,
+            comment_count=F('comment_count') + comments,
+            last_activity_at=timezone.now(),
+        )
+
+    def record_comments(self, counts):
+        """
+        `record_activity` for many projects at once: adds `counts[pk]` to the
+        comment count of each project in one UPDATE. For batched comment
+        writes (see projects.ingest).
+        """
+        added = Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+            default=Value(0), output_field=models.IntegerField(),
+        )
+        return self.filter(pk__in=list(counts)).update(
+            comment_count=F('comment_count') + added,
+            last_activity_at=timezone.now(),
+        )
+
+    def recount_counters(self):
+        """
+        Sets `member_count` and `comment_count` of the projects in this
+        queryset from the source tables and stamps `last_activity_at`. For
+        bulk inserts (bulk_create with ignore_conflicts, imports), which do
+        not report how many rows were actually inserted.
+        """
+        counters = self.with_actual_counters().filter(pk=OuterRef('pk'))
+        return self.update(
+            member_count=Subquery(counters.values('actual_member_count')[:1]),
+            comment_count=Subquery(counters.values('actual_comment_count')[:1]),
+            last_activity_at=timezone.now(),
+        )
+
+    def with_actual_counters(self):
+        """
+        Annotates `actual_member_count`, `actual_comment_count` and
+        `actual_last_activity_at` computed from the source tables, for
+        checking and repairing the denormalized columns.
+        """
+        member_count = (
+            ProjectMembership.objects.filter(project=OuterRef('pk'))
+            .order_by()
+            .values('project')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        comment_count = (
+            Comment.objects.filter(project=OuterRef('pk'))
+            .order_by()
+            .values('project')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        latest_comment = (
+            Comment.objects.filter(project=OuterRef('pk'))
+            .order_by('-created_at')
+            .values('created_at')[:1]
+        )
+        return self.annotate(
+            actual_member_count=Coalesce(Subquery(member_count, output_field=models.IntegerField()), 0),
+            actual_comment_count=Coalesce(Subquery(comment_count, output_field=models.IntegerField()), 0),
+            actual_last_activity_at=Greatest(
+                'updated_at', Coalesce(Subquery(latest_comment), 'updated_at')
+            ),
+        )
+
+
 class Project(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -21,10 +121,31 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     members= models.ManyToManyField('auth.User', through='ProjectMembership', related_name='projects')
-    comments = models.ForeignKey('Comment',  related_name='project_comments', on_delete=models.DO_NOTHING, null=True, blank=True)
+    # Denormalized activity counters, kept up to date by the views that write
+    # memberships and comments (see ProjectQuerySet.record_activity) and
+    # repaired by `manage.py repair_project_counters`.
+    member_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    COUNTER_FIELDS = ('member_count', 'comment_count')
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # Editing the project counts as activity, like comments and membership changes.
+        self.last_activity_at = timezone.now()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The counters are only changed with F() updates; writing back the
+            # values loaded with this instance would undo concurrent increments.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
 class ProjectMembership(models.Model):
     ROLE_CHOICES = [
@@ -41,5 +162,47 @@ class ProjectMembership(models.Model):
     
     class Meta:
         unique_together = ('project', 'user')
+        indexes = [
+            # The projects of one user; also covers the role lookup by
+            # (user, project) without touching the table.
+            models.Index(fields=['user', 'project', 'role'], name='membership_user_project_idx'),
+        ]
         verbose_name = 'Project Membership'
         verbose_name_plural = 'Project Memberships'
+
+
+class UserDashboardSummary(models.Model):
+    """
+    Precomputed dashboard figures of one user (see projects/dashboard.py).
+
+    Kept current by the write paths and rebuilt nightly by `manage.py
+    rebuild_dashboard_summaries`. The time-dependent figures are relative to
+    the stored window: `as_of` for overdue projects, `week_start` to
+    `week_end` (exclusive) for projects starting this week, and
+    `recent_since` for the comment volume.
+    """
+    user = models.OneToOneField(
+        'auth.User', primary_key=True, related_name='dashboard_summary', on_delete=models.CASCADE
+    )
+    # Plain integers: an update racing a rebuild may leave a count off by one
+    # until the next rebuild, which must not make a write fail a CHECK.
+    owner_count = models.IntegerField(default=0)
+    editor_count = models.IntegerField(default=0)
+    reader_count = models.IntegerField(default=0)
+    overdue_count = models.IntegerField(default=0)
+    starting_this_week_count = models.IntegerField(default=0)
+    recent_comment_count = models.IntegerField(default=0)
+    as_of = models.DateField()
+    week_start = models.DateField()
+    week_end = models.DateField()
+    recent_since = models.DateTimeField()
+    rebuilt_at = models.DateTimeField()
+
+    ROLE_FIELDS = {'Owner': 'owner_count', 'Editor': 'editor_count', 'Reader': 'reader_count'}
+
+    def __str__(self):
+        return f"Dashboard of {self.user_id}"
+
+    class Meta:
+        verbose_name = 'User Dashboard Summary'
+        verbose_name_plural = 'User Dashboard Summaries'
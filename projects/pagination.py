@@ -0,0 +1,123 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page is fetched with a `WHERE key < last_seen_key`
+condition on a unique, ordered key such as (updated_at, id). The database can
+then start reading right where the previous page stopped, so page 500 is as
+cheap as page 1, and rows inserted meanwhile never shift or duplicate rows
+across pages.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One page of results.
+    - `items`: The rows on this page.
+    - `has_next`: Whether there is at least one more row after this page.
+    - `next_cursor`: Opaque token to pass back to fetch the next page.
+    """
+
+    def __init__(self, items, has_next, next_cursor):
+        self.items = items
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    data = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, keys):
+    """
+    Turns a cursor back into key values, converted by the model fields.
+    Raises ValueError for anything that was not produced by `encode_cursor`.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Malformed cursor.') from exc
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError('Malformed cursor.')
+    try:
+        return [model._meta.get_field(key).to_python(value) for key, value in zip(keys, values)]
+    except Exception as exc:
+        raise ValueError('Malformed cursor.') from exc
+
+
+def _after(keys, values, descending=True):
+    """
+    Builds the "strictly after" condition for a descending key, e.g. for
+    (updated_at, id): updated_at < x OR (updated_at = x AND id < y). With
+    `descending=False` the same for an ascending key (> instead of <).
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f'{key}__{lookup}': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev_key: prev_value})
+        condition |= term
+    return condition
+
+
+def filter_after(queryset, cursor, keys, descending=True):
+    """
+    Returns `queryset` restricted to the rows after `cursor` in the order of
+    `keys`, or unchanged for an empty cursor. Raises ValueError for a
+    malformed cursor.
+    """
+    if not cursor:
+        return queryset
+    return filter_after_values(queryset, decode_cursor(cursor, queryset.model, keys), keys, descending)
+
+
+def filter_after_values(queryset, values, keys, descending=True):
+    """Like `filter_after`, for key values that are already decoded."""
+    return queryset.filter(_after(keys, values, descending))
+
+
+def _page_queryset(queryset, cursor, page_size, keys):
+    queryset = filter_after(queryset, cursor, keys)
+    return queryset.order_by(*[f'-{key}' for key in keys])[:page_size + 1]
+
+
+def _make_page(rows, page_size, keys):
+    has_next = len(rows) > page_size
+    items = rows[:page_size]
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([getattr(items[-1], key) for key in keys])
+    return KeysetPage(items, has_next, next_cursor)
+
+
+def paginate_keyset(queryset, cursor, page_size, keys=('updated_at', 'id')):
+    """
+    Returns the KeysetPage after `cursor` (or the first page when `cursor` is
+    empty) of `queryset`, ordered by `keys` descending. The last key must be
+    unique so that every row has a distinct position.
+
+    One extra row is fetched to find out whether another page exists, so a
+    page costs exactly one query.
+    """
+    keys = list(keys)
+    rows = list(_page_queryset(queryset, cursor, page_size, keys))
+    return _make_page(rows, page_size, keys)
+
+
+async def apaginate_keyset(queryset, cursor, page_size, keys=('updated_at', 'id')):
+    """Async version of `paginate_keyset`, reading the page with `aiterator()`."""
+    keys = list(keys)
+    rows = [row async for row in _page_queryset(queryset, cursor, page_size, keys).aiterator()]
+    return _make_page(rows, page_size, keys)
@@ -0,0 +1,131 @@
+"""
+Read/write splitting between the primary database and read replicas.
+
+`ReadReplicaRouter` sends every write to the primary ('default'). Reads of
+this app's models go to a replica only while `reads_from_replica` is set,
+which `ReplicaRoutingMiddleware` does for views marked `read_replica = True`
+(the project list, detail and comment feed views and their HTMX partials).
+Everything else, including sessions, users and all reads made by views that
+write, stays on the primary.
+
+Read-your-writes: a request with an unsafe method (POST, DELETE, ...) runs
+entirely on the primary, so the HTMX responses rendered right after a write
+(e.g. in ProjectCreateView.form_valid and ManageProjectUsersView.post) see
+the new rows. It also sets a short-lived cookie that keeps the client's
+following requests on the primary for PROJECTS_REPLICA_STICKY_SECONDS, which
+should exceed the replicas' usual replication lag.
+
+Replicas are configured in settings.DATABASES and listed in
+PROJECTS_READ_REPLICAS. Without replicas the middleware removes itself.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'projects_pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ROUTED_APPS = {'projects'}
+
+reads_from_replica = ContextVar('reads_from_replica', default=False)
+
+
+def read_replicas():
+    return getattr(settings, 'PROJECTS_READ_REPLICAS', [])
+
+
+@contextmanager
+def use_primary():
+    """Sends the reads inside the block to the primary, e.g. for access checks."""
+    token = reads_from_replica.set(False)
+    try:
+        yield
+    finally:
+        reads_from_replica.reset(token)
+
+
+class ReadReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if replicas and reads_from_replica.get() and model._meta.app_label in ROUTED_APPS:
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary, so any two rows may be related.
+        pool = {DEFAULT_DB_ALIAS, *read_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Turns on replica reads for views with `read_replica = True`, unless the
+    request writes or the client wrote within the sticky window.
+
+    Sync and async capable, like RequestMetricsMiddleware: under ASGI the
+    async views keep running on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not read_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django calls a sync process_view through sync_to_async.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = reads_from_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            reads_from_replica.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = reads_from_replica.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reads_from_replica.reset(token)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'PROJECTS_REPLICA_STICKY_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    def route(self, request, view_func):
+        view = getattr(view_func, 'view_class', view_func)
+        if (
+            getattr(view, 'read_replica', False)
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+        ):
+            reads_from_replica.set(True)
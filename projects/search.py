@@ -0,0 +1,127 @@
+"""
+Full-text search over projects and comments.
+
+On SQLite the text lives in the FTS5 table `projects_search` (created by
+migration 0008), kept in sync by triggers on projects_project and
+projects_comment, so bulk writes and raw SQL are indexed too. Each row is
+keyed by rowid = 2 * project id for a project and 2 * comment id + 1 for a
+comment, which lets the triggers update and delete rows by rowid instead of
+scanning the index.
+
+`search()` ranks matches with bm25 (a hit in a project name weighs more than
+one in a description or comment) and joins ProjectMembership in the same
+query, so only projects the user belongs to are ever read. Other database
+backends fall back to a case-insensitive match on projects only.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Project
+
+SEARCH_TABLE = 'projects_search'
+
+# Snippet delimiters that cannot occur in user text; replaced with <mark>
+# after escaping the snippet.
+MARK_START, MARK_END = '\x02', '\x03'
+
+SEARCH_SQL = f"""
+    SELECT s.kind, s.object_id, p.id, p.name, m.role,
+           snippet({SEARCH_TABLE}, 1, '{MARK_START}', '{MARK_END}', '…', 12)
+    FROM {SEARCH_TABLE} s
+    JOIN projects_projectmembership m ON m.project_id = s.project_id AND m.user_id = %s
+    JOIN projects_project p ON p.id = s.project_id
+    WHERE {SEARCH_TABLE} MATCH %s
+    ORDER BY bm25({SEARCH_TABLE}, 5.0, 1.0)
+    LIMIT %s
+"""
+
+REBUILD_SQL = [
+    f'DELETE FROM {SEARCH_TABLE}',
+    f"""INSERT INTO {SEARCH_TABLE} (rowid, title, body, kind, object_id, project_id)
+        SELECT id * 2, name, description, 'project', id, id FROM projects_project""",
+    f"""INSERT INTO {SEARCH_TABLE} (rowid, title, body, kind, object_id, project_id)
+        SELECT id * 2 + 1, '', text, 'comment', id, project_id FROM projects_comment""",
+    f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')",
+]
+
+
+class SearchResult:
+    """
+    - `kind`: 'project' or 'comment'.
+    - `object_id`: Primary key of the matching project or comment.
+    - `project_id`, `project_name`, `role`: The project it belongs to and the
+      user's role in it.
+    - `snippet`: HTML-safe excerpt with the matched terms in <mark>.
+    """
+
+    def __init__(self, kind, object_id, project_id, project_name, role, snippet):
+        self.kind = kind
+        self.object_id = object_id
+        self.project_id = project_id
+        self.project_name = project_name
+        self.role = role
+        self.snippet = snippet
+
+
+def match_expression(query):
+    """
+    Turns free text into an FTS5 query: every word becomes a quoted prefix
+    term and all of them must match. Returns '' if there is nothing to find.
+    FTS5 operators typed by the user are treated as plain words.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def _highlight(snippet):
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def has_search_index(connection):
+    """Whether `connection` has the FTS5 index; other backends use the fallback search."""
+    return connection.vendor == 'sqlite'
+
+
+def search(user, query, limit=None):
+    """Returns up to `limit` SearchResults for `user`, best match first."""
+    limit = limit or getattr(settings, 'PROJECTS_SEARCH_LIMIT', 20)
+    expression = match_expression(query)
+    if not expression or not user.is_authenticated:
+        return []
+
+    connection = connections[router.db_for_read(Project)]
+    if not has_search_index(connection):
+        return _fallback_search(user, query, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [user.pk, expression, limit])
+        return [
+            SearchResult(kind, object_id, project_id, name, role, _highlight(snippet))
+            for kind, object_id, project_id, name, role, snippet in cursor.fetchall()
+        ]
+
+
+def _fallback_search(user, query, limit):
+    projects = Project.objects.for_member(user).filter(name__icontains=query)[:limit]
+    return [
+        SearchResult('project', p.pk, p.pk, p.name, p.user_role, escape(p.description[:100]))
+        for p in projects
+    ]
+
+
+def rebuild_search_index(using='default'):
+    """Refills the FTS5 table from the source tables. Returns the row count."""
+    connection = connections[using]
+    if not has_search_index(connection):
+        raise ImproperlyConfigured(
+            f"Database '{using}' has no full-text index; it is only available on SQLite."
+        )
+    with connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
@@ -1,4 +1,7 @@
-from .models import Project, Comment
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from .models import Project, Comment, ProjectMembership
 from rest_framework import serializers
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -6,4 +9,114 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['text']
\ No newline at end of file
+        fields = ['text']
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Read serializer that renders only the fields passed as `fields=[...]`
+    (the `?fields=` query parameter of the API).
+
+    `optimize(queryset, fields)` shapes the queryset for exactly those fields:
+    `.only()` the columns they read, plus the joins and prefetches declared in
+    `Meta.select_related_fields` / `Meta.prefetch_related_fields` for the
+    fields that need them. A page therefore always costs the same number of
+    queries, whatever its size.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        Turns a comma-separated `?fields=` value into a list of field names;
+        None (all fields) if it is empty. Raises ValidationError for unknown
+        names.
+        """
+        names = [name.strip() for name in (value or '').split(',') if name.strip()]
+        if not names:
+            return None
+        unknown = [name for name in names if name not in cls.Meta.fields]
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Unknown field {name!r}." for name in unknown]})
+        return names
+
+    @classmethod
+    def optimize(cls, queryset, fields=None, keep=()):
+        """
+        Returns `queryset` loading only what `fields` (default: all) need.
+        `keep` lists extra columns to load, e.g. the pagination ordering.
+        """
+        fields = fields or cls.Meta.fields
+        select = getattr(cls.Meta, 'select_related_fields', {})
+        prefetch = getattr(cls.Meta, 'prefetch_related_fields', {})
+        declared = cls._declared_fields
+        model = cls.Meta.model
+        columns = {'pk', *keep}
+        for name in fields:
+            source = declared[name].source if name in declared and declared[name].source else name
+            path = source.replace('.', '__')
+            try:
+                field = model._meta.get_field(path.split('__')[0])
+            except FieldDoesNotExist:
+                # Annotations such as `user_role` and reverse relations.
+                continue
+            if field.concrete:
+                columns.add(path)
+        queryset = queryset.only(*columns)
+        related = [select[name] for name in fields if name in select]
+        if related:
+            queryset = queryset.select_related(*related)
+        lookups = [prefetch[name]() for name in fields if name in prefetch]
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+
+class MembershipSerializer(SparseFieldsetSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = ProjectMembership
+        fields = ['id', 'username', 'role']
+        select_related_fields = {'username': 'user'}
+
+
+def _member_prefetch():
+    return Prefetch(
+        'memberships',
+        queryset=ProjectMembership.objects.select_related('user').order_by('id')
+        # project_id is needed to attach the rows to their projects.
+        .only('id', 'project_id', 'role', 'user__username'),
+    )
+
+
+class ProjectSerializer(SparseFieldsetSerializer):
+    """
+    A project as seen by the requesting user. `role` is the caller's own role
+    (the `user_role` annotation of `Project.objects.for_member`), `members`
+    the full member list, loaded with one prefetch query per page.
+    """
+    role = serializers.CharField(source='user_role', read_only=True)
+    members = MembershipSerializer(source='memberships', many=True, read_only=True)
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'start_date', 'end_date', 'created_at', 'updated_at',
+            'last_activity_at', 'member_count', 'comment_count', 'role', 'members',
+        ]
+        prefetch_related_fields = {'members': _member_prefetch}
+
+
+class ProjectCommentSerializer(SparseFieldsetSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'text', 'created_at', 'username']
+        select_related_fields = {'username': 'user'}
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import dashboard
+from .access import invalidate_role
+from .backends import invalidate_user
+from .events import COMMENTS, MEMBERS, publish_project_event
+from .fragments import bump_fragment_version
+from .metrics import install_query_counter
+from .models import Comment, Project, ProjectMembership
+from .sqlite import apply_sqlite_profile
+
+connection_created.connect(apply_sqlite_profile, dispatch_uid='projects.apply_sqlite_profile')
+if getattr(settings, 'PROJECTS_METRICS_ENABLED', False):
+    connection_created.connect(install_query_counter, dispatch_uid='projects.install_query_counter')
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_membership_role(sender, instance, **kwargs):
+    """
+    Keeps the role cache in step with membership writes: covers the add path
+    in ManageProjectUsersView, RemoveUserFromProjectView, the admin, and
+    memberships removed by a cascading project delete.
+    """
+    invalidate_role(instance.user_id, instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def bump_project_fragments(sender, instance, **kwargs):
+    bump_fragment_version(instance.pk)
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_related_fragments(sender, instance, **kwargs):
+    """
+    Membership and comment writes change the member list, the comment feed
+    and the counters shown in the project's list row. Writes that bypass
+    signals (bulk_create, QuerySet.update) must call bump_fragment_version
+    themselves.
+    """
+    bump_fragment_version(instance.project_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def publish_comment_change(sender, instance, **kwargs):
+    publish_project_event(instance.project_id, COMMENTS)
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def publish_membership_change(sender, instance, **kwargs):
+    """Also reaches the streams of removed members, which then close."""
+    publish_project_event(instance.project_id, MEMBERS)
+
+
+@receiver(post_save, sender=ProjectMembership)
+def add_membership_to_dashboard(sender, instance, created, **kwargs):
+    if created:
+        dashboard.add_memberships(instance.project_id, [instance.user_id], instance.role)
+    else:
+        # Role changes (admin only) are rare; recount that user.
+        dashboard.rebuild_summaries([instance.user_id])
+
+
+@receiver(post_save, sender=ProjectMembership)
+def record_role_change_activity(sender, instance, created, **kwargs):
+    """
+    Moves the Last-Modified of the member's project list when a role
+    changes; additions stamp it through record_activity already.
+    """
+    if not created:
+        Project.objects.record_activity(instance.project_id)
+
+
+@receiver(post_delete, sender=ProjectMembership)
+def remove_membership_from_dashboard(sender, instance, origin=None, **kwargs):
+    # A deleted project was already subtracted as a whole (see below).
+    if not isinstance(origin, Project):
+        dashboard.add_memberships(instance.project_id, [instance.user_id], instance.role, sign=-1)
+
+
+@receiver(post_save, sender=Comment)
+def add_comment_to_dashboard(sender, instance, created, **kwargs):
+    if created:
+        dashboard.add_comments(instance.project_id, 1, instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_dashboard(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, Project):
+        dashboard.add_comments(instance.project_id, -1, instance.created_at)
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_dates(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._dashboard_dates = (
+            Project.objects.filter(pk=instance.pk).values_list('start_date', 'end_date').first()
+        )
+
+
+@receiver(post_save, sender=Project)
+def move_project_dates_on_dashboard(sender, instance, created, **kwargs):
+    old_dates = getattr(instance, '_dashboard_dates', None)
+    new_dates = (instance.start_date, instance.end_date)
+    if not created and old_dates is not None and old_dates != new_dates:
+        dashboard.move_project_dates(instance.pk, old_dates, new_dates)
+
+
+@receiver(pre_delete, sender=Project)
+def remove_project_from_dashboard(sender, instance, **kwargs):
+    """Before the cascade, while the memberships and comments still exist."""
+    dashboard.remove_project(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Keeps CachedModelBackend in step with user writes: password changes,
+    deactivation, the admin, and the `last_login` update of every login.
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,55 @@
+"""
+SQLite connection profiles.
+
+`apply_sqlite_profile` is connected to the `connection_created` signal (see
+`projects.signals`) and runs the PRAGMAs of the profile named by the
+PROJECTS_SQLITE_PROFILE setting on every new SQLite connection:
+
+- 'default': SQLite's own defaults (rollback journal, full fsync on commit).
+- 'production': WAL journaling, so readers never block the writer and
+  commits append to the log instead of rewriting pages; `synchronous=NORMAL`,
+  which in WAL mode only fsyncs at checkpoints; a busy timeout so concurrent
+  writers wait for the lock instead of failing with "database is locked";
+  plus a larger page cache, memory-mapped reads and in-memory temp tables.
+
+WAL files grow until a checkpoint copies them back into the database. SQLite
+checkpoints automatically, but long-running readers can hold that off; run
+`manage.py sqlite_maintenance` periodically to checkpoint and to refresh the
+query planner statistics with `PRAGMA optimize`.
+"""
+from django.conf import settings
+
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,           # milliseconds
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -20000,           # negative: KiB, i.e. about 20 MB
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def get_sqlite_pragmas(profile=None):
+    """Returns the PRAGMAs of `profile` (default: the configured profile)."""
+    profile = profile or getattr(settings, 'PROJECTS_SQLITE_PROFILE', 'default')
+    try:
+        return SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown PROJECTS_SQLITE_PROFILE {profile!r}. Choose from: {', '.join(SQLITE_PROFILES)}."
+        )
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """`connection_created` receiver; other database vendors are left alone."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_sqlite_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
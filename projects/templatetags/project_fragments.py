@@ -0,0 +1,55 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from projects.fragments import get_or_render_fragment
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+
+    def __init__(self, nodelist, name, project, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.project = project
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        project = self.project.resolve(context)
+        project_id = getattr(project, 'pk', project)
+        user = context.get('user')
+        user_id = getattr(user, 'pk', None)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        html = get_or_render_fragment(
+            name, user_id, project_id, lambda: self.nodelist.render(context), vary_on
+        )
+        return mark_safe(html)
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Caches the enclosed template block per (user, project, version):
+
+        {% fragment 'member-list' project [vary_on ...] %}
+            ...
+        {% endfragment %}
+
+    The project's version moves on with every Project, ProjectMembership or
+    Comment write (see `projects.fragments`), so a cached block is only served
+    while the rows it was rendered from are unchanged. Extra arguments are
+    added to the key for blocks that also depend on other context values.
+    Querysets used only inside the block are not evaluated on a hit.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name and a project.")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -1,3 +1,1540 @@
-from django.test import TestCase
+import asyncio
+import json
+import sqlite3
+import tempfile
+from datetime import date
+from functools import partial
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import transfer
+from .access import get_cached_role, role_cache_stats
+from .backends import user_cache_key, user_cache_stats
+from .bench import seed, summarize
+from .dashboard import rebuild_summaries
+from .events import get_broker
+from .fragments import fragment_cache_stats, get_fragment_version
+from .ingest import CommentIngestor
+from .loadtest import build_users, run_load
+from .members import bulk_add_members
+from .management.commands.bench_auth import classify
+from .management.commands.check_query_plans import FULL_SCAN, explain
+from .metrics import registry
+from .models import Comment, Project, ProjectMembership, UserDashboardSummary
+from .routers import PIN_COOKIE, ReadReplicaRouter, ReplicaRoutingMiddleware, reads_from_replica, use_primary
+from .search import search
+from .transfer import Importer, astream_comment_history, astream_export, read_records
+from .sqlite import apply_sqlite_profile
+from .views import ManageProjectUsersView, ProjectDetailView, ProjectListView
+
+
+class ProjectTestData(TestCase):
+    """
+    Shared fixture: one project with an Owner, an Editor and a Reader, plus a
+    user who is not a member at all.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pw')
+        cls.editor = User.objects.create_user('editor', password='pw')
+        cls.reader = User.objects.create_user('reader', password='pw')
+        cls.outsider = User.objects.create_user('outsider', password='pw')
+        cls.project = Project.objects.create(
+            name='Apollo', description='Moon landing', start_date=date(2025, 1, 1)
+        )
+        ProjectMembership.objects.create(project=cls.project, user=cls.owner, role='Owner')
+        ProjectMembership.objects.create(project=cls.project, user=cls.editor, role='Editor')
+        ProjectMembership.objects.create(project=cls.project, user=cls.reader, role='Reader')
+        cls.comment = Comment.objects.create(project=cls.project, user=cls.owner, text='Hello')
+        Project.objects.filter(pk=cls.project.pk).update(member_count=3, comment_count=1)
+        cls.project.refresh_from_db()
+
+    def setUp(self):
+        # The database is rolled back between tests but the cache is not.
+        cache.clear()
+        role_cache_stats.reset()
+        fragment_cache_stats.reset()
+
+    def htmx(self):
+        return {'HTTP_HX_REQUEST': 'true'}
+
+
+class ProjectAccessTests(ProjectTestData):
+
+    def test_non_member_gets_404(self):
+        self.client.force_login(self.outsider)
+        response = self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_wrong_role_gets_403(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:project-update', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_anonymous_user_is_redirected_to_login(self):
+        response = self.client.get(reverse('projects:project-delete', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_detail_context_uses_resolved_role(self):
+        self.client.force_login(self.editor)
+        response = self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertEqual(response.context['user_role'], 'Editor')
+        self.assertEqual(response.context['project_access'].project, self.project)
+        self.assertContains(response, 'Edit Project')
+        self.assertNotContains(response, 'Manage Users')
+
+
+class RoleCacheTests(ProjectTestData):
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-remove-user', args=[self.project.pk, self.owner.pk])
+        self.client.delete(url)
+        self.assertEqual(get_cached_role(self.owner.pk, self.project.pk), 'Owner')
+        role_cache_stats.reset()
+
+        # session + user + target membership; no lookup of the caller's role.
+        with self.assertNumQueries(3):
+            self.client.delete(url)
+        self.assertEqual(role_cache_stats.snapshot()['hits'], 1)
+        self.assertEqual(role_cache_stats.snapshot()['misses'], 0)
+
+    def test_non_members_are_cached_too(self):
+        self.client.force_login(self.outsider)
+        url = reverse('projects:project-detail', args=[self.project.pk])
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_adding_a_member_invalidates_the_cached_role(self):
+        self.client.force_login(self.outsider)
+        detail_url = reverse('projects:project-detail', args=[self.project.pk])
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+        self.client.force_login(self.owner)
+        self.client.post(
+            reverse('projects:project-manage-users', args=[self.project.pk]),
+            {'username': 'outsider', 'role': 'Reader'},
+        )
+
+        self.client.force_login(self.outsider)
+        response = self.client.get(detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user_role'], 'Reader')
+
+    def test_removing_a_member_invalidates_the_cached_role(self):
+        self.client.force_login(self.reader)
+        detail_url = reverse('projects:project-detail', args=[self.project.pk])
+        self.assertEqual(self.client.get(detail_url).status_code, 200)
+
+        self.client.force_login(self.owner)
+        self.client.delete(reverse('projects:project-remove-user', args=[self.project.pk, self.reader.pk]))
+
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+
+class ProjectListAnnotationTests(ProjectTestData):
+
+    def test_rows_carry_role_and_counters(self):
+        project = Project.objects.for_member(self.editor).get()
+        self.assertEqual(project.user_role, 'Editor')
+        self.assertEqual(project.member_count, 3)
+        self.assertEqual(project.comment_count, 1)
+
+    @override_settings(PROJECTS_PAGE_SIZE=50)
+    def test_query_count_does_not_grow_with_the_number_of_projects(self):
+        for i in range(30):
+            project = Project.objects.create(name=f'P{i}', description='', start_date=date(2025, 1, 1))
+            ProjectMembership.objects.create(project=project, user=self.reader, role='Owner')
+        self.client.force_login(self.reader)
+        # session + user + ETag aggregate + the annotated project list
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('projects:project-list'))
+        self.assertContains(response, 'Manage Users', count=30)
+
+
+@override_settings(PROJECTS_PAGE_SIZE=2)
+class ProjectListPaginationTests(ProjectTestData):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(4):
+            project = Project.objects.create(name=f'Project {i}', description='', start_date=date(2025, 1, 1))
+            ProjectMembership.objects.create(project=project, user=cls.owner, role='Owner')
+        # Identical timestamps must not make rows repeat or go missing.
+        Project.objects.update(updated_at=cls.project.updated_at)
+
+    def test_pages_follow_the_cursor_without_gaps_or_repeats(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:project-list'))
+        seen = [p.pk for p in response.context['projects']]
+        page = response.context['page']
+        while page.has_next:
+            response = self.client.get(
+                reverse('projects:project-list'), {'cursor': page.next_cursor}, **self.htmx()
+            )
+            self.assertTemplateUsed(response, 'projects/_project_list_page.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            seen += [p.pk for p in response.context['projects']]
+            page = response.context['page']
+        expected = list(Project.objects.filter(members=self.owner).order_by('-updated_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_next_page_is_loaded_on_scroll(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:project-list'))
+        self.assertContains(response, 'hx-trigger="revealed"')
+        self.assertEqual(len(response.context['projects']), 2)
+
+    def test_later_pages_cost_the_same_as_the_first(self):
+        self.client.force_login(self.owner)
+        page = self.client.get(reverse('projects:project-list')).context['page']
+        # session + user + ETag aggregate + one page of projects
+        with self.assertNumQueries(4):
+            self.client.get(reverse('projects:project-list'), {'cursor': page.next_cursor}, **self.htmx())
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:project-list'), {'cursor': 'garbage'}, **self.htmx())
+        self.assertEqual(response.status_code, 400)
+
+    def test_htmx_create_returns_the_first_page(self):
+        self.client.force_login(self.owner)
+        data = {'name': 'Gemini', 'description': 'Orbit', 'start_date': '2025-02-01'}
+        response = self.client.post(reverse('projects:project-create'), data, **self.htmx())
+        self.assertEqual([p.name for p in response.context['projects']][0], 'Gemini')
+        self.assertEqual(len(response.context['projects']), 2)
+
+
+@override_settings(PROJECTS_COMMENT_PAGE_SIZE=3)
+class CommentFeedTests(ProjectTestData):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        authors = [cls.owner, cls.editor, cls.reader]
+        for i in range(6):
+            Comment.objects.create(project=cls.project, user=authors[i % 3], text=f'Comment {i}')
+
+    def test_detail_shows_the_newest_page_with_authors(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertEqual([c.text for c in response.context['comment_page']], ['Comment 5', 'Comment 4', 'Comment 3'])
+        self.assertContains(response, 'Load older comments')
+        self.assertNotContains(response, 'Delete Comment')
+
+    def test_load_older_walks_the_whole_feed(self):
+        self.client.force_login(self.reader)
+        page = self.client.get(reverse('projects:project-detail', args=[self.project.pk])).context['comment_page']
+        texts = [c.text for c in page]
+        while page.has_next:
+            # session + user + membership/project + one page of comments with authors
+            with self.assertNumQueries(4):
+                response = self.client.get(
+                    reverse('projects:project-comments', args=[self.project.pk]),
+                    {'cursor': page.next_cursor},
+                    **self.htmx(),
+                )
+            page = response.context['comment_page']
+            texts += [c.text for c in page]
+        self.assertEqual(texts, [f'Comment {i}' for i in range(5, -1, -1)] + ['Hello'])
+
+    def test_feed_is_limited_to_members(self):
+        self.client.force_login(self.outsider)
+        response = self.client.get(reverse('projects:project-comments', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_htmx_comment_returns_refreshed_feed(self):
+        self.client.force_login(self.editor)
+        response = self.client.post(
+            reverse('projects:project-comment', args=[self.project.pk]), {'text': 'Fresh'}, **self.htmx()
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'projects/_comment_partial.html')
+        self.assertEqual(response.context['comment_page'].items[0].text, 'Fresh')
+
+    def test_htmx_delete_removes_the_comment_element(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-delete-comment', args=[self.project.pk, self.comment.pk])
+        response = self.client.post(url, **self.htmx())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+
+
+class AsyncReadViewTests(ProjectTestData):
+    """The async read views must behave like their sync counterparts."""
+
+    def test_async_list_matches_sync_list(self):
+        self.client.force_login(self.reader)
+        sync = self.client.get(reverse('projects:project-list'))
+        response = self.client.get(reverse('projects:project-list-async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['projects']), list(sync.context['projects']))
+        self.assertEqual(response.context['projects'][0].user_role, 'Reader')
+
+    def test_async_list_next_page_links_to_async_view(self):
+        for i in range(3):
+            project = Project.objects.create(name=f'Extra {i}', description='', start_date=date(2025, 1, 1))
+            ProjectMembership.objects.create(project=project, user=self.reader, role='Reader')
+        self.client.force_login(self.reader)
+        with self.settings(PROJECTS_PAGE_SIZE=2):
+            response = self.client.get(reverse('projects:project-list-async'), **self.htmx())
+        self.assertContains(response, reverse('projects:project-list-async') + '?cursor=')
+
+    def test_async_detail_shows_members_and_comments(self):
+        self.client.force_login(self.editor)
+        response = self.client.get(reverse('projects:project-detail-async', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user_role'], 'Editor')
+        self.assertEqual(len(response.context['members']), 3)
+        self.assertContains(response, 'Hello')
+
+    def test_async_comment_feed(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:project-comments-async', args=[self.project.pk]), **self.htmx())
+        self.assertContains(response, 'Hello')
+
+    def test_async_views_enforce_access(self):
+        url = reverse('projects:project-detail-async', args=[self.project.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(reverse('projects:project-comments-async', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PROJECTS_READ_REPLICAS=['replica1', 'replica2'])
+    def test_project_middleware_is_not_adapted_under_asgi(self):
+        # Django logs "Asynchronous handler adapted for middleware ..." for
+        # every sync-only middleware, which then runs requests in a thread.
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    def test_metrics_count_the_queries_of_async_views(self):
+        registry.reset()
+        self.async_client.force_login(self.reader)
+        response = async_to_sync(self.async_client.get)(reverse('projects:project-list-async'))
+        self.assertEqual(response.status_code, 200)
+        # Session, user and the list query.
+        self.assertIn('projects_sql_queries_total{view="projects:project-list-async"} 3', registry.render())
+
+    def test_async_feed_rejects_bad_cursor(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('projects:project-comments-async', args=[self.project.pk]), {'cursor': 'bogus'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_detail_uses_the_role_cache(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:project-detail-async', args=[self.project.pk])
+        self.client.get(url)
+        self.assertEqual(get_cached_role(self.reader.pk, self.project.pk), 'Reader')
+        # Session, user, project, members, comments.
+        with self.assertNumQueries(5):
+            self.client.get(url)
+
+
+class FragmentCacheTests(ProjectTestData):
+
+    def detail(self):
+        return self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+
+    def test_unchanged_detail_is_served_from_the_cache(self):
+        self.client.force_login(self.reader)
+        self.detail()
+        # Session, user, membership + project; members and comments are cached.
+        with self.assertNumQueries(3):
+            response = self.detail()
+        self.assertContains(response, 'Hello')
+        self.assertContains(response, 'editor')
+        stats = fragment_cache_stats.snapshot()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+        self.assertGreater(stats['bytes_saved'], 0)
+
+    def test_comment_write_bumps_the_version(self):
+        self.client.force_login(self.owner)
+        self.detail()
+        version = get_fragment_version(self.project.pk)
+        self.client.post(reverse('projects:project-comment', args=[self.project.pk]), {'text': 'Fresh news'})
+        self.assertNotEqual(get_fragment_version(self.project.pk), version)
+        self.assertContains(self.detail(), 'Fresh news')
+
+    def test_membership_write_refreshes_the_member_list(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-manage-users', args=[self.project.pk])
+        self.client.get(url)
+        response = self.client.post(url, {'username': 'outsider', 'role': 'Reader'}, **self.htmx())
+        self.assertContains(response, 'outsider')
+
+    def test_fragments_are_per_user(self):
+        self.client.force_login(self.owner)
+        self.assertContains(self.detail(), 'Delete Comment')
+        self.client.force_login(self.reader)
+        self.assertNotContains(self.detail(), 'Delete Comment')
+
+    def test_list_rows_follow_project_updates(self):
+        self.client.force_login(self.owner)
+        self.client.get(reverse('projects:project-list'))
+        self.project.name = 'Artemis'
+        self.project.save()
+        self.assertContains(self.client.get(reverse('projects:project-list')), 'Artemis')
+
+    def test_list_rows_make_no_cache_calls(self):
+        self.client.force_login(self.owner)
+        self.client.get(reverse('projects:project-list'))
+        stats = fragment_cache_stats.snapshot()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 0))
+
+
+class ConditionalGetTests(ProjectTestData):
+
+    def revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **extra)
+
+    def test_unchanged_detail_returns_304(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:project-detail', args=[self.project.pk])
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        # session + user + membership/project; nothing is rendered.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    def test_new_comment_changes_the_etag(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-detail', args=[self.project.pk])
+        response = self.client.get(url)
+        self.client.post(reverse('projects:project-comment', args=[self.project.pk]), {'text': 'New'})
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_etag_varies_by_user_and_role(self):
+        url = reverse('projects:project-detail', args=[self.project.pk])
+        self.client.force_login(self.owner)
+        response = self.client.get(url)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_htmx_partial_and_full_page_do_not_share_an_etag(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:project-list')
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.assertEqual(self.revalidate(url, response, **self.htmx()).status_code, 200)
+
+    def test_joining_a_project_changes_the_list_etag(self):
+        self.client.force_login(self.outsider)
+        url = reverse('projects:project-list')
+        response = self.client.get(url)
+        ProjectMembership.objects.create(project=self.project, user=self.outsider, role='Reader')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_role_change_changes_the_list_etag(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:project-list')
+        response = self.client.get(url)
+        # Also without signals, e.g. a raw UPDATE.
+        ProjectMembership.objects.filter(project=self.project, user=self.reader).update(role='Editor')
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        membership = ProjectMembership.objects.get(project=self.project, user=self.reader)
+        membership.role = 'Reader'
+        membership.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_non_member_never_gets_304(self):
+        self.client.force_login(self.outsider)
+        url = reverse('projects:project-comments', args=[self.project.pk])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(ProjectTestData):
+
+    def search(self, user, q):
+        self.client.force_login(user)
+        return self.client.get(reverse('projects:project-search'), {'q': q}, **self.htmx())
+
+    def test_finds_projects_and_comments_of_members(self):
+        Comment.objects.create(project=self.project, user=self.editor, text='Lunar module checklist')
+        response = self.search(self.reader, 'lunar')
+        self.assertContains(response, '<mark>Lunar</mark> module checklist', html=False)
+        response = self.search(self.reader, 'moo')
+        self.assertContains(response, '<mark>Moon</mark> landing', html=False)
+
+    def test_other_users_projects_are_not_searched(self):
+        response = self.search(self.outsider, 'apollo')
+        self.assertEqual(response.context['results'], [])
+
+    def test_project_name_ranks_above_comments(self):
+        other = Project.objects.create(name='Gemini', description='', start_date=date(2025, 1, 1))
+        ProjectMembership.objects.create(project=other, user=self.reader, role='Reader')
+        Comment.objects.create(project=self.project, user=self.owner, text='Gemini came first')
+        results = search(self.reader, 'gemini')
+        self.assertEqual([(r.kind, r.project_id) for r in results], [('project', other.pk), ('comment', self.project.pk)])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.project.name = 'Artemis'
+        self.project.save()
+        self.assertEqual(search(self.reader, 'apollo'), [])
+        self.assertEqual(len(search(self.reader, 'artemis')), 1)
+        self.comment.delete()
+        self.assertEqual(search(self.reader, 'hello'), [])
+
+    def test_snippets_are_escaped_and_operators_are_plain_words(self):
+        Comment.objects.create(project=self.project, user=self.owner, text='<script>alert(1)</script> NOT "quoted')
+        response = self.search(self.reader, 'script NOT "')
+        self.assertContains(response, '&lt;')
+        self.assertNotContains(response, '<script>alert')
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM projects_search')
+        self.assertEqual(search(self.reader, 'apollo'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Search index rebuilt with 2 rows.', out.getvalue())
+        self.assertEqual(len(search(self.reader, 'apollo')), 1)
+
+    def test_backends_without_the_index_fall_back(self):
+        with mock.patch('projects.search.has_search_index', return_value=False):
+            self.assertEqual([r.kind for r in search(self.reader, 'apollo')], ['project'])
+            with self.assertRaisesMessage(CommandError, 'only available on SQLite'):
+                call_command('rebuild_search_index')
+
+
+class BulkAddMembersTests(ProjectTestData):
+
+    def post(self, data, **extra):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-bulk-add-users', args=[self.project.pk])
+        return self.client.post(url, data, **{**self.htmx(), **extra})
+
+    def test_each_line_gets_a_result(self):
+        User.objects.create_user('newbie', password='pw')
+        text = 'username,role\noutsider,Editor\nnewbie\nreader,Reader\nghost,Reader\noutsider,Reader\nnewbie2,Owner'
+        response = self.post({'members': text})
+        statuses = [(r.username, r.status) for r in response.context['results']]
+        self.assertEqual(statuses, [
+            ('outsider', 'added'), ('newbie', 'added'), ('reader', 'already a member'),
+            ('ghost', 'unknown user'), ('outsider', 'duplicate'), ('newbie2', 'invalid role'),
+        ])
+        self.assertEqual(ProjectMembership.objects.get(project=self.project, user=self.outsider).role, 'Editor')
+        self.assertEqual(ProjectMembership.objects.get(project=self.project, user__username='newbie').role, 'Reader')
+        self.assertContains(response, 'Unknown user')
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.member_count, 5)
+
+    def test_query_count_does_not_grow_with_the_number_of_users(self):
+        names = [f'user{i}' for i in range(50)]
+        User.objects.bulk_create([User(username=name) for name in names])
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-bulk-add-users', args=[self.project.pk])
+        # session + user + membership/project + users IN + existing memberships
+        # + SAVEPOINT + INSERT + recount + dashboard summaries + RELEASE + member list
+        with self.assertNumQueries(11):
+            self.client.post(url, {'members': '\n'.join(names)}, **self.htmx())
+        self.assertEqual(ProjectMembership.objects.filter(project=self.project).count(), 53)
+
+    def test_member_added_concurrently_is_reported_and_counted_once(self):
+        rebuild_summaries([self.outsider.pk])
+        # Another request adds outsider after this one has read the existing members.
+        ProjectMembership.objects.create(project=self.project, user=self.outsider, role='Reader')
+        with mock.patch('projects.members._existing_members', side_effect=[set(), {self.outsider.pk}]):
+            results = bulk_add_members(self.project, [(1, 'outsider', 'Reader')])
+        self.assertEqual([r.status for r in results], ['already a member'])
+        self.assertEqual(UserDashboardSummary.objects.get(user=self.outsider).reader_count, 1)
+
+    def test_added_users_are_not_left_cached_as_outsiders(self):
+        self.client.force_login(self.outsider)
+        self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.post({'members': 'outsider,Reader'})
+        self.client.force_login(self.outsider)
+        response = self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile('team.csv', b'\xef\xbb\xbfusername,role\noutsider,Editor\n', content_type='text/csv')
+        response = self.post({'csv_file': upload})
+        self.assertEqual([r.status for r in response.context['results']], ['added'])
+
+    def test_empty_submission_is_reported(self):
+        response = self.post({'members': '  \n'})
+        self.assertContains(response, 'Enter at least one username.')
+
+    def test_only_owners_can_bulk_add(self):
+        self.client.force_login(self.editor)
+        url = reverse('projects:project-bulk-add-users', args=[self.project.pk])
+        self.assertEqual(self.client.post(url, {'members': 'outsider'}).status_code, 403)
+
+
+class ExportImportTests(ProjectTestData):
+
+    def export(self, fmt='ndjson'):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:project-export', args=[self.project.pk]), {'format': fmt})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_lists_project_members_and_comments(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([r['type'] for r in records], ['project', 'membership', 'membership', 'membership', 'comment'])
+        self.assertEqual(records[0]['name'], 'Apollo')
+        self.assertEqual(records[-1]['text'], 'Hello')
+
+    def test_asgi_export_streams_one_keyset_chunk_at_a_time(self):
+        Comment.objects.create(project=self.project, user=self.editor, text='Second')
+        self.async_client.force_login(self.owner)
+        url = reverse('projects:project-export', args=[self.project.pk])
+
+        async def run(fmt):
+            response = await self.async_client.get(url, {'format': fmt})
+            self.assertTrue(response.is_async)
+            # Each line with the number of chunks read from the database so far.
+            return [(line.decode(), read_chunk.call_count) async for line in response.streaming_content]
+
+        for fmt in ('ndjson', 'csv'):
+            with self.subTest(fmt=fmt), \
+                    mock.patch('projects.views.astream_export', partial(astream_export, chunk_size=2)), \
+                    mock.patch('projects.transfer._read_chunk', wraps=transfer._read_chunk) as read_chunk:
+                lines = async_to_sync(run)(fmt)
+                self.assertEqual(''.join(line for line, _ in lines), self.export(fmt))
+        # Project (1 row), memberships (2 + 1 rows), then comments (2 rows and an empty chunk).
+        self.assertEqual([count for _, count in lines], [0, 1, 2, 2, 3, 4, 4])
+
+    def test_export_is_owner_only(self):
+        self.client.force_login(self.editor)
+        response = self.client.get(reverse('projects:project-export', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_round_trip_through_the_commands(self):
+        for fmt in ('ndjson', 'csv'):
+            with self.subTest(fmt=fmt), tempfile.NamedTemporaryFile('w+', suffix=f'.{fmt}') as f:
+                call_command('export_projects', project=[self.project.pk], format=fmt, output=f.name)
+                out = StringIO()
+                call_command('import_projects', f.name, format=fmt, batch_size=2, stdout=out)
+                self.assertIn('Imported 1 projects, 3 memberships (0 already present) and 1 comments', out.getvalue())
+                copy = Project.objects.exclude(pk=self.project.pk).latest('pk')
+                self.assertEqual(copy.name, 'Apollo')
+                self.assertEqual((copy.member_count, copy.comment_count), (3, 1))
+                comment = copy.comments.get()
+                self.assertEqual(comment.created_at, self.comment.created_at)
+                self.assertEqual(comment.user, self.owner)
+
+    def test_import_view_adds_into_the_project_and_reports_bad_lines(self):
+        data = '\n'.join([
+            json.dumps({'type': 'project', 'project': 99, 'name': 'Ignored', 'start_date': '2025-01-01'}),
+            json.dumps({'type': 'membership', 'project': 99, 'username': 'outsider', 'role': 'Reader'}),
+            json.dumps({'type': 'membership', 'project': 99, 'username': 'reader', 'role': 'Reader'}),
+            json.dumps({'type': 'comment', 'project': 99, 'username': 'ghost', 'text': 'Boo'}),
+            json.dumps({'type': 'comment', 'project': 99, 'username': 'editor', 'text': 'Imported'}),
+            'not json',
+        ])
+        self.client.force_login(self.owner)
+        response = self.client.post(
+            reverse('projects:project-import', args=[self.project.pk]),
+            {'file': SimpleUploadedFile('data.ndjson', data.encode()), 'format': 'ndjson'},
+            follow=True,
+        )
+        self.assertContains(response, 'Imported 1 members and 1 comments.')
+        self.assertContains(response, 'Line 4: Unknown user')
+        self.assertContains(response, 'Line 6: Not a valid record.')
+        self.assertFalse(Project.objects.filter(name='Ignored').exists())
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.member_count, self.project.comment_count), (4, 2))
+        self.assertEqual(get_cached_role(self.outsider.pk, self.project.pk), None)
+
+    def import_into_project(self, *records):
+        data = '\n'.join(json.dumps(record) for record in records)
+        return Importer(into_project=self.project).run(read_records(data.splitlines(), 'ndjson'))
+
+    def test_import_into_a_project_cannot_add_owners(self):
+        importer = self.import_into_project(
+            {'type': 'membership', 'project': 99, 'username': 'outsider', 'role': 'Owner'},
+        )
+        self.assertEqual(importer.errors, [(1, "Role 'Owner' cannot be imported into an existing project.")])
+        self.assertFalse(ProjectMembership.objects.filter(project=self.project, user=self.outsider).exists())
+
+    def test_import_into_a_project_only_takes_comments_by_members(self):
+        User.objects.create_user('newbie', password='pw')
+        importer = self.import_into_project(
+            {'type': 'comment', 'project': 99, 'username': 'outsider', 'text': 'Not mine to say'},
+            {'type': 'membership', 'project': 99, 'username': 'newbie', 'role': 'Reader'},
+            {'type': 'comment', 'project': 99, 'username': 'newbie', 'text': 'Joined with this import'},
+        )
+        self.assertEqual(importer.errors, [(1, "User 'outsider' is not a member of this project.")])
+        self.assertEqual(
+            list(self.project.comments.order_by('pk').values_list('text', flat=True)),
+            ['Hello', 'Joined with this import'],
+        )
+
+    def test_import_rejects_values_of_the_wrong_type(self):
+        project = {'type': 'project', 'project': 1, 'name': 'Typed', 'start_date': '2025-01-01'}
+        bad = [
+            ({**project, 'name': 5}, "Invalid name 5."),
+            ({**project, 'description': ['a']}, "Invalid description ['a']."),
+            ({**project, 'start_date': 20250101}, "Invalid start_date 20250101."),
+            ({**project, 'end_date': {'y': 2025}}, "Invalid end_date {'y': 2025}."),
+            ({'type': ['project']}, "Invalid type ['project']."),
+            ({'type': 'membership', 'project': 1, 'username': 'reader', 'role': ['Reader']},
+             "Invalid role ['Reader']."),
+            ({'type': 'membership', 'project': 1, 'username': 'reader', 'role': {'Reader': 1}},
+             "Invalid role {'Reader': 1}."),
+            ({'type': 'membership', 'project': 1, 'username': ['reader'], 'role': 'Reader'},
+             "Invalid username ['reader']."),
+            ({'type': 'comment', 'project': 1, 'username': 'reader', 'text': 7}, "Invalid text 7."),
+            ({'type': 'comment', 'project': 1, 'username': 'reader', 'text': 'Hi', 'created_at': 3},
+             "Invalid created_at 3."),
+        ]
+        data = '\n'.join(json.dumps(record) for record, _ in [(project, None), *bad])
+        importer = Importer().run(read_records(data.splitlines(), 'ndjson'))
+        self.assertEqual(importer.errors, [(line, message) for line, (_, message) in enumerate(bad, start=2)])
+        self.assertEqual(importer.created, {'project': 1, 'membership': 0, 'comment': 0})
+
+
+class ApiTests(ProjectTestData):
+
+    def add_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(name=f'P{i}', description='', start_date=date(2025, 1, 1))
+            ProjectMembership.objects.create(project=project, user=self.reader, role='Reader')
+            ProjectMembership.objects.create(project=project, user=self.owner, role='Owner')
+
+    def test_project_list_is_limited_to_memberships_with_sparse_fields(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:api-project-list'), {'fields': 'id,name,role'})
+        self.assertEqual(response.json()['results'], [{'id': self.project.pk, 'name': 'Apollo', 'role': 'Reader'}])
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(reverse('projects:api-project-list')).json()['results'], [])
+
+    def test_role_filter_and_unknown_fields(self):
+        self.add_projects(2)
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('projects:api-project-list'), {'role': 'Reader'})
+        self.assertEqual(response.json()['results'], [])
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:api-project-list'), {'role': 'Reader', 'fields': 'name'})
+        self.assertEqual(len(response.json()['results']), 3)
+        response = self.client.get(reverse('projects:api-project-list'), {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('projects:api-project-list'), {'role': 'Admin'}).status_code, 400)
+
+    def test_queries_per_page_do_not_depend_on_page_size(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:api-project-list')
+        params = {'fields': 'id,name,members', 'page_size': 1}
+        # Session, user, page, members prefetch.
+        with self.assertNumQueries(4):
+            response = self.client.get(url, params)
+        self.assertEqual(
+            response.json()['results'][0]['members'],
+            [{'id': m.pk, 'username': m.user.username, 'role': m.role} for m in self.project.memberships.order_by('id')],
+        )
+        self.add_projects(10)
+        params['page_size'] = 10
+        with self.assertNumQueries(4):
+            response = self.client.get(url, params)
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_cursor_pagination_walks_every_project_once(self):
+        self.add_projects(5)
+        self.client.force_login(self.reader)
+        url, params, seen = reverse('projects:api-project-list'), {'fields': 'id', 'page_size': 2}, []
+        while url:
+            data = self.client.get(url, params).json()
+            seen += [row['id'] for row in data['results']]
+            url, params = data['next'], None
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_members_and_comments_are_for_members_only(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('projects:api-project-comments', args=[self.project.pk]))
+        self.assertEqual(response.json()['results'][0]['username'], 'owner')
+        response = self.client.get(
+            reverse('projects:api-project-members', args=[self.project.pk]), {'fields': 'username,role'}
+        )
+        self.assertEqual(response.json()['results'][0], {'username': 'owner', 'role': 'Owner'})
+        self.client.force_login(self.outsider)
+        for name in ('api-project-detail', 'api-project-members', 'api-project-comments'):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(reverse(f'projects:{name}', args=[self.project.pk])).status_code, 404)
+
+    def test_anonymous_requests_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('projects:api-project-list')).status_code, 403)
+
+
+class CommentHistoryTests(ProjectTestData):
+
+    def history(self, **params):
+        response = self.client.get(reverse('projects:api-project-comment-history', args=[self.project.pk]), params)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_streams_all_comments_oldest_first_in_one_query(self):
+        for i in range(3):
+            Comment.objects.create(project=self.project, user=self.editor, text=f'c{i}')
+        self.client.force_login(self.reader)
+        # Session, user, role check and the history itself.
+        with self.assertNumQueries(4):
+            data = self.history()
+        self.assertEqual(data['project'], self.project.pk)
+        self.assertEqual([c['text'] for c in data['comments']], ['Hello', 'c0', 'c1', 'c2'])
+        self.assertEqual(data['comments'][0]['username'], 'owner')
+
+    def test_since_returns_only_newer_comments(self):
+        self.client.force_login(self.reader)
+        since = self.history()['since']
+        self.assertEqual(self.history(since=since), {'project': self.project.pk, 'comments': [], 'since': since})
+        Comment.objects.create(project=self.project, user=self.editor, text='New')
+        data = self.history(since=since)
+        self.assertEqual([c['text'] for c in data['comments']], ['New'])
+        self.assertNotEqual(data['since'], since)
+
+    def test_asgi_streams_one_keyset_chunk_at_a_time(self):
+        for i in range(4):
+            Comment.objects.create(project=self.project, user=self.editor, text=f'c{i}')
+        self.async_client.force_login(self.reader)
+        url = reverse('projects:api-project-comment-history', args=[self.project.pk])
+
+        async def run():
+            response = await self.async_client.get(url)
+            self.assertTrue(response.is_async)
+            # Each piece with the number of chunks read from the database so far.
+            return [(piece, read_chunk.call_count) async for piece in response.streaming_content]
+
+        with mock.patch('projects.api.astream_comment_history', partial(astream_comment_history, chunk_size=2)), \
+                mock.patch('projects.transfer._read_chunk', wraps=transfer._read_chunk) as read_chunk:
+            pieces = async_to_sync(run)()
+        self.assertEqual([count for _, count in pieces], [0, 1, 2, 3, 3])
+        chunks = [json.loads(f'[{piece.decode().strip(",")}]') for piece, _ in pieces[1:-1]]
+        self.assertEqual([[c['text'] for c in chunk] for chunk in chunks], [['Hello', 'c0'], ['c1', 'c2'], ['c3']])
+        data = json.loads(b''.join(piece for piece, _ in pieces))
+        self.assertEqual(len(data['comments']), 5)
+        self.client.force_login(self.reader)
+        self.assertEqual(data['since'], self.history()['since'])
+
+    def test_invalid_cursor_and_non_members(self):
+        self.client.force_login(self.reader)
+        url = reverse('projects:api-project-comment-history', args=[self.project.pk])
+        self.assertEqual(self.client.get(url, {'since': 'garbage'}).status_code, 400)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(PROJECTS_EVENTS_HEARTBEAT=0.5, PROJECTS_EVENTS_MAX_AGE=0.5)
+class EventStreamTests(ProjectTestData):
+
+    def url(self):
+        return reverse('projects:project-events', args=[self.project.pk])
+
+    def test_wsgi_requests_are_told_not_to_reconnect(self):
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(self.url()).status_code, 204)
+
+    def test_stream_pushes_rendered_fragments(self):
+        self.async_client.force_login(self.reader)
+
+        async def run():
+            response = await self.async_client.get(self.url())
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            events = response.streaming_content
+            self.assertEqual(await anext(events), b'retry: 3000\n\n')
+            self.assertEqual(get_broker().subscriber_count(self.project.pk), 1)
+            await sync_to_async(Comment.objects.create)(project=self.project, user=self.editor, text='Pushed')
+            # TestCase never commits, so publish the way on_commit would.
+            get_broker().publish(self.project.pk, 'comments')
+            event = (await anext(events)).decode()
+            self.assertTrue(event.startswith('event: comments\ndata: '))
+            self.assertIn('Pushed', event)
+            # Nothing else happens until the stream reaches its maximum age.
+            self.assertEqual({e async for e in events} - {b': keepalive\n\n'}, set())
+
+        async_to_sync(run)()
+        self.assertEqual(get_broker().subscriber_count(self.project.pk), 0)
+
+    def test_removed_member_stream_closes(self):
+        self.async_client.force_login(self.reader)
+
+        async def run():
+            response = await self.async_client.get(self.url())
+            events = response.streaming_content
+            await anext(events)
+            await ProjectMembership.objects.filter(user=self.reader).adelete()
+            get_broker().publish(self.project.pk, 'members')
+            with self.assertRaises(StopAsyncIteration):
+                await anext(events)
+
+        async_to_sync(run)()
+
+    def test_publishing_waits_for_the_commit(self):
+        broker = get_broker()
+        with mock.patch.object(broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(project=self.project, user=self.editor, text='Later')
+                publish.assert_not_called()
+        publish.assert_called_once_with(self.project.pk, 'comments')
+
+
+class CommentBatchTests(ProjectTestData):
+
+    def post(self, items):
+        return self.client.post(
+            reverse('projects:project-comment', args=[self.project.pk]), items, content_type='application/json'
+        )
+
+    def test_array_is_created_with_one_insert(self):
+        self.client.force_login(self.editor)
+        # Session, user, role, savepoint pair, insert, counter update, dashboard summaries.
+        with self.assertNumQueries(8):
+            response = self.post([{'text': f'Synced {i}'} for i in range(50)])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 50)
+        ids = [row['id'] for row in data['results']]
+        self.assertEqual(
+            list(Comment.objects.filter(pk__in=ids).order_by('pk').values_list('text', flat=True)),
+            [f'Synced {i}' for i in range(50)],
+        )
+        self.assertEqual(Project.objects.get(pk=self.project.pk).comment_count, 51)
+
+    def test_one_invalid_item_rejects_the_batch_with_per_item_errors(self):
+        self.client.force_login(self.editor)
+        response = self.post([{'text': 'fine'}, {'text': ''}, 'not an object'])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('text', errors[1])
+        self.assertTrue(errors[2])
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_limits_and_roles(self):
+        self.client.force_login(self.editor)
+        self.assertEqual(self.post([]).status_code, 400)
+        with self.settings(PROJECTS_COMMENT_BATCH_LIMIT=2):
+            self.assertEqual(self.post([{'text': 'x'}] * 3).status_code, 400)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.post([{'text': 'x'}]).status_code, 403)
+
+
+class CommentIngestTests(ProjectTestData):
+
+    def test_batch_is_written_in_one_transaction(self):
+        other = Project.objects.create(name='Gemini', description='', start_date=date(2025, 1, 1))
+        ingestor = CommentIngestor(max_rows=10)
+        # Queued directly, without starting the writer thread.
+        futures = [ingestor.submit(self.project.pk, self.editor.pk, f'c{i}') for i in range(3)]
+        futures.append(ingestor.submit(other.pk, self.owner.pk, 'elsewhere'))
+        self.assertFalse(any(future.done() for future in futures))
+        # Insert, one counter UPDATE and a dashboard UPDATE per project (plus the savepoint pair).
+        with self.assertNumQueries(6):
+            ingestor.flush()
+        self.assertEqual([future.result().text for future in futures], ['c0', 'c1', 'c2', 'elsewhere'])
+        self.assertTrue(all(future.result().pk for future in futures))
+        self.assertEqual(Project.objects.get(pk=self.project.pk).comment_count, 4)
+        self.assertEqual(Project.objects.get(pk=other.pk).comment_count, 1)
+        self.assertEqual(ingestor.stats.snapshot()['commits'], 1)
+
+    def test_failed_comment_fails_its_future(self):
+        ingestor = CommentIngestor()
+        future = ingestor.submit(None, self.editor.pk, 'orphan')
+        ingestor.flush()
+        with self.assertRaises(IntegrityError):
+            future.result()
+        self.assertEqual(ingestor.stats.snapshot()['commits'], 0)
+
+
+class CommentIngestRetryTests(TransactionTestCase):
+
+    def test_comment_on_a_deleted_project_does_not_fail_the_batch(self):
+        # Foreign keys are only checked on a real commit, hence the TransactionTestCase.
+        editor = User.objects.create_user('editor', password='pw')
+        project = Project.objects.create(name='Apollo', description='', start_date=date(2025, 1, 1))
+        doomed = Project.objects.create(name='Doomed', description='', start_date=date(2025, 1, 1))
+        ingestor = CommentIngestor()
+        first = ingestor.submit(project.pk, editor.pk, 'first')
+        orphan = ingestor.submit(doomed.pk, editor.pk, 'too late')
+        last = ingestor.submit(project.pk, editor.pk, 'last')
+        doomed.delete()
+        ingestor.flush()
+        with self.assertRaises(IntegrityError):
+            orphan.result()
+        self.assertEqual([first.result().text, last.result().text], ['first', 'last'])
+        self.assertEqual(
+            list(project.comments.order_by('pk').values_list('text', flat=True)), ['first', 'last'],
+        )
+        self.assertEqual(Project.objects.get(pk=project.pk).comment_count, 2)
+
+
+class CommentIngestViewTests(TransactionTestCase):
+
+    def test_comment_is_acknowledged_after_the_batch_commits(self):
+        editor = User.objects.create_user('editor', password='pw')
+        project = Project.objects.create(name='Apollo', description='', start_date=date(2025, 1, 1))
+        ProjectMembership.objects.create(project=project, user=editor, role='Editor')
+        ingestor = CommentIngestor(max_delay_ms=1)
+        self.client.force_login(editor)
+        with override_settings(PROJECTS_COMMENT_INGEST=True), \
+                mock.patch('projects.views.get_comment_ingestor', return_value=ingestor):
+            response = self.client.post(
+                reverse('projects:project-comment', args=[project.pk]),
+                {'text': 'Batched'}, content_type='application/json',
+            )
+        ingestor.close()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Comment.objects.get(pk=response.json()['id']).text, 'Batched')
+        self.assertEqual(Project.objects.get(pk=project.pk).comment_count, 1)
+
+    def test_failed_comment_gets_a_json_error(self):
+        editor = User.objects.create_user('editor', password='pw')
+        project = Project.objects.create(name='Apollo', description='', start_date=date(2025, 1, 1))
+        ProjectMembership.objects.create(project=project, user=editor, role='Editor')
+        ingestor = mock.Mock()
+        ingestor.submit.return_value.result.side_effect = IntegrityError('FOREIGN KEY constraint failed')
+        self.client.force_login(editor)
+        with override_settings(PROJECTS_COMMENT_INGEST=True), \
+                mock.patch('projects.views.get_comment_ingestor', return_value=ingestor), \
+                self.assertLogs('projects.views', 'ERROR'):
+            response = self.client.post(
+                reverse('projects:project-comment', args=[project.pk]),
+                {'text': 'Lost'}, content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'The comment could not be saved.'})
+
+
+class DashboardSummaryTests(ProjectTestData):
+
+    def summary(self, user):
+        return UserDashboardSummary.objects.get(user=user)
+
+    def counts(self, user):
+        summary = self.summary(user)
+        return {field: getattr(summary, field) for field in (
+            'owner_count', 'editor_count', 'reader_count', 'overdue_count', 'starting_this_week_count',
+            'recent_comment_count',
+        )}
+
+    def assertMatchesRebuild(self, *users):
+        incremental = [self.counts(user) for user in users]
+        rebuild_summaries([user.pk for user in users])
+        self.assertEqual(incremental, [self.counts(user) for user in users])
+
+    def test_rebuild_counts_roles_dates_and_recent_comments(self):
+        today = timezone.localdate()
+        Project.objects.create(name='Late', description='', start_date=date(2024, 1, 1), end_date=date(2024, 6, 1))
+        soon = Project.objects.create(name='Soon', description='', start_date=today, end_date=None)
+        late = Project.objects.get(name='Late')
+        ProjectMembership.objects.create(project=late, user=self.owner, role='Editor')
+        ProjectMembership.objects.create(project=soon, user=self.owner, role='Reader')
+        rebuild_summaries([self.owner.pk, self.outsider.pk])
+        self.assertEqual(self.counts(self.owner), {
+            'owner_count': 1, 'editor_count': 1, 'reader_count': 1, 'overdue_count': 1,
+            'starting_this_week_count': 1, 'recent_comment_count': 1,
+        })
+        self.assertEqual(sum(self.counts(self.outsider).values()), 0)
+
+    def test_writes_keep_the_rows_in_step_with_a_rebuild(self):
+        users = (self.owner, self.editor, self.reader, self.outsider)
+        rebuild_summaries([user.pk for user in users])
+        other = Project.objects.create(name='Gemini', description='', start_date=date(2025, 1, 1))
+        Comment.objects.create(project=other, user=self.owner, text='Before anyone joined')
+        ProjectMembership.objects.create(project=other, user=self.outsider, role='Owner')
+        Comment.objects.create(project=self.project, user=self.editor, text='Update')
+        self.comment.delete()
+        membership = ProjectMembership.objects.get(project=self.project, user=self.reader)
+        membership.role = 'Editor'
+        membership.save()
+        ProjectMembership.objects.filter(project=self.project, user=self.editor).delete()
+        self.project.start_date = timezone.localdate()
+        self.project.end_date = date(2025, 2, 1)
+        self.project.save()
+        self.assertEqual(self.summary(self.outsider).recent_comment_count, 1)
+        self.assertMatchesRebuild(*users)
+
+    def test_bulk_paths_keep_the_rows_in_step_with_a_rebuild(self):
+        users = (self.owner, self.editor, self.reader, self.outsider)
+        rebuild_summaries([user.pk for user in users])
+        self.client.force_login(self.owner)
+        self.client.post(
+            reverse('projects:project-bulk-add-users', args=[self.project.pk]),
+            {'members': 'outsider,Editor'}, **self.htmx(),
+        )
+        self.client.post(
+            reverse('projects:project-comment', args=[self.project.pk]),
+            [{'text': 'one'}, {'text': 'two'}], content_type='application/json',
+        )
+        ingestor = CommentIngestor()
+        ingestor.submit(self.project.pk, self.editor.pk, 'queued')
+        ingestor.flush()
+        self.assertEqual(self.summary(self.outsider).recent_comment_count, 4)
+        self.assertMatchesRebuild(*users)
+
+    def test_deleting_a_project_subtracts_it(self):
+        rebuild_summaries([self.owner.pk, self.reader.pk])
+        self.project.delete()
+        self.assertEqual(sum(self.counts(self.owner).values()), 0)
+        self.assertEqual(sum(self.counts(self.reader).values()), 0)
+
+    def test_dashboard_reads_one_row_and_rebuilds_stale_ones(self):
+        self.client.force_login(self.reader)
+        # Missing row: rebuilt from the source tables on first read.
+        response = self.client.get(reverse('projects:dashboard'))
+        self.assertEqual(response.context['summary'].reader_count, 1)
+        # Session, user, summary row.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('projects:dashboard'))
+        UserDashboardSummary.objects.filter(user=self.reader).update(as_of=date(2020, 1, 1), reader_count=9)
+        response = self.client.get(reverse('projects:dashboard'))
+        self.assertEqual(response.context['summary'].reader_count, 1)
+
+    def test_nightly_command_rebuilds_every_user(self):
+        out = StringIO()
+        call_command('rebuild_dashboard_summaries', '--batch-size', '3', stdout=out)
+        self.assertIn('Rebuilt 4 dashboard summaries.', out.getvalue())
+        self.assertEqual(self.summary(self.owner).owner_count, 1)
+
+
+@override_settings(**settings.PROJECTS_AUTH_PROFILES['cached'])
+class CachedAuthProfileTests(ProjectTestData):
+
+    def setUp(self):
+        super().setUp()
+        user_cache_stats.reset()
+        self.client.login(username='editor', password='pw')
+        self.url = reverse('projects:project-list')
+        self.client.get(self.url)
+
+    def test_warm_request_skips_session_and_user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        counts = classify(queries.captured_queries)
+        self.assertEqual((counts['session'], counts['user']), (0, 0))
+        self.assertEqual(user_cache_stats.snapshot(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_user_save_invalidates_the_cached_user(self):
+        self.editor.is_active = False
+        self.editor.save()
+        self.assertIsNone(cache.get(user_cache_key(self.editor.pk)))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_password_change_signs_the_session_out(self):
+        self.editor.set_password('new-pw')
+        self.editor.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_logout_drops_the_cached_user_and_session(self):
+        self.assertIsNotNone(cache.get(user_cache_key(self.editor.pk)))
+        self.client.post(reverse('logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.editor.pk)))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class ActivityCounterTests(ProjectTestData):
+
+    def assertCounters(self, members, comments):
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.member_count, project.comment_count), (members, comments))
+        self.assertGreaterEqual(project.last_activity_at, self.project.last_activity_at)
+
+    def test_every_write_path_maintains_the_counters(self):
+        self.client.force_login(self.owner)
+        self.client.post(
+            reverse('projects:project-manage-users', args=[self.project.pk]),
+            {'username': 'outsider', 'role': 'Reader'},
+        )
+        self.assertCounters(4, 1)
+        self.client.delete(reverse('projects:project-remove-user', args=[self.project.pk, self.outsider.pk]))
+        self.assertCounters(3, 1)
+        self.client.post(reverse('projects:project-comment', args=[self.project.pk]), {'text': 'Hi'})
+        self.assertCounters(3, 2)
+        self.client.post(reverse('projects:project-delete-comment', args=[self.project.pk, self.comment.pk]))
+        self.assertCounters(3, 1)
+
+    def test_new_project_counts_its_owner(self):
+        self.client.force_login(self.owner)
+        data = {'name': 'Gemini', 'description': 'Orbit', 'start_date': '2025-02-01'}
+        self.client.post(reverse('projects:project-create'), data)
+        project = Project.objects.get(name='Gemini')
+        self.assertEqual(project.member_count, 1)
+        self.assertIsNotNone(project.last_activity_at)
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        Project.objects.record_activity(self.project.pk, comments=5)
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertCounters(3, 6)
+
+    def test_repair_command_fixes_drift(self):
+        Project.objects.filter(pk=self.project.pk).update(member_count=0, comment_count=42, last_activity_at=None)
+        out = StringIO()
+        call_command('repair_project_counters', batch_size=1, stdout=out)
+        self.assertIn('Repaired 1', out.getvalue())
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.member_count, project.comment_count), (3, 1))
+        self.assertIsNotNone(project.last_activity_at)
+
+    def test_repair_dry_run_writes_nothing(self):
+        Project.objects.filter(pk=self.project.pk).update(comment_count=42)
+        call_command('repair_project_counters', dry_run=True, stdout=StringIO())
+        self.assertEqual(Project.objects.get(pk=self.project.pk).comment_count, 42)
+
+
+class MetricsTests(ProjectTestData):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_views_are_recorded_by_url_name(self):
+        self.client.force_login(self.owner)
+        self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+
+        self.owner.is_staff = True
+        self.owner.save()
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('projects_request_duration_seconds_count{view="projects:project-detail"} 2', body)
+        self.assertIn('projects_request_duration_seconds_bucket{view="projects:project-detail",le="+Inf"} 2', body)
+        # 5 queries (see ViewQueryCountTests), then 3: members and comments
+        # come from the fragment cache the second time.
+        self.assertIn('projects_sql_queries_total{view="projects:project-detail"} 8', body)
+        self.assertIn('projects_sql_duration_seconds_total{view="projects:project-detail"}', body)
+        self.assertIn('projects_role_cache_requests_total{result="hit"} 1', body)
+        self.assertIn('projects_fragment_cache_requests_total{result="hit"} 2', body)
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(PROJECTS_METRICS_ENABLED=False)
+    def test_disabled_metrics_record_nothing(self):
+        self.client.force_login(self.owner)
+        self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertNotIn('project-detail', registry.render())
+
+
+class BenchHelperTests(TestCase):
+
+    def test_seed_creates_every_role(self):
+        dataset = seed(users=8, projects=3, members_per_project=4, comments_per_project=2)
+        self.assertEqual(len(dataset.projects), 3)
+        roles = set(ProjectMembership.objects.values_list('role', flat=True))
+        self.assertEqual(roles, {'Owner', 'Editor', 'Reader'})
+        self.assertEqual(Comment.objects.count(), 6)
+        self.assertEqual(dataset.projects[0].member_count, 4)
+
+    def test_percentiles(self):
+        samples = list(range(1, 101))
+        self.assertEqual(summarize(samples), {'p50_ms': 50, 'p95_ms': 95, 'p99_ms': 99})
+
+
+class LoadTestHarnessTests(TransactionTestCase):
+
+    def test_simulated_users_drive_the_asgi_app(self):
+        from project_manager.asgi import application
+
+        dataset = seed(users=6, projects=4, members_per_project=3, comments_per_project=1)
+        users = build_users(3, dataset.users)
+        with override_settings(ALLOWED_HOSTS=['localhost']):
+            result = asyncio.run(run_load(application, users, duration=0.3, seed=1))
+        report = result.as_dict()
+        self.assertGreater(report['requests'], 0)
+        self.assertEqual(report['other_errors'], 0)
+        # Lock contention on the shared in-memory test database is reported, not hidden.
+        self.assertEqual(report['statuses'].get('500', 0), report['database_locked_errors'])
+
+
+class SQLiteProfileTests(TestCase):
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_production_profile_is_applied_to_new_connections(self):
+        # settings.py selects 'production'; the test connection was opened with it.
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_unknown_profile_is_rejected(self):
+        with self.settings(PROJECTS_SQLITE_PROFILE='turbo'), self.assertRaises(ValueError):
+            apply_sqlite_profile(sender=None, connection=connection)
+
+    def test_maintenance_command_skips_checkpoint_without_wal(self):
+        out = StringIO()
+        # The test database lives in memory, so its journal mode is 'memory'.
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('nothing to checkpoint', out.getvalue())
+        self.assertIn('SQLite maintenance finished.', out.getvalue())
+
+
+@override_settings(PROJECTS_READ_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(TestCase):
+    """
+    Routing decisions only; no replica database is needed (see
+    ReplicaReadYourWritesTests for reads from a real one).
+    """
+
+    def route(self, method, view_class, cookies=None):
+        """Runs one request through the middleware and returns where a Project read would go."""
+        routed = {}
+        request = getattr(RequestFactory(), method.lower())('/')
+        request.COOKIES.update(cookies or {})
+
+        def get_response(request):
+            middleware.process_view(request, view_class.as_view(), (), {})
+            routed['read'] = ReadReplicaRouter().db_for_read(Project)
+            routed['session'] = ReadReplicaRouter().db_for_read(Session)
+            routed['write'] = ReadReplicaRouter().db_for_write(Project)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        routed['response'] = middleware(request)
+        return routed
+
+    def test_read_only_views_read_from_a_replica(self):
+        routed = self.route('GET', ProjectDetailView)
+        self.assertIn(routed['read'], ['replica1', 'replica2'])
+        self.assertEqual(routed['write'], 'default')
+        # Sessions and users always come from the primary.
+        self.assertEqual(routed['session'], 'default')
+
+    def test_other_views_read_from_the_primary(self):
+        self.assertEqual(self.route('GET', ManageProjectUsersView)['read'], 'default')
+
+    def test_writes_are_read_from_the_primary_and_pin_the_client(self):
+        routed = self.route('POST', ProjectDetailView)
+        self.assertEqual(routed['read'], 'default')
+        self.assertIn(PIN_COOKIE, routed['response'].cookies)
+
+    def test_pinned_client_reads_its_writes_from_the_primary(self):
+        self.assertEqual(self.route('GET', ProjectListView, cookies={PIN_COOKIE: '1'})['read'], 'default')
+
+    def test_routing_ends_with_the_request(self):
+        self.route('GET', ProjectDetailView)
+        self.assertEqual(ReadReplicaRouter().db_for_read(Project), 'default')
+
+    @override_settings(PROJECTS_READ_REPLICAS=[])
+    def test_middleware_is_unused_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    """
+    Runs the app against a real second SQLite database: a snapshot of the
+    primary taken before the test writes, i.e. a replica lagging behind.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='pw')
+        project = Project.objects.create(name='Apollo', description='', start_date=date(2025, 1, 1))
+        ProjectMembership.objects.create(project=project, user=self.user, role='Owner')
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = f'{tmpdir.name}/replica.sqlite3'
+        connection.ensure_connection()
+        with sqlite3.connect(path) as replica:
+            connection.connection.backup(replica)
+        connections.settings['replica1'] = {**connection.settings_dict, 'NAME': path, 'TEST': {}}
+        self.addCleanup(self.drop_replica)
+        replicas = override_settings(PROJECTS_READ_REPLICAS=['replica1'])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def drop_replica(self):
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+
+    def project_names(self):
+        response = self.client.get(reverse('projects:project-list'))
+        return [project.name for project in response.context['projects']]
+
+    def test_pinned_client_reads_its_write_back_from_the_primary(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('projects:project-create'), {'name': 'Gemini', 'description': 'Second', 'start_date': '2025-02-01'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(sorted(self.project_names()), ['Apollo', 'Gemini'])
+        # Once the pin expires, the list is read from the lagging replica.
+        del self.client.cookies[PIN_COOKIE]
+        self.assertEqual(self.project_names(), ['Apollo'])
+
+    def test_use_primary_reads_from_the_primary(self):
+        Project.objects.create(name='Gemini', description='', start_date=date(2025, 2, 1))
+        token = reads_from_replica.set(True)
+        try:
+            self.assertFalse(Project.objects.filter(name='Gemini').exists())
+            with use_primary():
+                self.assertTrue(Project.objects.filter(name='Gemini').exists())
+        finally:
+            reads_from_replica.reset(token)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('All hot queries use an index.', out.getvalue())
+
+    def test_unindexed_lookup_is_reported_as_full_scan(self):
+        plan = explain(Project.objects.filter(name='Apollo'))
+        self.assertTrue(any(FULL_SCAN.match(line) for line in plan))
+
+
+class ViewQueryCountTests(ProjectTestData):
+    """
+    Pins the number of queries each view in `projects/urls.py` makes, so that
+    extra membership lookups or N+1 patterns show up as test failures.
+
+    Every authenticated request pays 2 queries before reaching the view: the
+    session row and the user row.
+    """
+
+    def test_signup_get(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse('projects:signup'))
+
+    def test_login_get(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse('projects:login'))
+
+    def test_logout(self):
+        self.client.force_login(self.owner)
+        # session + user, then the session row is re-read and deleted.
+        with self.assertNumQueries(4):
+            self.client.post(reverse('projects:logout'))
+
+    def test_project_list(self):
+        self.client.force_login(self.owner)
+        # session + user + ETag aggregate + projects
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('projects:project-list'))
+        self.assertContains(response, 'Apollo')
+
+    def test_project_detail(self):
+        self.client.force_login(self.owner)
+        # session + user + membership/project + members + first comment page
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_update_get(self):
+        self.client.force_login(self.editor)
+        # session + user + membership/project
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('projects:project-update', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_update_post(self):
+        self.client.force_login(self.editor)
+        data = {'name': 'Apollo 11', 'description': 'Moon', 'start_date': '2025-01-01'}
+        # session + user + membership/project + old dates for the dashboard
+        # summaries + UPDATE (inside a savepoint)
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('projects:project-update', args=[self.project.pk]), data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_project_delete_get(self):
+        self.client.force_login(self.owner)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('projects:project-delete', args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_manage_users_get(self):
+        self.client.force_login(self.owner)
+        # session + user + membership/project + members
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('projects:project-manage-users', args=[self.project.pk]))
+        self.assertContains(response, 'editor')
+
+    def test_manage_users_post_htmx(self):
+        self.client.force_login(self.owner)
+        # Counter UPDATE, dashboard UPDATE and INSERT share a transaction (a
+        # savepoint in tests).
+        with self.assertNumQueries(12):
+            response = self.client.post(
+                reverse('projects:project-manage-users', args=[self.project.pk]),
+                {'username': 'outsider', 'role': 'Reader'},
+                **self.htmx(),
+            )
+        self.assertContains(response, 'outsider')
+
+    def test_project_create_get_htmx(self):
+        self.client.force_login(self.owner)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('projects:project-create'), **self.htmx())
+
+    def test_project_create_post_htmx(self):
+        self.client.force_login(self.owner)
+        data = {'name': 'Gemini', 'description': 'Orbit', 'start_date': '2025-02-01'}
+        # session + user + savepoint + INSERT project + INSERT membership
+        # + dashboard UPDATE + release + projects
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse('projects:project-create'), data, **self.htmx())
+        self.assertContains(response, 'Gemini')
+
+    def test_remove_user(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-remove-user', args=[self.project.pk, self.reader.pk])
+        # session + user + caller's membership + target membership + DELETE
+        # + dashboard + counters
+        with self.assertNumQueries(9):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ProjectMembership.objects.filter(project=self.project, user=self.reader).exists())
+
+    def test_comment_on_project(self):
+        self.client.force_login(self.editor)
+        # session + user + membership/project + INSERT comment + dashboard
+        # + counters
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                reverse('projects:project-comment', args=[self.project.pk]), {'text': 'Nice'}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_delete_comment(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-delete-comment', args=[self.project.pk, self.comment.pk])
+        # Includes one dashboard UPDATE.
+        with self.assertNumQueries(9):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Comment.objects.filter(pk=self.comment.pk).exists())
@@ -0,0 +1,447 @@
+"""
+Streaming export and batched import of projects, memberships and comments.
+
+Both directions work on flat records, one per project, membership or
+comment, with the keys in FIELDS. Projects are referred to by their id in
+the exporting database and users by username:
+
+    {"type": "project", "project": 7, "name": "Apollo", "description": "...",
+     "start_date": "2025-01-01", "end_date": null, "created_at": "..."}
+    {"type": "membership", "project": 7, "username": "jane", "role": "Owner"}
+    {"type": "comment", "project": 7, "username": "jane", "text": "...",
+     "created_at": "..."}
+
+`export_records` reads the tables with `values_list().iterator(chunk_size=...)`
+so memory use does not depend on the amount of data; `stream_ndjson` and
+`stream_csv` turn the records into lines for a StreamingHttpResponse or a
+file. All projects come first, then memberships, then comments, which is the
+order `Importer` needs. `stream_comment_history` streams one project's
+comments as a single JSON document for incremental pulls. Under ASGI a sync
+iterator would be read whole before the first byte is sent, so the views use
+the async counterparts (`astream_export`, `astream_comment_history`), which
+fetch one keyset chunk at a time in sync_to_async.
+
+`Importer` validates records as they arrive and writes them with bulk_create
+in batches of `batch_size`, each batch in its own transaction. Invalid
+records are skipped and reported with their line number. Projects always get
+new ids; the importer maps the exported ids to them.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .access import invalidate_role
+from .dashboard import rebuild_summaries
+from .events import COMMENTS, MEMBERS, publish_project_event
+from .fragments import bump_fragment_version
+from .models import Comment, Project, ProjectMembership
+from .pagination import encode_cursor, filter_after_values
+
+FIELDS = ['type', 'project', 'name', 'description', 'start_date', 'end_date', 'username', 'role', 'text', 'created_at']
+FORMATS = ('ndjson', 'csv')
+TEXT_KEYS = ('type', 'name', 'description', 'username', 'role', 'text')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _project_record(pk, name, description, start_date, end_date, created_at):
+    return {
+        'type': 'project', 'project': pk, 'name': name, 'description': description,
+        'start_date': start_date.isoformat(), 'end_date': end_date.isoformat() if end_date else None,
+        'created_at': created_at.isoformat(),
+    }
+
+
+def _membership_record(pk, project_id, username, role):
+    return {'type': 'membership', 'project': project_id, 'username': username, 'role': role}
+
+
+def _comment_record(pk, project_id, username, text, created_at):
+    return {
+        'type': 'comment', 'project': project_id, 'username': username, 'text': text,
+        'created_at': created_at.isoformat(),
+    }
+
+
+def _export_tables(projects):
+    """The rows (values_list querysets, pk first) and record builder of each table, in export order."""
+    project_ids = projects.values('pk')
+    return [
+        (projects.values_list('pk', 'name', 'description', 'start_date', 'end_date', 'created_at'),
+         _project_record),
+        (ProjectMembership.objects.filter(project__in=project_ids)
+         .values_list('pk', 'project_id', 'user__username', 'role'), _membership_record),
+        (Comment.objects.filter(project__in=project_ids)
+         .values_list('pk', 'project_id', 'user__username', 'text', 'created_at'), _comment_record),
+    ]
+
+
+def export_records(projects, chunk_size=2000):
+    """Yields the records of `projects` (a Project queryset) and their memberships and comments."""
+    for rows, to_record in _export_tables(projects):
+        for row in rows.order_by('pk').iterator(chunk_size=chunk_size):
+            yield to_record(*row)
+
+
+def _read_chunk(rows, keys, last, chunk_size):
+    if last is not None:
+        rows = filter_after_values(rows, last, keys, descending=False)
+    return list(rows[:chunk_size])
+
+
+async def aread_chunks(rows, keys, chunk_size):
+    """
+    Yields the rows of `rows` (a values_list queryset whose first fields are
+    `keys`) in lists of up to `chunk_size`, ordered by `keys`. Each list is
+    fetched by its own keyset query in sync_to_async, so an ASGI response can
+    stream them without holding a cursor open between chunks.
+    """
+    rows = rows.order_by(*keys)
+    last = None
+    while True:
+        chunk = await sync_to_async(_read_chunk)(rows, keys, last, chunk_size)
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1][:len(keys)]
+
+
+async def aexport_records(projects, chunk_size=2000):
+    """Async counterpart of `export_records`, reading each table with `aread_chunks`."""
+    for rows, to_record in _export_tables(projects):
+        async for chunk in aread_chunks(rows, ('pk',), chunk_size):
+            for row in chunk:
+                yield to_record(*row)
+
+
+def stream_ndjson(records):
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(records):
+    writer = csv.DictWriter(_Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def stream_export(projects, fmt, chunk_size=2000):
+    records = export_records(projects, chunk_size)
+    return stream_csv(records) if fmt == 'csv' else stream_ndjson(records)
+
+async def astream_export(projects, fmt, chunk_size=2000):
+    """Async counterpart of `stream_export`, for StreamingHttpResponse under ASGI."""
+    records = aexport_records(projects, chunk_size)
+    if fmt == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=FIELDS)
+        yield writer.writeheader()
+        async for record in records:
+            yield writer.writerow(record)
+    else:
+        async for record in records:
+            yield json.dumps(record) + '\n'
+
+
+HISTORY_KEYS = ('created_at', 'id')
+
+
+def _history_rows(comments):
+    return comments.values_list(*HISTORY_KEYS, 'user__username', 'text')
+
+
+def _encode_history(rows):
+    return ',\n'.join(
+        json.dumps({'id': pk, 'username': username, 'text': text, 'created_at': created_at.isoformat()})
+        for created_at, pk, username, text in rows
+    )
+
+
+def _history_head(project_id):
+    return f'{{"project": {json.dumps(project_id)}, "comments": ['
+
+
+def _history_tail(last, since):
+    return f'\n], "since": {json.dumps(encode_cursor(last) if last else since)}}}\n'
+
+
+def stream_comment_history(comments, project_id, since=None, chunk_size=2000):
+    """
+    Streams `comments` (a Comment queryset, already filtered to the rows
+    after `since`) oldest first as one JSON document:
+
+        {"project": 7, "comments": [
+        {"id": 1, "username": "jane", "text": "...", "created_at": "..."},
+        ...
+        ], "since": "<cursor>"}
+
+    Rows are read as tuples with `values_list().iterator()` and encoded
+    `chunk_size` at a time, so no model instances are built and memory use
+    does not grow with the number of comments. `since` at the end is the
+    cursor to pass back for the comments added after this response (the
+    given `since` again if there were none).
+    """
+    rows = _history_rows(comments).order_by(*HISTORY_KEYS).iterator(chunk_size=chunk_size)
+    yield _history_head(project_id)
+    separator, last = '\n', None
+    while chunk := list(islice(rows, chunk_size)):
+        yield separator + _encode_history(chunk)
+        separator, last = ',\n', chunk[-1][:2]
+    yield _history_tail(last, since)
+
+
+async def astream_comment_history(comments, project_id, since=None, chunk_size=2000):
+    """
+    Async counterpart of `stream_comment_history` for ASGI, producing the
+    same document with one keyset query per chunk (see `aread_chunks`).
+    """
+    yield _history_head(project_id)
+    separator, last = '\n', None
+    async for chunk in aread_chunks(_history_rows(comments), HISTORY_KEYS, chunk_size):
+        yield separator + _encode_history(chunk)
+        separator, last = ',\n', chunk[-1][:2]
+    yield _history_tail(last, since)
+
+
+def read_records(lines, fmt):
+    """
+    Yields (line number, record) from an iterable of text lines. Lines that
+    cannot be parsed yield a record of None.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Empty CSV cells mean "no value", like null in NDJSON.
+            yield reader.line_num, {key: value or None for key, value in record.items()}
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+class InvalidRecord(Exception):
+    """A record that fails validation."""
+
+
+class Importer:
+    """
+    Imports records in batches.
+
+    - `batch_size`: Records written per bulk_create/transaction.
+    - `into_project`: If given, project records are skipped and every
+      membership and comment is added to this project instead (the per-project
+      import of the owner views). Otherwise each project record creates a new
+      project. Imports into a project cannot add Owners, and their comments
+      must be written by members of the project.
+
+    Feed it with `run(records)`; afterwards `created` counts the imported rows
+    per type, `existing` the memberships that were already there, and
+    `errors` lists (line, message) of the skipped records.
+    """
+
+    # Roles that may be imported into an existing project.
+    MEMBER_ROLES = ('Editor', 'Reader')
+
+    def __init__(self, batch_size=500, into_project=None):
+        self.batch_size = batch_size
+        self.into_project = into_project
+        self.project_ids = {}
+        self.created = {'project': 0, 'membership': 0, 'comment': 0}
+        self.existing = 0
+        self.errors = []
+        self._batch = []
+        self._touched = set()
+
+    def run(self, numbered_records):
+        for line, record in numbered_records:
+            try:
+                self._batch.append(self.validate(record))
+            except InvalidRecord as exc:
+                self.errors.append((line, str(exc)))
+                continue
+            self._batch[-1]['line'] = line
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+        if self._touched:
+            Project.objects.filter(pk__in=self._touched).recount_counters()
+            rebuild_summaries(
+                ProjectMembership.objects.filter(project__in=self._touched).values_list('user_id', flat=True).distinct()
+            )
+            for project_id in self._touched:
+                bump_fragment_version(project_id)
+                publish_project_event(project_id, MEMBERS)
+                publish_project_event(project_id, COMMENTS)
+        return self
+
+    def validate(self, record):
+        if record is None:
+            raise InvalidRecord('Not a valid record.')
+        for key in TEXT_KEYS:
+            # JSON can hold any type here; CSV cells are always strings.
+            if record.get(key) is not None and not isinstance(record[key], str):
+                raise InvalidRecord(f'Invalid {key} {record[key]!r}.')
+        kind = record.get('type')
+        if kind not in self.created:
+            raise InvalidRecord(f"Unknown record type {kind!r}.")
+        if kind == 'project' and self.into_project is not None:
+            return record
+        try:
+            record['project'] = int(record.get('project'))
+        except (TypeError, ValueError):
+            raise InvalidRecord('Missing or invalid project id.')
+        if kind == 'project':
+            if not record.get('name'):
+                raise InvalidRecord('A project needs a name.')
+            if len(record['name']) > Project._meta.get_field('name').max_length:
+                raise InvalidRecord('The project name is too long.')
+            for key in ('start_date', 'end_date'):
+                value = record.get(key)
+                record[key] = _parse(parse_date, value, key) if value else None
+            if record['start_date'] is None:
+                raise InvalidRecord('A project needs a start_date.')
+        else:
+            if not record.get('username'):
+                raise InvalidRecord('Missing username.')
+        if kind == 'membership':
+            if record.get('role') not in dict(ProjectMembership.ROLE_CHOICES):
+                raise InvalidRecord(f"Invalid role {record.get('role')!r}.")
+            if self.into_project is not None and record['role'] not in self.MEMBER_ROLES:
+                # Like the other owner views: owners are never added to an existing project.
+                raise InvalidRecord(f"Role {record['role']!r} cannot be imported into an existing project.")
+        if kind == 'comment' and not record.get('text'):
+            raise InvalidRecord('A comment needs a text.')
+        if record.get('created_at'):
+            record['created_at'] = _parse(parse_datetime, record['created_at'], 'created_at')
+        return record
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        users = dict(
+            User.objects.filter(username__in={r['username'] for r in batch if r.get('username')})
+            .values_list('username', 'pk')
+        )
+        with transaction.atomic():
+            self._create_projects([r for r in batch if r['type'] == 'project'])
+            memberships = self._new_memberships(self._resolve([r for r in batch if r['type'] == 'membership'], users))
+            # ignore_conflicts: a membership added concurrently is skipped
+            # instead of failing the batch; the counters are recounted at the end.
+            ProjectMembership.objects.bulk_create(memberships, ignore_conflicts=True)
+            self.created['membership'] += len(memberships)
+            if self.into_project is not None:
+                # bulk_create sends no signals; existing projects may have cached roles.
+                for membership in memberships:
+                    invalidate_role(membership.user_id, membership.project_id)
+            comments = self._resolve([r for r in batch if r['type'] == 'comment'], users)
+            if self.into_project is not None:
+                comments = self._by_members(comments)
+            objs = Comment.objects.bulk_create(
+                [Comment(project_id=p, user_id=u, text=r['text']) for r, p, u in comments]
+            )
+            # auto_now_add overrides created_at on insert; restore the exported times.
+            dated = []
+            for obj, (record, _, _) in zip(objs, comments):
+                if record.get('created_at'):
+                    obj.created_at = record['created_at']
+                    dated.append(obj)
+            Comment.objects.bulk_update(dated, ['created_at'])
+            self.created['comment'] += len(objs)
+
+    def _create_projects(self, records):
+        if self.into_project is not None or not records:
+            return
+        objs = Project.objects.bulk_create([
+            Project(name=r['name'], description=r.get('description') or '',
+                    start_date=r['start_date'], end_date=r['end_date'])
+            for r in records
+        ])
+        dated = []
+        for obj, record in zip(objs, records):
+            self.project_ids[record['project']] = obj.pk
+            if record.get('created_at'):
+                obj.created_at = record['created_at']
+                dated.append(obj)
+        Project.objects.bulk_update(dated, ['created_at'])
+        self._touched.update(obj.pk for obj in objs)
+        self.created['project'] += len(objs)
+
+    def _new_memberships(self, resolved):
+        """Builds the memberships that do not exist yet, counting the others in `existing`."""
+        existing = set(
+            ProjectMembership.objects.filter(
+                project_id__in={p for _, p, _ in resolved}, user_id__in={u for _, _, u in resolved},
+            ).values_list('project_id', 'user_id')
+        ) if resolved else set()
+        memberships = []
+        for record, project_id, user_id in resolved:
+            if (project_id, user_id) in existing:
+                self.existing += 1
+                continue
+            existing.add((project_id, user_id))
+            memberships.append(ProjectMembership(project_id=project_id, user_id=user_id, role=record['role']))
+        return memberships
+
+    def _by_members(self, resolved):
+        """
+        Keeps the comments whose author is a member of `into_project`,
+        including members added earlier in this import.
+        """
+        members = set(
+            ProjectMembership.objects.filter(
+                project=self.into_project, user_id__in={u for _, _, u in resolved},
+            ).values_list('user_id', flat=True)
+        ) if resolved else set()
+        kept = []
+        for record, project_id, user_id in resolved:
+            if user_id in members:
+                kept.append((record, project_id, user_id))
+            else:
+                self.errors.append((record['line'], f"User {record['username']!r} is not a member of this project."))
+        return kept
+
+    def _resolve(self, records, users):
+        """Returns (record, project id, user id) for records whose project and user exist."""
+        resolved = []
+        for record in records:
+            if self.into_project is not None:
+                project_id = self.into_project.pk
+            else:
+                project_id = self.project_ids.get(record['project'])
+            user_id = users.get(record['username'])
+            if project_id is None:
+                self.errors.append((record['line'], f"Project {record['project']} is not part of this import."))
+            elif user_id is None:
+                self.errors.append((record['line'], f"Unknown user {record['username']!r}."))
+            else:
+                resolved.append((record, project_id, user_id))
+                self._touched.add(project_id)
+        return resolved
+
+
+def _parse(parser, value, key):
+    try:
+        parsed = parser(value) if isinstance(value, str) else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidRecord(f'Invalid {key} {value!r}.')
+    return parsed
@@ -1,8 +1,10 @@
 from django.urls import path
+from .api import ProjectCommentHistoryApiView, ProjectCommentsApiView, ProjectDetailApiView, ProjectListApiView, ProjectMembersApiView
 from .views import (
-    ManageProjectUsersView, RemoveUserFromProjectView, signup_view, UserLoginView, UserLogoutView, 
+    ManageProjectUsersView, BulkAddProjectUsersView, RemoveUserFromProjectView, ProjectExportView, ProjectImportView, signup_view, UserLoginView, UserLogoutView, 
     ProjectListView, ProjectDetailView, ProjectCreateView, 
-    ProjectUpdateView, ProjectDeleteView, CommentOnProject, DeleteComment
+    ProjectUpdateView, ProjectDeleteView, CommentOnProject, DeleteComment,
+    ProjectCommentFeedView, ProjectEventStreamView, DashboardView, ProjectSearchView, AsyncProjectListView, AsyncProjectDetailView, AsyncProjectCommentFeedView,
 )
 
 app_name = 'projects'
@@ -16,8 +18,25 @@ urlpatterns = [
     path('projects/<int:pk>/update/', ProjectUpdateView.as_view(), name='project-update'),
     path('projects/<int:pk>/delete/', ProjectDeleteView.as_view(), name='project-delete'),
     path('projects/<int:pk>/manage/', ManageProjectUsersView.as_view(), name='project-manage-users'),
+    path('projects/<int:pk>/manage/bulk/', BulkAddProjectUsersView.as_view(), name='project-bulk-add-users'),
+    path('projects/<int:pk>/export/', ProjectExportView.as_view(), name='project-export'),
+    path('projects/<int:pk>/import/', ProjectImportView.as_view(), name='project-import'),
     path('create/', ProjectCreateView.as_view(), name='project-create'),
     path('<int:project_pk>/remove_user/<int:user_pk>/', RemoveUserFromProjectView.as_view(), name='project-remove-user'),
     path('projects/<int:pk>/comment/', CommentOnProject.as_view(), name='project-comment'),
+    path('projects/<int:pk>/comments/', ProjectCommentFeedView.as_view(), name='project-comments'),
     path('projects/<int:pk>/delete_comment/<int:comment_pk>/', DeleteComment.as_view(), name='project-delete-comment'),
+    path('projects/<int:pk>/events/', ProjectEventStreamView.as_view(), name='project-events'),
+    path('search/', ProjectSearchView.as_view(), name='project-search'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    # Read-only JSON API (see projects.api).
+    path('api/projects/', ProjectListApiView.as_view(), name='api-project-list'),
+    path('api/projects/<int:pk>/', ProjectDetailApiView.as_view(), name='api-project-detail'),
+    path('api/projects/<int:pk>/members/', ProjectMembersApiView.as_view(), name='api-project-members'),
+    path('api/projects/<int:pk>/comments/', ProjectCommentsApiView.as_view(), name='api-project-comments'),
+    path('api/projects/<int:pk>/comments/history/', ProjectCommentHistoryApiView.as_view(), name='api-project-comment-history'),
+    # Native async variants of the read views (see the ASGI entry point).
+    path('async/', AsyncProjectListView.as_view(), name='project-list-async'),
+    path('async/projects/<int:pk>/', AsyncProjectDetailView.as_view(), name='project-detail-async'),
+    path('async/projects/<int:pk>/comments/', AsyncProjectCommentFeedView.as_view(), name='project-comments-async'),
 ]
\ No newline at end of file
@@ -1,5 +1,19 @@
+import asyncio
+import codecs
+import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.shortcuts import get_object_or_404, render, redirect
-from django.urls import reverse_lazy
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.contrib.auth import login
 from django.contrib.auth.views import LoginView, LogoutView
 from django.views import View
@@ -9,15 +23,29 @@ from django.http import JsonResponse
 from rest_framework import status, permissions
 from .models import Comment, Project
 from .serializers import CommentSerializer
-from .forms import UserSignUpForm, AddUserToProjectForm, ProjectForm, UserLoginForm
+from .forms import UserSignUpForm, AddUserToProjectForm, BulkAddUsersToProjectForm, ProjectForm, UserLoginForm
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from .models import Project, ProjectMembership  
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, HttpResponseForbidden, Http404
-from django.core.exceptions import PermissionDenied
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponse, HttpResponseForbidden, Http404, StreamingHttpResponse
+from django.core.exceptions import BadRequest, PermissionDenied
 from django.contrib import messages
 from django.contrib.auth.models import User
 from .models import Comment, ProjectMembership
+from .conditional import project_etag, project_last_modified, project_list_etag, project_list_last_modified
+from .access import aget_project_access, aget_request_user, get_project_access
+from .dashboard import add_comments, get_dashboard_summary
+from .events import COMMENTS, MEMBERS, format_event, get_broker, publish_project_event
+from .fragments import bump_fragment_version
+from .ingest import get_comment_ingestor
+from .members import bulk_add_members
+from .pagination import apaginate_keyset, paginate_keyset
+from .search import search
+from .transfer import CONTENT_TYPES, FORMATS, Importer, astream_export, read_records, stream_export
+
+logger = logging.getLogger(__name__)
+
 
 class UserRoleRequiredMixin:
     """
@@ -26,11 +54,14 @@ class UserRoleRequiredMixin:
     How it works:
     1. It looks for a `required_roles` list in the View it's attached to.
     2. It gets the project's primary key (pk) from the URL.
-    3. It tries to find a ProjectMembership for the current user and project.
-       - If none is found -> Raise Http404 (user isn't a member).
+    3. It resolves the current user's access to that project once per request
+       (see `projects.access.get_project_access`).
+       - If the user isn't a member -> Raise Http404.
     4. If membership is found, it checks if the user's role is in `required_roles`.
        - If the role is not allowed -> Raise PermissionDenied (403 Forbidden).
-    5. If all checks pass, the view proceeds as normal.
+    5. If all checks pass, the view proceeds as normal. The resolved access is
+       available as `request.project_access`, and `get_project()` returns the
+       project without another query.
     """
     required_roles = []
 
@@ -38,21 +69,31 @@ class UserRoleRequiredMixin:
         project_pk = kwargs.get('pk') or kwargs.get('project_pk')
         if not project_pk:
             raise ValueError("View using UserRoleRequiredMixin is missing 'pk' or 'project_pk' in its URL pattern.")
-            
-        try:
-            membership = ProjectMembership.objects.get(
-                project__pk=project_pk, 
-                user=request.user
-            )
-        except ProjectMembership.DoesNotExist:
+
+        if not request.user.is_authenticated:
+            # Leave the redirect to the login page to LoginRequiredMixin.
+            return super().dispatch(request, *args, **kwargs)
+
+        access = get_project_access(request, project_pk)
+        if access is None:
             raise Http404
 
-        if membership.role not in self.required_roles:
+        if not access.has_role(self.required_roles):
             raise PermissionDenied
 
         # If all checks pass, proceed to the actual view (e.g., the delete method)
         return super().dispatch(request, *args, **kwargs)
 
+    def get_project(self):
+        """Returns the project resolved during dispatch."""
+        return self.request.project_access.project
+
+    def get_object(self, queryset=None):
+        """Lets detail/update/delete views reuse the already loaded project."""
+        if queryset is None:
+            return self.get_project()
+        return super().get_object(queryset)
+
 def signup_view(request):
     """
     Handles user registration.
@@ -97,51 +138,103 @@ class UserLogoutView(LogoutView):
     """
     next_page = reverse_lazy('login')
 
-class ProjectListView(LoginRequiredMixin, ListView):
+def get_project_page(request, cursor=None):
     """
-    Displays a list of projects.
-    - Uses Django's ListView to automatically handle the retrieval and display of project objects.
-    - The template will be 'projects/project_list.html'.
+    Returns one keyset-paginated page of the projects `request.user` is a
+    member of, newest first. `cursor` comes from the previous page's
+    `next_cursor`; a malformed cursor is answered with 400 Bad Request.
     """
-    model = Project
-    template_name = 'projects/project_list.html'
-    context_object_name = 'projects'
+    try:
+        return paginate_keyset(
+            Project.objects.for_member(request.user),
+            cursor,
+            settings.PROJECTS_PAGE_SIZE,
+            keys=('updated_at', 'id'),
+        )
+    except ValueError:
+        raise BadRequest('Invalid cursor.')
 
+
+def get_comment_page(project, cursor=None):
+    """
+    Returns one keyset-paginated page of a project's comments, newest first,
+    with their authors loaded by the same query.
+    """
+    try:
+        return paginate_keyset(
+            project.comments.select_related('user'),
+            cursor,
+            settings.PROJECTS_COMMENT_PAGE_SIZE,
+            keys=('created_at', 'id'),
+        )
+    except ValueError:
+        raise BadRequest('Invalid cursor.')
+
+
+# Conditional GET for the read views: a revalidation that matches answers 304
+# without rendering. Responses are private because they depend on the user and
+# role, and must be revalidated each time (see `projects.conditional`).
+conditional_project_page = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=project_etag, last_modified_func=project_last_modified),
+]
+conditional_project_list = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=project_list_etag, last_modified_func=project_list_last_modified),
+]
+
+
+@method_decorator(conditional_project_list, name='get')
 class ProjectListView(LoginRequiredMixin, ListView):
+    """
+    Displays a list of projects.
+    - Only projects the user is a member of are listed, annotated with the
+      user's role in each of them.
+    - The list is cursor-paginated on (updated_at, id). The first page is
+      rendered with the full page; every following page is an HTMX request
+      carrying `?cursor=`, answered with just the next rows.
+    """
     model = Project
     template_name = 'projects/project_list.html'
     context_object_name = 'projects'
+    read_replica = True
 
     def get_queryset(self):
         """
         Returns a queryset of projects where the currently logged-in user
-        is a member.
+        is a member, annotated with the user's role in each of them.
         """
-        return Project.objects.filter(members=self.request.user).order_by('-updated_at')
+        return Project.objects.for_member(self.request.user)
+
+    def get_template_names(self):
+        if self.request.htmx and 'cursor' in self.request.GET:
+            return ['projects/_project_list_page.html']
+        if self.request.htmx:
+            return ['projects/_project_list_partial.html']
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        page = get_project_page(self.request, self.request.GET.get('cursor'))
+        context = super().get_context_data(object_list=page.items, **kwargs)
+        context['page'] = page
+        return context
 
-class ProjectDetailView(LoginRequiredMixin, DetailView):
+@method_decorator(conditional_project_page, name='get')
+class ProjectDetailView(LoginRequiredMixin, UserRoleRequiredMixin, DetailView):
     """
     Displays the details of a single project.
     """
     model = Project
     template_name = 'projects/project_detail.html'
-
-    def get_queryset(self):
-        return Project.objects.filter(members=self.request.user)
+    required_roles = ['Owner', 'Editor', 'Reader']
+    read_replica = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = self.get_object()
-        
-        try:
-            membership = ProjectMembership.objects.get(
-                project=project,
-                user=self.request.user
-            )
-            context['user_role'] = membership.role
-        except ProjectMembership.DoesNotExist:
-            context['user_role'] = None
-            
+        # `user_role` comes from the `project_access` context processor.
+        # Both are lazy, so a fragment cache hit in the template skips their queries.
+        context['members'] = self.object.memberships.select_related('user').order_by('user__username')
+        context['comment_page'] = SimpleLazyObject(lambda: get_comment_page(self.object))
         return context
     
 class ProjectCreateView(LoginRequiredMixin, CreateView):
@@ -165,23 +258,26 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
         """
         This method is called when valid form data has been POSTed.
         """
-        self.object = form.save()
-        ProjectMembership.objects.create(
-            project=self.object,
-            user=self.request.user,
-            role='Owner'
-        )
+        with transaction.atomic():
+            # The creator becomes the only member, so the counter starts at 1.
+            form.instance.member_count = 1
+            self.object = form.save()
+            ProjectMembership.objects.create(
+                project=self.object,
+                user=self.request.user,
+                role='Owner'
+            )
         
         if self.request.htmx:
-            projects = Project.objects.filter(members=self.request.user).order_by('-updated_at')
-            return render(self.request, 'projects/_project_list_partial.html', {'projects': projects})
+            page = get_project_page(self.request)
+            return render(self.request, 'projects/_project_list_partial.html', {'projects': page.items, 'page': page})
 
         return redirect(self.get_success_url())
 
     def get_success_url(self):
-        return reverse_lazy('project-list')
+        return reverse_lazy('projects:project-list')
 
-class ProjectUpdateView(LoginRequiredMixin, UpdateView):
+class ProjectUpdateView(LoginRequiredMixin, UserRoleRequiredMixin, UpdateView):
     """
     Displays a form to edit an existing project.
     """
@@ -219,15 +315,15 @@ class ManageProjectUsersView(LoginRequiredMixin, UserRoleRequiredMixin, View):
 
     def get(self, request, pk):
         """Handles GET requests: Displays the page with user list and add form."""
-        project = get_object_or_404(Project, pk=pk)
-        members = ProjectMembership.objects.filter(project=project).order_by('user__username')
+        project = self.get_project()
+        members = ProjectMembership.objects.filter(project=project).select_related('user').order_by('user__username')
         form = AddUserToProjectForm()
-        context = {'project': project, 'members': members, 'form': form}
+        context = {'project': project, 'members': members, 'form': form, 'bulk_form': BulkAddUsersToProjectForm()}
         return render(request, self.template_name, context)
 
     def post(self, request, pk):
         """Handles POST requests: Processes the form to add a new user."""
-        project = get_object_or_404(Project, pk=pk)
+        project = self.get_project()
         form = AddUserToProjectForm(request.POST)
 
         if form.is_valid():
@@ -238,52 +334,138 @@ class ManageProjectUsersView(LoginRequiredMixin, UserRoleRequiredMixin, View):
             if ProjectMembership.objects.filter(project=project, user=user_to_add).exists():
                 messages.error(request, f"User '{username}' is already a member of this project.")
             else:
-                ProjectMembership.objects.create(project=project, user=user_to_add, role=role)
+                with transaction.atomic():
+                    ProjectMembership.objects.create(project=project, user=user_to_add, role=role)
+                    Project.objects.record_activity(project.pk, members=1)
 
             if request.htmx:
-                members = ProjectMembership.objects.filter(project=project).order_by('user__username')
+                members = ProjectMembership.objects.filter(project=project).select_related('user').order_by('user__username')
                 return render(request, 'projects/_member_list_partial.html', {'project': project, 'members': members})
             
             return redirect('projects:project-manage-users', pk=project.pk)
         
-        members = ProjectMembership.objects.filter(project=project).order_by('user__username')
-        context = {'project': project, 'members': members, 'form': form}
+        members = ProjectMembership.objects.filter(project=project).select_related('user').order_by('user__username')
+        context = {'project': project, 'members': members, 'form': form, 'bulk_form': BulkAddUsersToProjectForm()}
         return render(request, self.template_name, context)
 
 
-class RemoveUserFromProjectView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+class BulkAddProjectUsersView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+    """
+    Adds many users to a project in one request (see `projects.members`).
+    The HTMX response replaces `#member-list-body` with one result row per
+    submitted line followed by the refreshed member list.
+    """
     required_roles = ['Owner']
 
-    def dispatch(self, request, *args, **kwargs):
-        project_pk = kwargs.get('project_pk')
-        membership = get_object_or_404(ProjectMembership, project__pk=project_pk, user=request.user)
-        if membership.role not in self.required_roles:
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
+    def post(self, request, pk):
+        project = self.get_project()
+        form = BulkAddUsersToProjectForm(request.POST, request.FILES)
+        results = bulk_add_members(project, form.cleaned_data['rows']) if form.is_valid() else []
+
+        if request.htmx:
+            members = ProjectMembership.objects.filter(project=project).select_related('user').order_by('user__username')
+            context = {'project': project, 'members': members, 'results': results, 'bulk_form': form}
+            return render(request, 'projects/_bulk_add_results.html', context)
+
+        if not form.is_valid():
+            for error in form.non_field_errors():
+                messages.error(request, error)
+        else:
+            added = sum(result.ok for result in results)
+            messages.success(request, f"Added {added} of {len(results)} users.")
+            for result in results:
+                if not result.ok:
+                    messages.warning(request, f"Line {result.line}: '{result.username}' not added ({result.status}).")
+        return redirect('projects:project-manage-users', pk=project.pk)
+
+
+class ProjectExportView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+    """
+    Streams the project with its memberships and comments as NDJSON
+    (default) or CSV (`?format=csv`), without loading it into memory.
+    """
+    required_roles = ['Owner']
+
+    def get(self, request, pk):
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in FORMATS:
+            raise BadRequest('Unknown export format.')
+        # Under ASGI a sync iterator would be read whole before sending.
+        stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(stream(Project.objects.filter(pk=pk), fmt), content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="project-{pk}.{fmt}"'
+        return response
+
+
+class ProjectImportView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+    """
+    Imports the memberships and comments of an exported file into this
+    project, in batches of PROJECTS_IMPORT_BATCH_SIZE. Project records in
+    the file are ignored.
+    """
+    required_roles = ['Owner']
+
+    def post(self, request, pk):
+        project = self.get_project()
+        upload = request.FILES.get('file')
+        fmt = request.POST.get('format', 'ndjson')
+        if upload is None or fmt not in FORMATS:
+            messages.error(request, 'Choose an NDJSON or CSV file to import.')
+            return redirect('projects:project-manage-users', pk=pk)
+
+        lines = codecs.iterdecode(upload, 'utf-8-sig')
+        importer = Importer(settings.PROJECTS_IMPORT_BATCH_SIZE, into_project=project)
+        try:
+            importer.run(read_records(lines, fmt))
+        except UnicodeDecodeError:
+            messages.error(request, 'The file must be UTF-8 encoded.')
+            return redirect('projects:project-manage-users', pk=pk)
+
+        messages.success(
+            request,
+            f"Imported {importer.created['membership']} members and {importer.created['comment']} comments.",
+        )
+        for line, error in importer.errors[:20]:
+            messages.warning(request, f'Line {line}: {error}')
+        if len(importer.errors) > 20:
+            messages.warning(request, f'... and {len(importer.errors) - 20} more skipped lines.')
+        return redirect('projects:project-manage-users', pk=pk)
+
+
+class RemoveUserFromProjectView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+    required_roles = ['Owner']
 
     def delete(self, request, project_pk, user_pk):
-        project = get_object_or_404(Project, pk=project_pk)
-        user_to_remove = get_object_or_404(User, pk=user_pk)
-        
+        # The owner check already happened in UserRoleRequiredMixin; a single
+        # lookup is enough to find the membership being removed.
         membership = get_object_or_404(
-            ProjectMembership, project=project, user=user_to_remove
+            ProjectMembership, project__pk=project_pk, user__pk=user_pk
         )
         
         if membership.role == 'Owner':
             return HttpResponse("Cannot remove the project owner.", status=400)
 
-        membership.delete()
+        with transaction.atomic():
+            # Only count the row if this request actually deleted it; a
+            # concurrent request may have removed it first.
+            deleted, _ = membership.delete()
+            if deleted:
+                Project.objects.record_activity(project_pk, members=-1)
         
         return HttpResponse(status=200)
     
 class CommentOnProject(UserRoleRequiredMixin, LoginRequiredMixin, View):
     """
     Allows users to comment on a project.
+    - HTMX requests get the refreshed first page of the comment feed back.
+    - Other clients (e.g. JSON API calls) get the created comment as JSON.
+    - A JSON array creates many comments in one go (see `post_many`).
+    - With PROJECTS_COMMENT_INGEST the comment is written by the batching
+      ingestor (see `projects.ingest`) instead of its own transaction.
     """
 
     required_roles = ['Owner', 'Editor']
     def post(self, request, pk):
-        project = Project.objects.get(pk=pk)
         if request.content_type == 'application/json':
             import json
             try:
@@ -292,31 +474,322 @@ class CommentOnProject(UserRoleRequiredMixin, LoginRequiredMixin, View):
                 return JsonResponse({'error': 'Invalid JSON'}, status=400)
         else:
             data = request.POST
+        if isinstance(data, list):
+            return self.post_many(request, pk, data)
         serializer = CommentSerializer(data=data)
         if serializer.is_valid():
-            comment = Comment.objects.create(
-                project=project,
-                user=request.user,
-                text=serializer.validated_data['text']
+            if settings.PROJECTS_COMMENT_INGEST:
+                # Batched with concurrent comments; answers once the batch committed.
+                future = get_comment_ingestor().submit(pk, request.user.pk, serializer.validated_data['text'])
+                try:
+                    comment = future.result(timeout=settings.PROJECTS_COMMENT_INGEST_TIMEOUT)
+                except FutureTimeoutError:
+                    return JsonResponse(
+                        {'error': 'The comment was not confirmed in time; it may still be saved.'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    )
+                except Exception:
+                    logger.exception('The comment ingestor failed to save a comment on project %s.', pk)
+                    return JsonResponse(
+                        {'error': 'The comment could not be saved.'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    )
+            else:
+                with transaction.atomic():
+                    comment = Comment.objects.create(
+                        project_id=pk,
+                        user=request.user,
+                        text=serializer.validated_data['text']
+                    )
+                    Project.objects.record_activity(pk, comments=1)
+            if request.htmx:
+                project = self.get_project()
+                context = {'project': project, 'comment_page': get_comment_page(project)}
+                return render(request, 'projects/_comment_partial.html', context, status=status.HTTP_201_CREATED)
+            return JsonResponse({'id': comment.pk, 'text': comment.text}, status=status.HTTP_201_CREATED)
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def post_many(self, request, pk, data):
+        """
+        Creates a JSON array of comments all at once: validated together, then
+        written with one bulk_create and one counter update. Either every item
+        is created or, if any item is invalid, none is, and `errors` lists the
+        problems per item ({} for the valid ones), so a client can fix and
+        resend the same batch without creating duplicates.
+        """
+        limit = settings.PROJECTS_COMMENT_BATCH_LIMIT
+        if not data or len(data) > limit:
+            return JsonResponse(
+                {'error': f'Send between 1 and {limit} comments at a time.'}, status=status.HTTP_400_BAD_REQUEST
             )
-            comment.save()
-            return HttpResponse(project.comments, status=status.HTTP_201_CREATED)
-        return HttpResponse(serializer.error_messages, status=status.HTTP_400_BAD_REQUEST)
+        serializer = CommentSerializer(data=data, many=True)
+        if not serializer.is_valid():
+            return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            comments = Comment.objects.bulk_create([
+                Comment(project_id=pk, user=request.user, text=item['text'])
+                for item in serializer.validated_data
+            ])
+            Project.objects.record_activity(pk, comments=len(comments))
+            # bulk_create sends no signals.
+            add_comments(pk, len(comments), comments[0].created_at)
+            bump_fragment_version(pk)
+            publish_project_event(pk, COMMENTS)
+        return JsonResponse(
+            {'created': len(comments), 'results': [{'id': c.pk, 'text': c.text} for c in comments]},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@method_decorator(conditional_project_page, name='get')
+class ProjectCommentFeedView(LoginRequiredMixin, UserRoleRequiredMixin, View):
+    """
+    Serves older pages of a project's comment feed as HTMX fragments.
+    The first page is rendered by ProjectDetailView; each page ends with a
+    "Load older comments" button pointing at the next cursor.
+    """
+    required_roles = ['Owner', 'Editor', 'Reader']
+    read_replica = True
+
+    def get(self, request, pk):
+        project = self.get_project()
+        comment_page = get_comment_page(project, request.GET.get('cursor'))
+        context = {'project': project, 'comment_page': comment_page}
+        return render(request, 'projects/_comment_page.html', context)
     
 
+class ProjectSearchView(LoginRequiredMixin, View):
+    """
+    Ranked full-text search over the user's projects and their comments
+    (see `projects.search`). The live-search box on the project list sends
+    `?q=` as the user types and swaps in the results partial.
+    """
+    read_replica = True
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        context = {'query': query, 'results': search(request.user, query) if query else []}
+        if request.htmx:
+            return render(request, 'projects/_search_results.html', context)
+        return render(request, 'projects/search.html', context)
+
+
+class DashboardView(LoginRequiredMixin, View):
+    """
+    The user's counts per role, overdue and starting-this-week projects and
+    recent comments, read from their precomputed summary row (see
+    `projects.dashboard`).
+    """
+
+    def get(self, request):
+        summary = get_dashboard_summary(request.user)
+        return render(request, 'projects/dashboard.html', {'summary': summary})
+
+
 class DeleteComment(UserRoleRequiredMixin, LoginRequiredMixin, View):
     """
     Allows users to delete their own comments or the project owner's comments.
     """
     required_roles = ['Owner']
 
-    def post(self, request, project_pk, comment_pk):
-        project = get_object_or_404(Project, pk=project_pk)
-        comment = get_object_or_404(Comment, pk=comment_pk, project=project)
+    def post(self, request, pk, comment_pk):
+        comment = get_object_or_404(Comment, pk=comment_pk, project__pk=pk)
 
-        comment.delete()
+        with transaction.atomic():
+            deleted, _ = comment.delete()
+            if deleted:
+                Project.objects.record_activity(pk, comments=-1)
 
         if request.htmx:
-            return HttpResponse(status=204)  # No content response for HTMX
+            # An empty 200 (not 204, which HTMX does not swap) removes the comment from the page.
+            return HttpResponse('')
+
+        return redirect('projects:project-detail', pk=pk)
 
-        return redirect('projects:project-detail', pk=project.pk)
\ No newline at end of file
+
+# --- Async read path ---
+# Native async variants of the busiest read views. Under the ASGI entry point
+# they run on the event loop instead of occupying a worker thread each, so
+# slow clients do not cap concurrency. They use the async ORM (`aget`,
+# `aiterator`) and async role checks in place of UserRoleRequiredMixin.
+
+class AsyncLoginRequiredMixin:
+    """
+    Async counterpart of LoginRequiredMixin: resolves `request.user` without
+    blocking the event loop and redirects anonymous users to the login page.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncUserRoleRequiredMixin(AsyncLoginRequiredMixin):
+    """
+    Async counterpart of UserRoleRequiredMixin. The membership check goes
+    through `aget_project_access`, so it shares the role cache with the sync
+    views and attaches the same `request.project_access`.
+    """
+    required_roles = []
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        access = await aget_project_access(request, kwargs['pk'])
+        if access is None:
+            raise Http404
+        if not access.has_role(self.required_roles):
+            raise PermissionDenied
+        # Skip AsyncLoginRequiredMixin; the user was already checked above.
+        return await super(AsyncLoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+async def aget_comment_page(project, cursor=None):
+    """Async version of `get_comment_page`."""
+    try:
+        return await apaginate_keyset(
+            project.comments.select_related('user'),
+            cursor,
+            settings.PROJECTS_COMMENT_PAGE_SIZE,
+            keys=('created_at', 'id'),
+        )
+    except ValueError:
+        raise BadRequest('Invalid cursor.')
+
+
+class AsyncProjectListView(AsyncLoginRequiredMixin, View):
+    """
+    Async variant of ProjectListView, rendering the same templates.
+    """
+    read_replica = True
+
+    async def get(self, request):
+        try:
+            page = await apaginate_keyset(
+                Project.objects.for_member(request.user),
+                request.GET.get('cursor'),
+                settings.PROJECTS_PAGE_SIZE,
+                keys=('updated_at', 'id'),
+            )
+        except ValueError:
+            raise BadRequest('Invalid cursor.')
+
+        if request.htmx and 'cursor' in request.GET:
+            template_name = 'projects/_project_list_page.html'
+        elif request.htmx:
+            template_name = 'projects/_project_list_partial.html'
+        else:
+            template_name = 'projects/project_list.html'
+        context = {
+            'projects': page.items,
+            'page': page,
+            'list_url': reverse('projects:project-list-async'),
+        }
+        # Every value in the context is already loaded, so rendering does no I/O.
+        return render(request, template_name, context)
+
+
+class AsyncProjectDetailView(AsyncUserRoleRequiredMixin, View):
+    """
+    Async variant of ProjectDetailView, rendering the same template.
+    """
+    required_roles = ['Owner', 'Editor', 'Reader']
+    read_replica = True
+
+    async def get(self, request, pk):
+        project = await request.project_access.aget_project()
+        members = [
+            membership async for membership in
+            project.memberships.select_related('user').order_by('user__username').aiterator()
+        ]
+        context = {
+            'object': project,
+            'project': project,
+            'members': members,
+            'comment_page': await aget_comment_page(project),
+            'comments_url': reverse('projects:project-comments-async', kwargs={'pk': pk}),
+        }
+        return render(request, 'projects/project_detail.html', context)
+
+
+class AsyncProjectCommentFeedView(AsyncUserRoleRequiredMixin, View):
+    """
+    Async variant of ProjectCommentFeedView ("Load older comments").
+    """
+    required_roles = ['Owner', 'Editor', 'Reader']
+    read_replica = True
+
+    async def get(self, request, pk):
+        project = await request.project_access.aget_project()
+        context = {
+            'project': project,
+            'comment_page': await aget_comment_page(project, request.GET.get('cursor')),
+            'comments_url': reverse('projects:project-comments-async', kwargs={'pk': pk}),
+        }
+        return render(request, 'projects/_comment_page.html', context)
+
+
+class ProjectEventStreamView(AsyncUserRoleRequiredMixin, View):
+    """
+    Server-Sent Events stream of one project, opened once by the detail page
+    (the htmx `sse` extension). When comments or members change (see
+    `projects.events`), the comment list or member table is re-rendered for
+    this user and pushed as an event that htmx swaps into the page.
+
+    Between events the stream only sends a keepalive comment every
+    PROJECTS_EVENTS_HEARTBEAT seconds. It ends after PROJECTS_EVENTS_MAX_AGE
+    seconds and the browser reconnects, which re-checks access and bounds
+    how long a stream of a vanished client can linger. A member removed from
+    the project has the stream closed on the next member change.
+
+    Needs the ASGI entry point: a WSGI worker would be blocked for the
+    stream's whole lifetime, so there the view answers 204, which tells the
+    browser not to reconnect.
+    """
+    required_roles = ['Owner', 'Editor', 'Reader']
+    templates = {
+        COMMENTS: 'projects/_comment_partial.html',
+        MEMBERS: 'projects/_project_members_partial.html',
+    }
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        project = await request.project_access.aget_project()
+        response = StreamingHttpResponse(self.stream(request, project), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keeps nginx from buffering the events.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, request, project):
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + settings.PROJECTS_EVENTS_MAX_AGE
+        async with get_broker().subscribe(project.pk) as subscription:
+            # Milliseconds the browser waits before reconnecting.
+            yield 'retry: 3000\n\n'
+            while (remaining := closes_at - loop.time()) > 0:
+                kinds = await subscription.wait(min(settings.PROJECTS_EVENTS_HEARTBEAT, remaining))
+                if not kinds:
+                    yield ': keepalive\n\n'
+                    continue
+                if MEMBERS in kinds:
+                    # The user may have been removed or given another role.
+                    request.project_access = None
+                    if await aget_project_access(request, project.pk) is None:
+                        return
+                for kind in sorted(kinds):
+                    html = await sync_to_async(self.render_fragment)(request, project, kind)
+                    yield format_event(kind, html)
+
+    def render_fragment(self, request, project, kind):
+        context = {'project': project}
+        if kind == COMMENTS:
+            context['comment_page'] = get_comment_page(project)
+        else:
+            context['members'] = project.memberships.select_related('user').order_by('user__username')
+        return render_to_string(self.templates[kind], context, request=request)